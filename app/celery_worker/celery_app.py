@@ -1,9 +1,13 @@
 """
 Celery Application Configuration
 """
+import asyncio
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.config.settings import settings
+from app.services.http_client import open_http_clients, close_http_clients
 
 # Configurar Celery
 celery_app = Celery(
@@ -33,5 +37,37 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+# Event loop persistente por proceso worker: permite reutilizar los clientes
+# HTTP compartidos (y su pool de conexiones) entre ejecuciones de tareas
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    global _worker_loop
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_loop.run_until_complete(open_http_clients())
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    global _worker_loop
+    if _worker_loop is not None:
+        _worker_loop.run_until_complete(close_http_clients())
+        _worker_loop.close()
+        _worker_loop = None
+
+
+def run_async(coro):
+    """
+    Ejecuta una corrutina desde una tarea de Celery.
+    Usa el loop persistente del worker si existe (fuera del worker, uno nuevo).
+    """
+    if _worker_loop is None:
+        return asyncio.run(coro)
+    return _worker_loop.run_until_complete(coro)
+
+
 if __name__ == "__main__":
     celery_app.start()
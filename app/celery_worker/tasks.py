@@ -1,12 +1,12 @@
 """
 Celery Tasks - Monitoreo automático del mercado
 """
-import asyncio
 from datetime import datetime
 from typing import Optional
 
-from app.celery_worker.celery_app import celery_app
+from app.celery_worker.celery_app import celery_app, run_async
 from app.controllers.multi_timeframe_controller import MultiTimeframeController
+from app.services.multi_timeframe_service import MultiTimeframeService
 from app.config.settings import get_settings
 
 # Variable para rastrear la última señal enviada (evitar spam)
@@ -24,7 +24,7 @@ def monitor_market_signals():
     """
     try:
         # Ejecutar la tarea asíncrona
-        result = asyncio.run(_check_and_alert())
+        result = run_async(_check_and_alert())
         return result
     except Exception as e:
         print(f"❌ Error en monitor_market_signals: {e}")
@@ -65,7 +65,7 @@ async def _check_and_alert() -> dict:
         print(f"📊 Votos: {votes.get('long', 0)} LONG, {votes.get('short', 0)} SHORT, {votes.get('neutral', 0)} NEUTRAL")
         
         # Verificar si hay señal con buena confianza (reducido de 50% a 40%)
-        if signal and confidence >= 40:
+        if signal and confidence >= MultiTimeframeService.ALERT_MIN_CONFIDENCE:
             # Verificar si es una señal nueva (evitar spam)
             should_send = _should_send_alert(signal, current_price, confidence)
             
@@ -173,6 +173,39 @@ def _should_send_alert(signal: str, price: Optional[float], confidence: float) -
     return False
 
 
+@celery_app.task(name="app.celery_worker.tasks.backfill_klines")
+def backfill_klines(symbol: str, timeframe: str, start: str, end: Optional[str] = None):
+    """
+    Tarea para cargar histórico largo de velas al almacén local (ej: años de 1m/15m)
+    """
+    from app.controllers.market_controller import backfill_klines as _backfill
+
+    try:
+        result = run_async(_backfill(symbol, timeframe, start, end))
+        print(f"✅ Backfill {symbol} {timeframe}: {result['bars_written']} velas en {result['elapsed_seconds']}s")
+        return {"status": "success", **result}
+    except Exception as e:
+        print(f"❌ Error en backfill_klines: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@celery_app.task(name="app.celery_worker.tasks.walk_forward")
+def walk_forward(payload: dict):
+    """
+    Walk-forward largo en segundo plano (mismo payload que POST /backtest/walk-forward).
+    Si se corta, volver a lanzarla con el mismo payload retoma desde el checkpoint.
+    """
+    from app.controllers.backtest_controller import walk_forward_sync
+
+    try:
+        result = walk_forward_sync(payload)
+        print(f"✅ Walk-forward {result['run_id']}: {result['folds_total']} folds en {result['elapsed_seconds']}s")
+        return {"status": "success", **result}
+    except Exception as e:
+        print(f"❌ Error en walk_forward: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @celery_app.task(name="app.celery_worker.tasks.test_telegram")
 def test_telegram():
     """
@@ -182,7 +215,7 @@ def test_telegram():
         from app.services.telegram_service import TelegramService
         
         telegram = TelegramService()
-        result = asyncio.run(telegram.send_message(
+        result = run_async(telegram.send_message(
             "🤖 Test de Celery Worker\n\n"
             "✅ El sistema de monitoreo automático está funcionando correctamente.\n"
             f"⏰ Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
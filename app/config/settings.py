@@ -20,6 +20,48 @@ class Settings(BaseSettings):
     POLL_SECONDS: int
     CANDLES_LIMIT: int
 
+    # Almacén local de velas (evita re-descargar el histórico en cada consulta)
+    KLINE_STORE_ENABLED: bool = True
+    KLINE_STORE_DIR: str = "data/klines"
+    BACKFILL_CONCURRENCY: int = 8
+
+    # Stream WebSocket de velas (buffers en memoria por symbol/timeframe)
+    STREAM_ENABLED: bool = False
+    STREAM_SYMBOLS: str | None = None  # CSV, por defecto SYMBOL
+    STREAM_TIMEFRAMES: str | None = None  # CSV, por defecto TIMEFRAME
+    STREAM_BUFFER_SIZE: int = 500
+    STREAM_MAX_STALE_SECONDS: float = 10.0
+    STREAM_MONITOR_SECONDS: float = 1.0
+    BINANCE_WS_BASE: str = "wss://stream.binance.com:9443"
+
+    # Libro de trades abiertos en memoria: cada cuánto se recarga desde la base
+    # (trades creados por otros procesos). 0 = solo al arrancar
+    TRADE_BOOK_RESYNC_SECONDS: int = 300
+
+    # Monitor de SL/TP por rango: máximo/mínimo de las velas desde el último chequeo
+    # (detecta mechas entre polls, permite POLL_SECONDS de minutos). Cambia el precio de cierre
+    # (nivel tocado u open si hubo gap, en vez del último precio): opt-in hasta validarlo.
+    # False = último precio cada POLL_SECONDS (comportamiento original)
+    MONITOR_INTRABAR_ENABLED: bool = False
+    MONITOR_INTRABAR_TIMEFRAME: str = "1m"
+    MONITOR_INTRABAR_MAX_BARS: int = 1440  # tope hacia atrás (ej: tras un reinicio)
+    # Cada tick hace una sola request batch de ticker y solo pide velas de los símbolos cuyo
+    # rango de precios visto desde el último chequeo, ± N ATRs (del timeframe del trade),
+    # alcanza algún SL/TP.
+    # Costo: una mecha más larga que N ATRs se detecta recién cuando el precio vuelve a
+    # acercarse al nivel (el rango no revisado se conserva). 0 = velas de todos los símbolos
+    MONITOR_INTRABAR_SCREEN_ATR: float = 1.0
+
+    # Cadencia adaptativa por trade: intervalo lineal según la distancia al SL/TP en ATRs
+    # (MIN sobre el nivel, MAX a partir de MONITOR_FAR_ATR). Los trades lejanos pueden pasar
+    # hasta MAX sin chequearse: usar junto con MONITOR_INTRABAR_ENABLED para no perder mechas.
+    # Opt-in hasta validarlo. False = todos cada POLL_SECONDS (comportamiento original)
+    MONITOR_ADAPTIVE_ENABLED: bool = False
+    MONITOR_MIN_INTERVAL_SECONDS: float = 2.0
+    MONITOR_MAX_INTERVAL_SECONDS: float = 300.0
+    MONITOR_FAR_ATR: float = 6.0
+    MONITOR_ATR_REFRESH_SECONDS: float = 300.0
+
     RISK_REWARD: float
     ATR_MULTIPLIER_SL: float
 
@@ -33,6 +75,41 @@ class Settings(BaseSettings):
     BINANCE_TAKER_FEE: float
     BINANCE_MAKER_FEE: float
 
+    # Pool HTTP compartido (keep-alive). HTTP/2 requiere httpx[http2]
+    HTTP2_ENABLED: bool = False
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Caché de velas compartida (memoria + Redis opcional), se invalida al cerrar cada vela
+    MARKET_CACHE_ENABLED: bool = True
+    MARKET_CACHE_MAX_ENTRIES: int = 256
+    MARKET_CACHE_MAX_TTL_SECONDS: float | None = 60.0
+    MARKET_CACHE_REDIS_URL: str | None = None
+
+    # Multi-timeframe: construir 1h/4h/1d agregando una sola serie base (ej: "15m")
+    MTF_BASE_TIMEFRAME: str | None = None
+    MTF_RESAMPLE_BARS: int = 300
+    # Tope de velas base a descargar para resamplear (2 requests); los timeframes que
+    # necesiten más se piden aparte, salvo que el almacén local ya tenga ese histórico
+    MTF_RESAMPLE_MAX_BASE_BARS: int = 2000
+
+    # Caché de indicadores (sma/rsi/atr) por symbol/timeframe/vela
+    INDICATOR_CACHE_ENABLED: bool = True
+    INDICATOR_CACHE_MAX_ENTRIES: int = 512
+
+    # Optimizador de parámetros (pool de procesos; por defecto un worker por CPU)
+    OPTIMIZER_WORKERS: int | None = None
+    OPTIMIZER_MAX_COMBINATIONS: int = 20000
+    WALK_FORWARD_DIR: str = "data/walk_forward"  # checkpoints para retomar corridas
+
+    # Screener multi-símbolo (CSV, por defecto SYMBOL)
+    SCREENER_SYMBOLS: str | None = None
+
+    # Límite de peso REST de Binance (por minuto e IP)
+    BINANCE_WEIGHT_LIMIT: int = 6000
+    BINANCE_RATE_LIMIT_RETRIES: int = 2
+
     BINANCE_API_KEY: str | None = None
     BINANCE_API_SECRET: str | None = None
 
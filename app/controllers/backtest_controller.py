@@ -0,0 +1,104 @@
+import asyncio
+
+from app.schemas.backtest_schema import BacktestRequest, MtfReplayRequest, OptimizeRequest, WalkForwardRequest
+from app.services.backtest_service import BacktestService, BacktestConfig
+from app.services.multi_timeframe_service import MultiTimeframeService
+from app.services.optimizer_service import OptimizerService
+from app.services.trade_manager import StrategyParams
+from app.services.walk_forward_service import WalkForwardService
+from app.util.dates import iso_to_ms
+
+backtests = BacktestService()
+optimizer = OptimizerService(backtests)
+walk_forward = WalkForwardService(backtests)
+
+
+async def run_backtest(payload: dict):
+    req = BacktestRequest(**payload)
+    params = StrategyParams.from_settings(**req.params.overrides())
+    config = BacktestConfig.from_settings(fee_rate=req.fee_rate, tp_fee_rate=req.tp_fee_rate, intrabar=req.intrabar)
+
+    # CPU + lectura de disco: fuera del event loop
+    result = await asyncio.to_thread(
+        backtests.run,
+        symbol=req.symbol.upper(),
+        timeframe=req.timeframe,
+        start_ms=iso_to_ms(req.start) if req.start else None,
+        end_ms=iso_to_ms(req.end) if req.end else None,
+        params=params,
+        config=config,
+    )
+    response = result.to_dict()
+    if not req.include_trades:
+        response.pop("trades")
+    return {"symbol": req.symbol.upper(), **response}
+
+
+async def run_optimization(payload: dict):
+    req = OptimizeRequest(**payload)
+    config = BacktestConfig.from_settings(fee_rate=req.fee_rate, tp_fee_rate=req.tp_fee_rate, intrabar=req.intrabar)
+    return await asyncio.to_thread(
+        optimizer.optimize,
+        symbol=req.symbol.upper(),
+        timeframe=req.timeframe,
+        space=req.space,
+        method=req.method,
+        samples=req.samples,
+        seed=req.seed,
+        objectives=req.objectives,
+        min_trades=req.min_trades,
+        top=req.top,
+        start_ms=iso_to_ms(req.start) if req.start else None,
+        end_ms=iso_to_ms(req.end) if req.end else None,
+        config=config,
+        workers=req.workers,
+    )
+
+
+def walk_forward_sync(payload: dict):
+    """Versión síncrona (la usa también la tarea de Celery)"""
+    req = WalkForwardRequest(**payload)
+    config = BacktestConfig.from_settings(fee_rate=req.fee_rate, tp_fee_rate=req.tp_fee_rate, intrabar=req.intrabar)
+    return walk_forward.run(
+        symbol=req.symbol.upper(),
+        timeframe=req.timeframe,
+        space=req.space,
+        train_bars=req.train_bars,
+        test_bars=req.test_bars,
+        step_bars=req.step_bars,
+        anchored=req.anchored,
+        method=req.method,
+        samples=req.samples,
+        seed=req.seed,
+        objectives=req.objectives,
+        min_trades=req.min_trades,
+        start_ms=iso_to_ms(req.start) if req.start else None,
+        end_ms=iso_to_ms(req.end) if req.end else None,
+        config=config,
+        workers=req.workers,
+        resume=req.resume,
+    )
+
+
+async def run_walk_forward(payload: dict):
+    return await asyncio.to_thread(walk_forward_sync, payload)
+
+
+def mtf_replay_sync(payload: dict):
+    req = MtfReplayRequest(**payload)
+    symbol = req.symbol.upper()
+    params = StrategyParams.from_settings(**req.params.overrides())
+    service = MultiTimeframeService(symbol, base_timeframe=req.base_timeframe)
+    candles, start_index = backtests.load_candles(
+        symbol,
+        req.base_timeframe,
+        start_ms=iso_to_ms(req.start) if req.start else None,
+        end_ms=iso_to_ms(req.end) if req.end else None,
+        warmup=service.replay_warmup_bars(),
+    )
+    replay = service.replay_consensus(candles, start_index=start_index, params=params)
+    return service.replay_report(replay, max_events=req.max_events)
+
+
+async def run_mtf_replay(payload: dict):
+    return await asyncio.to_thread(mtf_replay_sync, payload)
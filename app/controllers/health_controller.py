@@ -1,8 +1,36 @@
 from fastapi import APIRouter
 
+from app.services.http_client import http_pool_stats
+from app.services.indicator_cache import indicator_cache
+from app.services.market_service import MarketService
+from app.services.trade_book import trade_book
+
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/health/http")
+def health_http():
+    return {
+        "clients": http_pool_stats(),
+        "binance_weight": MarketService.limiter.stats(),
+    }
+
+
+@router.get("/health/cache")
+def health_cache():
+    cache = MarketService.cache
+    return {
+        "market_cache": cache.stats() if cache else None,
+        "market_inflight": MarketService.inflight.stats(),
+        "indicator_cache": indicator_cache.stats() if indicator_cache else None,
+    }
+
+
+@router.get("/health/trade-book")
+def health_trade_book():
+    return trade_book.stats()
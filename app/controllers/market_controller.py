@@ -0,0 +1,26 @@
+from app.config.settings import settings
+from app.services.market_service import MarketService
+from app.services.screener_service import ScreenerService
+from app.util.dates import iso_to_ms
+
+market = MarketService()
+screener = ScreenerService(market)
+
+
+async def backfill_klines(symbol: str, timeframe: str, start: str, end: str | None = None):
+    return await market.backfill(
+        symbol=symbol.upper(),
+        timeframe=timeframe,
+        start_ms=iso_to_ms(start),
+        end_ms=iso_to_ms(end) if end else None,
+    )
+
+
+async def screen_market(symbols: str | None, timeframe: str | None, limit: int, top: int | None):
+    symbols = symbols or settings.SCREENER_SYMBOLS or settings.SYMBOL
+    return await screener.screen(
+        symbols=symbols.split(","),
+        timeframe=timeframe or settings.TIMEFRAME,
+        limit=limit,
+        top=top,
+    )
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.trade_schema import CreateTradeRequest
 from app.services.trade_manager import TradeRepository
 from app.services.market_service import MarketService
+from app.services.market_stream import get_market_stream
 from app.services.trade_manager import StrategyEngine
 from app.services.ai_service import AIService
 from app.services.chart_service import ChartService
@@ -13,12 +14,21 @@ ai = AIService()
 charts = ChartService()
 
 
+async def _get_live_candles(symbol: str, timeframe: str, limit: int = 300):
+    """Velas desde el buffer del stream si está listo; si no, REST"""
+    stream = get_market_stream()
+    candles = stream.get_candles(symbol, timeframe, limit=limit) if stream else None
+    if candles is None:
+        candles = await market.get_candles(symbol=symbol, timeframe=timeframe, limit=limit)
+    return candles
+
+
 async def get_live_signal(session: AsyncSession):
-    df = await market.get_klines_df(symbol=settings.SYMBOL, timeframe=settings.TIMEFRAME)
-    now_price = float(df["close"].iloc[-1])
+    candles = await _get_live_candles(settings.SYMBOL, settings.TIMEFRAME)
+    now_price = candles.last_close
 
     # Crear instancia de StrategyEngine con verbose=True para mostrar logs
-    strategy = StrategyEngine(df, timeframe=settings.TIMEFRAME, verbose=True)
+    strategy = StrategyEngine(candles, timeframe=settings.TIMEFRAME, verbose=True, symbol=settings.SYMBOL)
     signal = strategy.compute_signal()
     # signal: dict con {signal, entry, sl, tp, confirmations}
     
@@ -29,9 +39,9 @@ async def get_live_signal(session: AsyncSession):
     # Preparar contexto de mercado para IA
     market_context = {
         "current_price": now_price,
-        "recent_high": float(df["high"].tail(20).max()),
-        "recent_low": float(df["low"].tail(20).min()),
-        "volume_avg": float(df["volume"].tail(20).mean()),
+        "recent_high": float(candles.high[-20:].max()),
+        "recent_low": float(candles.low[-20:].min()),
+        "volume_avg": float(candles.volume[-20:].mean()),
     }
     
     if settings.AI_ENABLED:
@@ -74,6 +84,6 @@ async def list_trades(session: AsyncSession, status: str | None = None):
 
 async def get_chart(session: AsyncSession, trade_id: int):
     trade = await repo.get_trade(session=session, trade_id=trade_id)
-    df = await market.get_klines_df(symbol=trade["symbol"], timeframe=trade["timeframe"])
-    html = charts.render_trade_chart_html(df=df, trade=trade)
+    candles = await _get_live_candles(trade["symbol"], trade["timeframe"])
+    html = charts.render_trade_chart_html(candles=candles, trade=trade)
     return {"html": html}
@@ -4,8 +4,12 @@ from app.middleware.logging import setup_logging_middleware
 from app.routers.trade_router import router as trade_router
 from app.routers.multi_timeframe_router import router as multi_timeframe_router
 from app.routers.test_router import router as test_router
+from app.routers.market_router import router as market_router
+from app.routers.backtest_router import router as backtest_router
 from app.controllers.health_controller import router as health_router
 from app.db.session import init_db
+from app.services.http_client import open_http_clients, close_http_clients
+from app.services.market_stream import start_market_stream, stop_market_stream
 from app.services.trade_manager import TradeManager
 
 api = FastAPI(title=settings.APP_NAME)
@@ -16,6 +20,8 @@ api.include_router(health_router, tags=["health"])
 api.include_router(trade_router, prefix="/trades", tags=["trades"])
 api.include_router(multi_timeframe_router, tags=["multi-timeframe"])
 api.include_router(test_router, tags=["testing"])
+api.include_router(market_router, tags=["market-data"])
+api.include_router(backtest_router, tags=["backtesting"])
 
 _trade_manager: TradeManager | None = None
 
@@ -23,8 +29,10 @@ _trade_manager: TradeManager | None = None
 @api.on_event("startup")
 async def on_startup():
     await init_db()
+    await open_http_clients()
+    stream = await start_market_stream()
     global _trade_manager
-    _trade_manager = TradeManager()
+    _trade_manager = TradeManager(stream=stream)
     await _trade_manager.start()
 
 
@@ -33,4 +41,6 @@ async def on_shutdown():
     global _trade_manager
     if _trade_manager:
         await _trade_manager.stop()
-        _trade_manager = None
\ No newline at end of file
+        _trade_manager = None
+    await stop_market_stream()
+    await close_http_clients()
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Backtest Routes
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import ValidationError
+
+from app.controllers.backtest_controller import run_backtest, run_mtf_replay, run_optimization, run_walk_forward
+
+router = APIRouter(prefix="/backtest", tags=["Backtesting"])
+
+
+@router.post("")
+async def backtest(payload: dict):
+    """
+    Backtest de la estrategia sobre las velas del almacén local
+
+    Usa las mismas reglas que /trades/signal y el mismo cierre por SL/TP y fees que el
+    TradeManager. Las velas se cargan antes con POST /market/backfill.
+
+    Returns:
+        Dict con stats (win rate, PnL neto, drawdown, sharpe...), trades y curva de equity
+    """
+    try:
+        return await run_backtest(payload)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/optimize")
+async def optimize(payload: dict):
+    """
+    Barrido de parámetros (grid o random search) en paralelo sobre un pool de procesos
+
+    Ejemplo de space: {"ma_fast": [10, 20, 30], "ma_slow": [50, 100], "lookback": [10, 15, 20]}
+    (con method=random también {"risk_reward": {"min": 1.5, "max": 3.0}}).
+    Los parámetros no incluidos salen de settings.
+
+    Returns:
+        Las mejores combinaciones según `objectives` (ej: ["sharpe", "max_drawdown_pct"])
+    """
+    try:
+        return await run_optimization(payload)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/walk-forward")
+async def walk_forward(payload: dict):
+    """
+    Walk-forward: optimiza en cada ventana de train y evalúa en la ventana de test siguiente
+
+    Los folds corren en paralelo y se guardan en un checkpoint a medida que terminan;
+    repetir el mismo request retoma la corrida (resume=false para recalcular).
+    Para historiales largos conviene la tarea de Celery `walk_forward`.
+
+    Returns:
+        Reporte por fold (parámetros elegidos, stats de train y test) y el resultado
+        fuera de muestra unido (stats, trades y curva de equity)
+    """
+    try:
+        return await run_walk_forward(payload)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/mtf-replay")
+async def mtf_replay(payload: dict):
+    """
+    Replay histórico del consenso multi-timeframe (15m, 1h, 4h, 1d) sin lookahead
+
+    Los timeframes mayores se resamplean desde `base_timeframe` del almacén local y en
+    cada vela base solo cuentan sus velas ya cerradas. Aplica las mismas reglas que
+    /trades/multi-signal (votos, score ponderado ±30, confianza) y el umbral de alerta
+    del monitor (40%).
+
+    Returns:
+        Distribución del consenso y las alertas que se habrían emitido
+    """
+    try:
+        return await run_mtf_replay(payload)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,48 @@
+"""
+Market Data Routes
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.controllers.market_controller import backfill_klines, screen_market
+
+router = APIRouter(prefix="/market", tags=["Market Data"])
+
+
+@router.post("/backfill")
+async def backfill(
+    symbol: str = Query(...),
+    timeframe: str = Query(...),
+    start: str = Query(..., description="Fecha ISO, ej: 2023-01-01"),
+    end: str | None = Query(default=None, description="Fecha ISO (por defecto ahora)"),
+):
+    """
+    Carga en el almacén local el histórico de velas cerradas entre start y end
+
+    Descarga el rango en bloques de 1000 velas en paralelo (respetando el peso de Binance).
+    Para rangos de varios años conviene la tarea de Celery `backfill_klines`.
+    """
+    try:
+        return await backfill_klines(symbol, timeframe, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/screener")
+async def screener(
+    symbols: str | None = Query(default=None, description="CSV, ej: BTCUSDT,ETHUSDT (por defecto SCREENER_SYMBOLS)"),
+    timeframe: str | None = Query(default=None, description="Por defecto TIMEFRAME"),
+    limit: int = Query(default=300, ge=1, le=1000),
+    top: int | None = Query(default=None, ge=1),
+):
+    """
+    Screener de mercado: aplica las reglas de la estrategia a todos los símbolos a la vez
+
+    Las velas se apilan en matrices (símbolos x tiempo) y MA/RSI/ATR/breakout se calculan
+    en una sola pasada. Resultado ordenado: primero señales, luego confirmaciones y
+    cercanía al breakout (en ATRs).
+    """
+    try:
+        return await screen_market(symbols, timeframe, limit, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,79 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, Dict, List, Union
+
+
+class StrategyParamsOverride(BaseModel):
+    """Parámetros de la estrategia; los que no se envían salen de settings"""
+    ma_fast: Optional[int] = Field(default=None, gt=0)
+    ma_slow: Optional[int] = Field(default=None, gt=0)
+    rsi_period: Optional[int] = Field(default=None, gt=0)
+    rsi_min: Optional[float] = None
+    rsi_max: Optional[float] = None
+    atr_multiplier_sl: Optional[float] = Field(default=None, gt=0)
+    risk_reward: Optional[float] = Field(default=None, gt=0)
+    lookback: Optional[int] = Field(default=None, gt=0)
+
+    def overrides(self) -> dict:
+        return self.model_dump(exclude_none=True)
+
+
+class BacktestRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    start: Optional[str] = Field(default=None, description="Fecha ISO (por defecto todo lo almacenado)")
+    end: Optional[str] = None
+    params: StrategyParamsOverride = Field(default_factory=StrategyParamsOverride)
+    fee_rate: Optional[float] = Field(default=None, ge=0, description="Por defecto BINANCE_TAKER_FEE")
+    tp_fee_rate: Optional[float] = Field(default=None, ge=0, description="Ej: BINANCE_MAKER_FEE")
+    intrabar: Literal["sl_first", "tp_first", "nearest_open"] = "sl_first"
+    include_trades: bool = True
+
+
+class OptimizeRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+    # Por parámetro: lista de valores (grid/random) o {"min": a, "max": b} (solo random)
+    space: Dict[str, Union[List[Union[int, float]], Dict[str, Union[int, float]]]]
+    method: Literal["grid", "random"] = "grid"
+    samples: int = Field(default=500, gt=0)
+    seed: Optional[int] = None
+    objectives: List[str] = Field(default_factory=lambda: ["sharpe"])
+    min_trades: int = Field(default=10, ge=0)
+    top: int = Field(default=20, gt=0)
+    fee_rate: Optional[float] = Field(default=None, ge=0)
+    tp_fee_rate: Optional[float] = Field(default=None, ge=0)
+    intrabar: Literal["sl_first", "tp_first", "nearest_open"] = "sl_first"
+    workers: Optional[int] = Field(default=None, gt=0)
+
+
+class WalkForwardRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    start: Optional[str] = None
+    end: Optional[str] = None
+    space: Dict[str, Union[List[Union[int, float]], Dict[str, Union[int, float]]]]
+    train_bars: int = Field(gt=0, description="Velas de cada ventana de optimización")
+    test_bars: int = Field(gt=0, description="Velas fuera de muestra de cada fold")
+    step_bars: Optional[int] = Field(default=None, gt=0, description="Avance entre folds (por defecto test_bars)")
+    anchored: bool = False
+    method: Literal["grid", "random"] = "grid"
+    samples: int = Field(default=200, gt=0)
+    seed: Optional[int] = 0
+    objectives: List[str] = Field(default_factory=lambda: ["sharpe"])
+    min_trades: int = Field(default=10, ge=0)
+    fee_rate: Optional[float] = Field(default=None, ge=0)
+    tp_fee_rate: Optional[float] = Field(default=None, ge=0)
+    intrabar: Literal["sl_first", "tp_first", "nearest_open"] = "sl_first"
+    workers: Optional[int] = Field(default=None, gt=0)
+    resume: bool = True
+
+
+class MtfReplayRequest(BaseModel):
+    symbol: str
+    base_timeframe: str = Field(default="15m", description="Timeframe almacenado del que se resamplea el resto")
+    start: Optional[str] = None
+    end: Optional[str] = None
+    params: StrategyParamsOverride = Field(default_factory=StrategyParamsOverride)
+    max_events: int = Field(default=500, ge=0)
@@ -0,0 +1,364 @@
+"""
+Backtest Service
+Reproduce velas almacenadas con las mismas reglas de StrategyEngine y el mismo
+cierre por SL/TP y cálculo de fees que TradeManager / TradeRepository.close_trade
+"""
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from app.config.settings import settings
+from app.enums.trade_enums import TradeResult
+from app.services.indicator_cache import IndicatorCache
+from app.services.kline_store import KlineStore
+from app.services.trade_manager import StrategyEngine, StrategyParams
+from app.util.candles import CandleSeries
+from app.util.timeframes import timeframe_to_ms
+
+INTRABAR_ORDERS = ("sl_first", "tp_first", "nearest_open")
+
+_YEAR_MS = 365 * 86_400_000
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """
+    - fee_rate: fee por lado (entrada y salida), como Trade.fee_rate al crear el trade
+    - tp_fee_rate: fee de la salida por TP (ej: BINANCE_MAKER_FEE si el TP es límite);
+      None usa fee_rate, igual que close_trade
+    - intrabar: qué se asume si la misma vela toca SL y TP
+        sl_first (conservador), tp_first, nearest_open (el nivel más cerca del open)
+    """
+
+    fee_rate: float
+    tp_fee_rate: float | None = None
+    intrabar: str = "sl_first"
+
+    def __post_init__(self):
+        if self.intrabar not in INTRABAR_ORDERS:
+            raise ValueError(f"intrabar debe ser uno de {INTRABAR_ORDERS}")
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "BacktestConfig":
+        values = {"fee_rate": settings.BINANCE_TAKER_FEE}
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+
+@dataclass
+class BacktestResult:
+    open_time: np.ndarray
+    equity: np.ndarray  # capital compuesto por vela (arranca en 1.0, neto de fees)
+    trades: dict[str, np.ndarray]  # un array por campo, un elemento por trade cerrado
+    stats: dict
+    open_trade: dict | None = None
+    params: StrategyParams | None = None
+    config: BacktestConfig | None = None
+    timeframe: str | None = None
+
+    def trade_list(self) -> list[dict]:
+        """Trades con los mismos nombres de campo que TradeRepository._to_dict"""
+        t = self.trades
+        return [
+            {
+                "side": "long" if t["side"][i] > 0 else "short",
+                "entry_price": float(t["entry_price"][i]),
+                "stop_loss": float(t["stop_loss"][i]),
+                "take_profit": float(t["take_profit"][i]),
+                "opened_at": int(self.open_time[t["entry_index"][i]]),
+                "closed_at": int(self.open_time[t["exit_index"][i]]),
+                "close_price": float(t["close_price"][i]),
+                "result": TradeResult.win.value if t["win"][i] else TradeResult.loss.value,
+                "fee_paid": float(t["fee_paid"][i]),
+                "pnl_abs": float(t["pnl_abs"][i]),
+                "pnl_pct": float(t["pnl_pct"][i]),
+                "bars_held": int(t["exit_index"][i] - t["entry_index"][i]),
+            }
+            for i in range(len(t["side"]))
+        ]
+
+    def to_dict(self, max_equity_points: int = 2000) -> dict:
+        step = max(1, len(self.equity) // max_equity_points) if max_equity_points else 1
+        return {
+            "timeframe": self.timeframe,
+            "params": asdict(self.params) if self.params else None,
+            "config": asdict(self.config) if self.config else None,
+            "stats": self.stats,
+            "trades": self.trade_list(),
+            "open_trade": self.open_trade,
+            "equity_curve": {
+                "open_time": self.open_time[::step].tolist(),
+                "equity": np.round(self.equity[::step], 6).tolist(),
+            },
+        }
+
+
+def _first_exit(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    start: int,
+    side: int,
+    sl: float,
+    tp: float,
+    intrabar: str,
+) -> tuple[int, float, bool] | None:
+    """
+    Primera vela desde `start` que toca SL o TP: (índice, precio de cierre, ganó).
+    Se revisa por bloques crecientes (los trades suelen cerrar pronto).
+    - Si la vela abre más allá de un nivel (gap) se cierra al open
+    - Si toca ambos niveles decide `intrabar`; si no, se cierra al precio del nivel
+    """
+    n = len(high)
+    i, chunk = start, 64
+    while i < n:
+        j = min(n, i + chunk)
+        if side > 0:
+            sl_hit = low[i:j] <= sl
+            tp_hit = high[i:j] >= tp
+        else:
+            sl_hit = high[i:j] >= sl
+            tp_hit = low[i:j] <= tp
+        hit = sl_hit | tp_hit
+        if hit.any():
+            k = int(hit.argmax())
+            idx = i + k
+            o = float(open_[idx])
+            if (o <= sl) if side > 0 else (o >= sl):
+                return idx, o, False
+            if (o >= tp) if side > 0 else (o <= tp):
+                return idx, o, True
+            if sl_hit[k] and tp_hit[k]:
+                if intrabar == "tp_first":
+                    return idx, tp, True
+                if intrabar == "nearest_open" and abs(tp - o) < abs(o - sl):
+                    return idx, tp, True
+                return idx, sl, False
+            return (idx, tp, True) if tp_hit[k] else (idx, sl, False)
+        i = j
+        chunk = min(chunk * 2, 4096)
+    return None
+
+
+def simulate(
+    candles: CandleSeries,
+    series: dict[str, np.ndarray],
+    config: BacktestConfig,
+    start_index: int = 0,
+) -> tuple[dict[str, np.ndarray], np.ndarray, dict | None]:
+    """
+    Recorre las señales de compute_signal_series evento por evento (una posición a la vez):
+    - Entrada al cierre de la vela de la señal (como get_live_signal: entry = último precio)
+    - Desde la vela siguiente se busca el primer toque de SL/TP con high/low
+    - PnL de "1 unidad" y fees como close_trade: fee = rate * (entry + close)
+
+    Devuelve (trades, equity por vela, trade abierto al final o None).
+    """
+    open_, high, low, close = candles.open, candles.high, candles.low, candles.close
+    n = len(close)
+    signal = series["signal"]
+    candidates = np.flatnonzero(signal[start_index:]) + start_index
+    tp_fee_rate = config.tp_fee_rate if config.tp_fee_rate is not None else config.fee_rate
+
+    rows = []
+    open_trade = None
+    pos = 0
+    while pos < len(candidates):
+        entry_idx = int(candidates[pos])
+        side = int(signal[entry_idx])
+        entry = float(series["entry"][entry_idx])
+        sl = float(series["stop_loss"][entry_idx])
+        tp = float(series["take_profit"][entry_idx])
+
+        exit_ = _first_exit(open_, high, low, entry_idx + 1, side, sl, tp, config.intrabar)
+        if exit_ is None:
+            open_trade = {"entry_index": entry_idx, "side": side, "entry_price": entry, "stop_loss": sl, "take_profit": tp}
+            break
+        exit_idx, close_price, win = exit_
+        rows.append((entry_idx, exit_idx, side, entry, sl, tp, close_price, win))
+        # Se puede volver a entrar en la vela en que cerró (la señal se evalúa al cierre)
+        pos = int(np.searchsorted(candidates, exit_idx, side="left"))
+
+    if rows:
+        entry_index, exit_index, side, entry, sl, tp, close_price, win = (np.array(c) for c in zip(*rows))
+    else:
+        entry_index = exit_index = np.empty(0, dtype=np.int64)
+        side = np.empty(0, dtype=np.int8)
+        entry = sl = tp = close_price = np.empty(0)
+        win = np.empty(0, dtype=bool)
+
+    pnl_gross = np.where(side > 0, close_price - entry, entry - close_price)
+    exit_rate = np.where(win, tp_fee_rate, config.fee_rate)
+    fee_paid = config.fee_rate * entry + exit_rate * close_price
+    pnl_abs = pnl_gross - fee_paid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(entry != 0, pnl_gross / entry * 100, 0.0)
+        net_return = np.where(entry != 0, pnl_abs / entry, 0.0)
+
+    trades = {
+        "entry_index": entry_index,
+        "exit_index": exit_index,
+        "side": side,
+        "entry_price": entry,
+        "stop_loss": sl,
+        "take_profit": tp,
+        "close_price": close_price,
+        "win": win,
+        "fee_paid": fee_paid,
+        "pnl_abs": pnl_abs,
+        "pnl_pct": pnl_pct,
+        "net_return": net_return,
+    }
+
+    # Equity compuesta: plana sin posición, marcada al cierre de cada vela con posición
+    equity = np.ones(n)
+    capital = 1.0
+    last = 0
+    open_positions = list(zip(entry_index, exit_index, side, entry, net_return))
+    if open_trade is not None:
+        open_positions.append((open_trade["entry_index"], n, open_trade["side"], open_trade["entry_price"], None))
+    for e_idx, x_idx, s, price, ret in open_positions:
+        e_idx, x_idx = int(e_idx), int(x_idx)
+        equity[last:e_idx] = capital
+        marked = close[e_idx:x_idx]
+        equity[e_idx:x_idx] = capital * (1 + s * (marked - price) / price - config.fee_rate)
+        if ret is not None:
+            capital *= 1 + ret
+            equity[x_idx] = capital
+            last = x_idx + 1
+        else:
+            last = n
+    equity[last:] = capital
+
+    return trades, equity, open_trade
+
+
+def summarize(trades: dict[str, np.ndarray], equity: np.ndarray, timeframe: str | None, bars: int) -> dict:
+    n_trades = len(trades["side"])
+    wins = int(trades["win"].sum())
+    pnl_abs = trades["pnl_abs"]
+    gains = float(pnl_abs[pnl_abs > 0].sum())
+    losses = float(-pnl_abs[pnl_abs < 0].sum())
+    risk = np.abs(trades["entry_price"] - trades["stop_loss"])
+
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = float((1 - equity / peak).max()) if len(equity) else 0.0
+
+    sharpe = 0.0
+    if len(equity) > 2 and timeframe:
+        returns = np.diff(equity) / equity[:-1]
+        std = returns.std()
+        if std > 0:
+            sharpe = float(returns.mean() / std * np.sqrt(_YEAR_MS / timeframe_to_ms(timeframe)))
+
+    held = trades["exit_index"] - trades["entry_index"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_multiples = np.where(risk > 0, pnl_abs / risk, 0.0)
+
+    return {
+        "bars": bars,
+        "trades": n_trades,
+        "wins": wins,
+        "losses": n_trades - wins,
+        "win_rate": round(wins / n_trades * 100, 2) if n_trades else 0.0,
+        "net_pnl": round(float(pnl_abs.sum()), 8),
+        "fees_paid": round(float(trades["fee_paid"].sum()), 8),
+        # Sin pérdidas el profit factor es infinito: None (JSON no admite inf)
+        "profit_factor": round(gains / losses, 4) if losses > 0 else (None if gains > 0 else 0.0),
+        "total_return_pct": round((float(equity[-1]) - 1) * 100, 4) if len(equity) else 0.0,
+        "max_drawdown_pct": round(drawdown * 100, 4),
+        "sharpe": round(sharpe, 4),
+        "expectancy_r": round(float(r_multiples.mean()), 4) if n_trades else 0.0,
+        "avg_bars_held": round(float(held.mean()), 2) if n_trades else 0.0,
+        "exposure_pct": round(float(held.sum()) / bars * 100, 2) if bars else 0.0,
+    }
+
+
+def backtest_candles(
+    candles: CandleSeries,
+    timeframe: str,
+    params: StrategyParams | None = None,
+    config: BacktestConfig | None = None,
+    start_index: int = 0,
+    symbol: str | None = None,
+    cache: IndicatorCache | None = None,
+) -> BacktestResult:
+    """
+    Backtest sobre una serie ya cargada. Las velas antes de start_index solo sirven de
+    calentamiento de indicadores (no generan entradas). Las métricas cubren desde start_index.
+    Con symbol (y cache) los indicadores se reutilizan entre corridas con los mismos periodos.
+    """
+    params = params or StrategyParams.from_settings()
+    config = config or BacktestConfig.from_settings()
+    engine = StrategyEngine(candles, timeframe, verbose=False, symbol=symbol, params=params, cache=cache)
+    series = engine.compute_signal_series()
+    trades, equity, open_trade = simulate(candles, series, config, start_index=start_index)
+
+    open_time = candles.open_time[start_index:]
+    equity = equity[start_index:]
+    if open_trade is not None:
+        open_trade = {**open_trade, "opened_at": int(candles.open_time[open_trade["entry_index"]])}
+    trades = {**trades, "entry_index": trades["entry_index"] - start_index, "exit_index": trades["exit_index"] - start_index}
+    if open_trade is not None:
+        open_trade["entry_index"] -= start_index
+
+    return BacktestResult(
+        open_time=open_time,
+        equity=equity,
+        trades=trades,
+        stats=summarize(trades, equity, timeframe, len(open_time)),
+        open_trade=open_trade,
+        params=params,
+        config=config,
+        timeframe=timeframe,
+    )
+
+
+def warmup_bars(params: StrategyParams) -> int:
+    """Velas necesarias para que MA/RSI/ATR y la ventana de breakout estén definidos"""
+    return max(params.ma_slow, params.ma_fast, params.rsi_period + 1, params.atr_period + 1, params.lookback)
+
+
+class BacktestService:
+    """
+    Backtests sobre el almacén local de velas (cargar antes con /market/backfill)
+    """
+
+    def __init__(self, store: KlineStore | None = None):
+        self.store = store or KlineStore()
+
+    def load_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        warmup: int = 0,
+    ) -> tuple[CandleSeries, int]:
+        """Velas del rango más `warmup` velas previas. Devuelve (velas, índice de inicio del rango)"""
+        columns = self.store.read(symbol, timeframe)
+        open_time = columns["open_time"]
+        if len(open_time) == 0:
+            raise ValueError(f"No hay velas almacenadas de {symbol} {timeframe}: ejecutar el backfill primero")
+
+        first = int(np.searchsorted(open_time, start_ms, side="left")) if start_ms is not None else 0
+        last = int(np.searchsorted(open_time, end_ms, side="right")) if end_ms is not None else len(open_time)
+        if first >= last:
+            raise ValueError("No hay velas almacenadas en el rango pedido")
+        begin = max(0, first - warmup)
+        candles = CandleSeries.from_columns({k: v[begin:last] for k, v in columns.items()})
+        return candles, first - begin
+
+    def run(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        params: StrategyParams | None = None,
+        config: BacktestConfig | None = None,
+    ) -> BacktestResult:
+        params = params or StrategyParams.from_settings()
+        candles, start_index = self.load_candles(symbol, timeframe, start_ms, end_ms, warmup=warmup_bars(params))
+        return backtest_candles(candles, timeframe, params, config, start_index=start_index)
@@ -1,20 +1,25 @@
 import plotly.graph_objects as go
 import pandas as pd
 
+from app.util.candles import CandleSeries
+
 class ChartService:
     """
     Devuelve HTML embebible (TradingView no se integra directo con Python),
     pero acá puedes visualizar el gráfico en tu propio endpoint.
     """
 
-    def render_trade_chart_html(self, df: pd.DataFrame, trade: dict) -> str:
+    def render_trade_chart_html(self, candles: CandleSeries | pd.DataFrame, trade: dict) -> str:
+        if isinstance(candles, pd.DataFrame):
+            candles = CandleSeries.from_df(candles)
+
         fig = go.Figure(data=[
             go.Candlestick(
-                x=df["open_time"],
-                open=df["open"],
-                high=df["high"],
-                low=df["low"],
-                close=df["close"],
+                x=pd.to_datetime(candles.open_time, unit="ms"),
+                open=candles.open,
+                high=candles.high,
+                low=candles.low,
+                close=candles.close,
                 name="Price"
             )
         ])
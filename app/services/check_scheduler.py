@@ -0,0 +1,70 @@
+"""
+Check Scheduler
+Cola de prioridad de próximos chequeos de SL/TP por trade
+"""
+
+import heapq
+import math
+
+
+def check_interval(distance_atr: float | None, min_seconds: float, max_seconds: float, far_atr: float) -> float:
+    """
+    Segundos hasta el próximo chequeo según la distancia (en ATRs) al nivel más cercano:
+    crece lineal de min_seconds (sobre el nivel) a max_seconds (a far_atr ATRs o más).
+    Sin distancia conocida (sin ATR o sin precio) se chequea con la cadencia mínima.
+    """
+    if distance_atr is None or not math.isfinite(distance_atr) or far_atr <= 0:
+        return min_seconds
+    fraction = min(1.0, max(0.0, distance_atr) / far_atr)
+    return min_seconds + (max_seconds - min_seconds) * fraction
+
+
+class CheckScheduler:
+    """
+    Próximo chequeo de cada trade en un heap (tiempo, trade_id):
+    - pop_due devuelve los trades vencidos en O(k log n)
+    - Reprogramar o descartar no busca en el heap: la entrada vieja queda obsoleta
+      y se ignora al salir (se compacta si las obsoletas dominan)
+    """
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int]] = []
+        self._due: dict[int, float] = {}
+        self.checks = 0
+
+    def schedule(self, trade_id: int, at: float) -> None:
+        self._due[trade_id] = at
+        heapq.heappush(self._heap, (at, trade_id))
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(at, trade_id) for trade_id, at in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, trade_id: int) -> None:
+        self._due.pop(trade_id, None)
+
+    def sync(self, trade_ids, now: float) -> None:
+        """Programa ya los trades nuevos y olvida los que ya no están abiertos"""
+        trade_ids = set(trade_ids)
+        for trade_id in self._due.keys() - trade_ids:
+            del self._due[trade_id]
+        for trade_id in trade_ids - self._due.keys():
+            self.schedule(trade_id, now)
+
+    def pop_due(self, now: float) -> list[int]:
+        """Trades con chequeo vencido (quedan sin programar hasta el próximo schedule/sync)"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            at, trade_id = heapq.heappop(self._heap)
+            if self._due.get(trade_id) == at:
+                del self._due[trade_id]
+                due.append(trade_id)
+        self.checks += len(due)
+        return due
+
+    def next_due(self) -> float | None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._due)
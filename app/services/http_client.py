@@ -0,0 +1,121 @@
+"""
+Shared HTTP Client
+Clientes httpx de vida larga (uno por servicio) con keep-alive y HTTP/2 opcional
+"""
+
+import asyncio
+import importlib.util
+
+import httpx
+
+from app.config.settings import settings
+
+
+class SharedHttpClient:
+    """
+    Envuelve un httpx.AsyncClient que vive lo mismo que la app / el worker:
+    - Reutiliza conexiones TCP+TLS entre requests (pool con keep-alive)
+    - Se abre en el startup de FastAPI / init del worker de Celery y se cierra en el shutdown
+    - Si se usa desde otro event loop (ej: asyncio.run en un script) se recrea,
+      porque las conexiones de httpx quedan atadas al loop donde se crearon
+    """
+
+    _registry: list["SharedHttpClient"] = []
+
+    def __init__(self, name: str, timeout: float, verify: bool = True):
+        self.name = name
+        self.timeout = timeout
+        self.verify = verify
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._requests = 0
+        self._errors = 0
+        self._clients_created = 0
+        SharedHttpClient._registry.append(self)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = self._build_client()
+            self._loop = loop
+            self._clients_created += 1
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            verify=self.verify,
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            event_hooks={"response": [self._on_response]},
+        )
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self._requests += 1
+        if response.is_error:
+            self._errors += 1
+
+    async def open(self) -> None:
+        """Crea el cliente en el loop actual"""
+        _ = self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # El loop original ya no existe; las conexiones murieron con él
+                pass
+        self._client = None
+        self._loop = None
+
+    def stats(self) -> dict:
+        """Estadísticas del pool de conexiones"""
+        connections = []
+        if self._client is not None:
+            # httpx no expone el pool de httpcore de forma pública
+            pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+
+        return {
+            "name": self.name,
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": _http2_available(),
+            "clients_created": self._clients_created,
+            "requests": self._requests,
+            "errors": self._errors,
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        }
+
+
+def _http2_available() -> bool:
+    """HTTP/2 solo si está habilitado y el paquete h2 está instalado (httpx[http2])"""
+    if not settings.HTTP2_ENABLED:
+        return False
+    return importlib.util.find_spec("h2") is not None
+
+
+async def open_http_clients() -> None:
+    """Abre todos los clientes compartidos (startup de la app / worker)"""
+    if settings.HTTP2_ENABLED and not _http2_available():
+        print("⚠️  HTTP2_ENABLED=true pero falta el paquete 'h2' (pip install httpx[http2]). Se usa HTTP/1.1")
+    for shared in SharedHttpClient._registry:
+        await shared.open()
+
+
+async def close_http_clients() -> None:
+    """Cierra todos los clientes compartidos (shutdown de la app / worker)"""
+    for shared in SharedHttpClient._registry:
+        await shared.aclose()
+
+
+def http_pool_stats() -> list[dict]:
+    return [shared.stats() for shared in SharedHttpClient._registry]
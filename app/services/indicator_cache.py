@@ -0,0 +1,103 @@
+"""
+Indicator Cache
+Memoiza sma/rsi/atr por (symbol, timeframe, huella de la ventana, indicador, parámetros)
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from app.config.settings import settings
+from app.util.candles import CandleSeries
+from app.util.math import rsi, atr, sma
+
+
+class IndicatorCache:
+    """
+    LRU en memoria de series de indicadores ya calculadas.
+
+    La huella de la ventana es (largo, primer y último open_time, hash blake2b de las
+    columnas high/low/close completas): dentro de una misma vela get_live_signal, el
+    multi-timeframe y las tareas de Celery comparten el cálculo; si la vela en curso se
+    mueve o cualquier vela difiere (ej: otra fuente de datos), la clave cambia sola.
+    Los arrays devueltos son de solo lectura (se comparten entre consumidores).
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "IndicatorCache":
+        return cls(max_entries=settings.INDICATOR_CACHE_MAX_ENTRIES)
+
+    @staticmethod
+    def fingerprint(candles: CandleSeries) -> tuple:
+        n = len(candles)
+        if n == 0:
+            return (0,)
+        digest = hashlib.blake2b(digest_size=16)
+        for values in (candles.high, candles.low, candles.close):
+            digest.update(np.ascontiguousarray(values, dtype=np.float64))
+        return (
+            n,
+            int(candles.open_time[0]),
+            int(candles.open_time[-1]),
+            digest.digest(),
+        )
+
+    def get_or_compute(
+        self,
+        symbol: str,
+        timeframe: str,
+        candles: CandleSeries,
+        indicator: str,
+        params: tuple,
+        compute: Callable[[], np.ndarray],
+    ) -> np.ndarray:
+        key = (symbol.upper(), timeframe, self.fingerprint(candles), indicator, params)
+        values = self._entries.get(key)
+        if values is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return values
+
+        self.misses += 1
+        values = compute()
+        values.setflags(write=False)
+        self._entries[key] = values
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return values
+
+    def sma(self, symbol: str, timeframe: str, candles: CandleSeries, period: int) -> np.ndarray:
+        return self.get_or_compute(symbol, timeframe, candles, "sma", (period,), lambda: sma(candles.close, period))
+
+    def rsi(self, symbol: str, timeframe: str, candles: CandleSeries, period: int = 14) -> np.ndarray:
+        return self.get_or_compute(symbol, timeframe, candles, "rsi", (period,), lambda: rsi(candles.close, period))
+
+    def atr(self, symbol: str, timeframe: str, candles: CandleSeries, period: int = 14) -> np.ndarray:
+        return self.get_or_compute(
+            symbol, timeframe, candles, "atr", (period,),
+            lambda: atr(candles.high, candles.low, candles.close, period=period),
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+indicator_cache = IndicatorCache.from_settings() if settings.INDICATOR_CACHE_ENABLED else None
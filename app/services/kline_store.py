@@ -0,0 +1,204 @@
+"""
+Kline Store
+Almacén local e incremental de velas cerradas por (symbol, timeframe)
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.config.settings import settings
+from app.util.klines import KLINE_COLUMNS
+
+
+class KlineStore:
+    """
+    Guarda velas cerradas en disco en formato columnar:
+    - Un directorio por serie: <base_dir>/<SYMBOL>/<timeframe>/
+    - Un archivo binario por columna (int64/float64) al que solo se le agrega al final
+    - Las lecturas usan np.memmap, así solo se toca la ventana pedida
+
+    Si un append se interrumpe a mitad, las columnas pueden quedar con largos distintos;
+    se toma el largo mínimo como válido y el siguiente append recorta el sobrante.
+
+    Las escrituras toman un lock exclusivo y las lecturas uno compartido, así nunca se lee
+    una serie a medio reescribir. merge deja un journal (merge.pending) una vez escritas
+    todas las columnas nuevas: si se interrumpe al reemplazarlas, el siguiente acceso
+    termina el reemplazo y la serie queda entera con los datos nuevos.
+    """
+
+    MERGE_JOURNAL = "merge.pending"
+
+    def __init__(self, base_dir: str | None = None):
+        self.base_dir = Path(base_dir or settings.KLINE_STORE_DIR)
+
+    def _series_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.base_dir / symbol.upper() / timeframe.lower()
+
+    def _column_path(self, series_dir: Path, column: str) -> Path:
+        return series_dir / f"{column}.bin"
+
+    @contextmanager
+    def _locked(self, symbol: str, timeframe: str, shared: bool = False):
+        """
+        Lock entre procesos (API y Celery comparten el volumen): exclusivo para escribir,
+        compartido para leer. Antes de usar la serie se completa un merge interrumpido.
+        """
+        series_dir = self._series_dir(symbol, timeframe)
+        if shared and not series_dir.exists():
+            yield series_dir
+            return
+        series_dir.mkdir(parents=True, exist_ok=True)
+        with open(series_dir / ".lock", "w") as lock_file:
+            journal = series_dir / self.MERGE_JOURNAL
+            if shared and journal.exists():
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._recover(series_dir)
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                if not shared:
+                    self._recover(series_dir)
+                yield series_dir
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _recover(self, series_dir: Path) -> None:
+        """Termina un merge interrumpido: con el journal presente las columnas nuevas están completas"""
+        journal = series_dir / self.MERGE_JOURNAL
+        if not journal.exists():
+            return
+        for column in KLINE_COLUMNS:
+            tmp_path = self._column_path(series_dir, column).with_suffix(".tmp")
+            if tmp_path.exists():
+                os.replace(tmp_path, self._column_path(series_dir, column))
+        os.remove(journal)
+
+    def _rows_in(self, series_dir: Path) -> int:
+        counts = []
+        for column, dtype in KLINE_COLUMNS.items():
+            path = self._column_path(series_dir, column)
+            if not path.exists():
+                return 0
+            counts.append(path.stat().st_size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        """Cantidad de velas almacenadas"""
+        with self._locked(symbol, timeframe, shared=True) as series_dir:
+            return self._rows_in(series_dir)
+
+    def _read_column(self, series_dir: Path, column: str, start: int, stop: int) -> np.ndarray:
+        dtype = np.dtype(KLINE_COLUMNS[column])
+        if stop <= start:
+            return np.empty(0, dtype=dtype)
+        mm = np.memmap(
+            self._column_path(series_dir, column),
+            dtype=dtype,
+            mode="r",
+            offset=start * dtype.itemsize,
+            shape=(stop - start,),
+        )
+        # Copia para no mantener el archivo mapeado mientras se le agregan datos
+        return np.array(mm)
+
+    def first_open_time(self, symbol: str, timeframe: str) -> int | None:
+        """open_time (ms) de la primera vela almacenada, o None si la serie está vacía"""
+        with self._locked(symbol, timeframe, shared=True) as series_dir:
+            if self._rows_in(series_dir) == 0:
+                return None
+            return int(self._read_column(series_dir, "open_time", 0, 1)[0])
+
+    def last_close_time(self, symbol: str, timeframe: str) -> int | None:
+        """close_time (ms) de la última vela almacenada, o None si la serie está vacía"""
+        with self._locked(symbol, timeframe, shared=True) as series_dir:
+            n = self._rows_in(series_dir)
+            if n == 0:
+                return None
+            return int(self._read_column(series_dir, "close_time", n - 1, n)[0])
+
+    def read(self, symbol: str, timeframe: str, limit: int | None = None) -> dict[str, np.ndarray]:
+        """
+        Devuelve las últimas `limit` velas (todas si limit es None) como dict de columnas
+        """
+        with self._locked(symbol, timeframe, shared=True) as series_dir:
+            n = self._rows_in(series_dir)
+            start = 0 if limit is None else max(0, n - limit)
+            return {column: self._read_column(series_dir, column, start, n) for column in KLINE_COLUMNS}
+
+    def append(self, symbol: str, timeframe: str, columns: dict[str, np.ndarray]) -> int:
+        """
+        Agrega velas cerradas al final de la serie.
+        Ignora las que no sean posteriores a la última almacenada.
+
+        Returns:
+            Cantidad de velas agregadas
+        """
+        open_time = np.asarray(columns["open_time"], dtype=np.int64)
+        if len(open_time) == 0:
+            return 0
+
+        with self._locked(symbol, timeframe) as series_dir:
+            n = self._rows_in(series_dir)
+            mask = np.ones(len(open_time), dtype=bool)
+            if n > 0:
+                last_open = int(self._read_column(series_dir, "open_time", n - 1, n)[0])
+                mask = open_time > last_open
+            if not mask.any():
+                return 0
+
+            for column, dtype in KLINE_COLUMNS.items():
+                path = self._column_path(series_dir, column)
+                values = np.ascontiguousarray(np.asarray(columns[column], dtype=dtype)[mask])
+                with open(path, "ab") as f:
+                    # Recorta restos de un append interrumpido
+                    f.truncate(n * np.dtype(dtype).itemsize)
+                    f.write(values.tobytes())
+            return int(mask.sum())
+
+    def merge(self, symbol: str, timeframe: str, columns: dict[str, np.ndarray]) -> int:
+        """
+        Inserta velas en cualquier posición (ej: histórico anterior a lo ya guardado).
+        Reescribe la serie ordenada y sin duplicados; ante duplicados gana la vela nueva.
+        Las columnas nuevas se escriben en archivos temporales y recién con todas en disco
+        se crea el journal y se reemplazan; las lecturas (lock compartido) ven la serie
+        anterior o la nueva, nunca una mezcla.
+
+        Returns:
+            Cantidad de velas nuevas en la serie
+        """
+        if len(columns["open_time"]) == 0:
+            return 0
+
+        with self._locked(symbol, timeframe) as series_dir:
+            n = self._rows_in(series_dir)
+            existing = {column: self._read_column(series_dir, column, 0, n) for column in KLINE_COLUMNS}
+            merged = {
+                column: np.concatenate([np.asarray(columns[column], dtype=dtype), existing[column]])
+                for column, dtype in KLINE_COLUMNS.items()
+            }
+            # np.unique se queda con la primera aparición (las velas nuevas van primero)
+            _, idx = np.unique(merged["open_time"], return_index=True)
+
+            for column in KLINE_COLUMNS:
+                with open(self._column_path(series_dir, column).with_suffix(".tmp"), "wb") as f:
+                    f.write(np.ascontiguousarray(merged[column][idx]).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            journal = series_dir / self.MERGE_JOURNAL
+            journal_tmp = journal.with_suffix(".tmp")
+            journal_tmp.write_text(str(len(idx)))
+            os.replace(journal_tmp, journal)
+            self._recover(series_dir)
+            return len(idx) - n
+
+    def reset(self, symbol: str, timeframe: str) -> None:
+        """Elimina la serie completa"""
+        with self._locked(symbol, timeframe) as series_dir:
+            for column in KLINE_COLUMNS:
+                path = self._column_path(series_dir, column)
+                if path.exists():
+                    os.remove(path)
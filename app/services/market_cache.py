@@ -0,0 +1,161 @@
+"""
+Market Data Cache
+Caché compartida de velas por (symbol, timeframe, limit, última vela cerrada)
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from app.config.settings import settings
+from app.util.klines import KLINE_COLUMNS
+from app.util.timeframes import timeframe_to_ms
+
+
+class MarketDataCache:
+    """
+    Dos niveles:
+    - LRU en memoria del proceso (API, TradeManager)
+    - Redis (compartido con los workers de Celery), opcional
+
+    La clave incluye el open_time de la vela en curso, así que todas las entradas
+    quedan invalidadas exactamente cuando cierra una vela. Además se limita la edad
+    máxima (MARKET_CACHE_MAX_TTL_SECONDS) porque la vela en curso sigue cambiando.
+    """
+
+    KEY_PREFIX = "klines"
+    REDIS_RETRY_SECONDS = 60
+
+    def __init__(self, max_entries: int, redis_url: str | None = None, max_ttl: float | None = None):
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.max_ttl = max_ttl
+        self._memory: OrderedDict[str, tuple[float, dict[str, np.ndarray]]] = OrderedDict()
+        self._redis = None
+        self._redis_loop: asyncio.AbstractEventLoop | None = None
+        self._redis_down_until = 0.0
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "MarketDataCache":
+        return cls(
+            max_entries=settings.MARKET_CACHE_MAX_ENTRIES,
+            redis_url=settings.MARKET_CACHE_REDIS_URL,
+            max_ttl=settings.MARKET_CACHE_MAX_TTL_SECONDS,
+        )
+
+    def key_for(self, symbol: str, timeframe: str, limit: int, now_ms: int | None = None) -> tuple[str, float]:
+        """
+        Clave de la ventana y segundos hasta que cierra la vela en curso
+        (TTL acotado por max_ttl)
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        tf_ms = timeframe_to_ms(timeframe)
+        bar_open = now_ms // tf_ms * tf_ms
+        ttl = (bar_open + tf_ms - now_ms) / 1000
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        return f"{self.KEY_PREFIX}:{symbol.upper()}:{timeframe.lower()}:{limit}:{bar_open}", ttl
+
+    async def get(self, key: str) -> dict[str, np.ndarray] | None:
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, columns = entry
+            if time.monotonic() < expires_at:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return columns
+            del self._memory[key]
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(key)
+                ttl_ms = await redis.pttl(key) if raw is not None else -1
+            except Exception as e:
+                self._redis_failed(e)
+                raw = None
+            if raw is not None and ttl_ms > 0:
+                columns = _unpack(raw)
+                self._remember(key, columns, ttl_ms / 1000)
+                self.redis_hits += 1
+                return columns
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, columns: dict[str, np.ndarray], ttl: float) -> None:
+        if ttl <= 0:
+            return
+        for values in columns.values():
+            # Las ventanas se comparten entre consumidores: solo lectura
+            values.setflags(write=False)
+        self._remember(key, columns, ttl)
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, _pack(columns), px=max(1, int(ttl * 1000)))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def _remember(self, key: str, columns: dict[str, np.ndarray], ttl: float) -> None:
+        self._memory[key] = (time.monotonic() + ttl, columns)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            self._redis = aioredis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+            self._redis_loop = loop
+        return self._redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        # Redis caído no debe frenar el análisis: se sigue solo con memoria un rato
+        print(f"⚠️  Caché Redis no disponible ({error}), reintento en {self.REDIS_RETRY_SECONDS}s")
+        self._redis = None
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "redis": bool(self.redis_url) and time.monotonic() >= self._redis_down_until,
+        }
+
+
+def _pack(columns: dict[str, np.ndarray]) -> bytes:
+    """Serializa columnas con dtype fijo: [n (int64)] + bytes de cada columna en orden"""
+    n = len(columns["open_time"])
+    parts = [np.int64(n).tobytes()]
+    for column, dtype in KLINE_COLUMNS.items():
+        parts.append(np.ascontiguousarray(columns[column], dtype=dtype).tobytes())
+    return b"".join(parts)
+
+
+def _unpack(raw: bytes) -> dict[str, np.ndarray]:
+    n = int(np.frombuffer(raw, dtype=np.int64, count=1)[0])
+    offset = 8
+    columns = {}
+    for column, dtype in KLINE_COLUMNS.items():
+        # frombuffer sobre bytes ya es de solo lectura
+        columns[column] = np.frombuffer(raw, dtype=dtype, count=n, offset=offset)
+        offset += n * np.dtype(dtype).itemsize
+    return columns
@@ -1,39 +1,358 @@
+import asyncio
+import json
+import math
+import time
+from typing import Callable
+
 import httpx
+import numpy as np
 import pandas as pd
-from app.util.timeframes import to_binance_interval
+from app.config.settings import settings
+from app.services.http_client import SharedHttpClient
+from app.services.kline_store import KlineStore
+from app.services.market_cache import MarketDataCache
+from app.util.candles import CandleSeries
+from app.util.klines import columns_to_df, concat_columns, decode_klines, empty_columns
+from app.util.singleflight import SingleFlight
+from app.util.rate_limiter import BinanceWeightLimiter, klines_weight, ticker_price_weight
+from app.util.timeframes import to_binance_interval, timeframe_to_ms
 
 class MarketService:
     """
     Market data provider (Binance public REST).
     - Para BTCUSDT funciona sin API keys.
     - Más adelante puedes agregar FX/Oro con otro provider.
+    - Con KLINE_STORE_ENABLED las velas cerradas se guardan en disco y solo
+      se descargan las posteriores a la última almacenada.
     """
 
     BINANCE_BASE = "https://api.binance.com"
+    MAX_KLINES_PER_REQUEST = 1000
+    # Símbolos por request de /api/v3/ticker/price (acota el largo de la URL)
+    MAX_TICKER_SYMBOLS = 100
+
+    # Temporal para desarrollo: verify=False
+    # En producción usa verify=True con certificados correctos
+    http = SharedHttpClient("binance", timeout=20, verify=False)
+
+    # Límite de peso compartido por todas las instancias del proceso
+    limiter = BinanceWeightLimiter(settings.BINANCE_WEIGHT_LIMIT)
+
+    # Caché compartida por vela: API, TradeManager y Celery reutilizan la misma descarga
+    cache = MarketDataCache.from_settings() if settings.MARKET_CACHE_ENABLED else None
+
+    # Requests idénticas concurrentes (symbol, timeframe, limit) comparten una sola descarga
+    inflight = SingleFlight()
+
+    # (symbol, timeframe) -> primer open_time que existe en Binance (no hay velas anteriores)
+    listing_start: dict[tuple[str, str], int] = {}
+
+    def __init__(self, store: KlineStore | None = None, base_url: str | None = None):
+        self.store = store or (KlineStore() if settings.KLINE_STORE_ENABLED else None)
+        # base_url permite apuntar a un stub local del endpoint de klines
+        self.base_url = (base_url or self.BINANCE_BASE).rstrip("/")
+
+    async def get_klines_df(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int = 300,
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        return columns_to_df(await self.get_klines_columns(symbol, timeframe, limit, use_cache=use_cache))
+
+    async def get_candles(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int = 300,
+        use_cache: bool = True,
+    ) -> CandleSeries:
+        """Velas como CandleSeries (envuelve las columnas sin copiarlas)"""
+        return CandleSeries.from_columns(await self.get_klines_columns(symbol, timeframe, limit, use_cache=use_cache))
+
+    async def get_klines_columns(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int = 300,
+        use_cache: bool = True,
+    ) -> dict[str, np.ndarray]:
+        """
+        Igual que get_klines_df pero como dict de arrays numpy contiguos
+        (tiempos int64 en ms, OHLCV float64). Evita armar el DataFrame si no se necesita.
+        Con use_cache=False siempre se consulta Binance (ej: precio para SL/TP).
+        Los arrays que vienen de la caché son de solo lectura.
+        """
+        if not use_cache or self.cache is None:
+            return await self.inflight.do(
+                (symbol.upper(), timeframe.lower(), limit),
+                lambda: self._load_klines(symbol, timeframe, limit),
+            )
 
-    async def get_klines_df(self, symbol: str, timeframe: str, limit: int = 300) -> pd.DataFrame:
+        key, ttl = self.cache.key_for(symbol, timeframe, limit)
+        columns = await self.cache.get(key)
+        if columns is None:
+            columns = await self.inflight.do(key, lambda: self._load_and_cache(key, ttl, symbol, timeframe, limit))
+        return columns
+
+    async def _load_and_cache(self, key: str, ttl: float, symbol: str, timeframe: str, limit: int) -> dict[str, np.ndarray]:
+        columns = await self._load_klines(symbol, timeframe, limit)
+        await self.cache.set(key, columns, ttl)
+        return columns
+
+    async def _load_klines(self, symbol: str, timeframe: str, limit: int) -> dict[str, np.ndarray]:
+        if self.store is None:
+            return await self._fetch_klines_history(symbol, timeframe, limit=limit)
+
+        return await self._get_klines_stored(symbol, timeframe, limit)
+
+    async def _fetch_klines(
+        self,
+        symbol: str,
+        timeframe: str,
+        limit: int,
+        start_time: int | None = None,
+        end_time: int | None = None,
+    ) -> dict[str, np.ndarray]:
         interval = to_binance_interval(timeframe)
-        url = f"{self.BINANCE_BASE}/api/v3/klines"
+        url = f"{self.base_url}/api/v3/klines"
+        limit = min(limit, self.MAX_KLINES_PER_REQUEST)
         params = {"symbol": symbol, "interval": interval, "limit": limit}
+        if start_time is not None:
+            params["startTime"] = start_time
+        if end_time is not None:
+            params["endTime"] = end_time
+
+        r = await self._get(url, params=params, weight=klines_weight())
+        return decode_klines(r.content)
+
+    async def _fetch_klines_history(self, symbol: str, timeframe: str, limit: int) -> dict[str, np.ndarray]:
+        """Últimas `limit` velas; si superan el máximo por request se descargan por bloques en paralelo"""
+        if limit <= self.MAX_KLINES_PER_REQUEST:
+            return await self._fetch_klines(symbol, timeframe, limit=limit)
+
+        tf_ms = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms // tf_ms * tf_ms - (limit - 1) * tf_ms
+        return await self._fetch_range(symbol, timeframe, start_ms, now_ms)
+
+    async def _fetch_range(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: int,
+        on_chunk: Callable[[dict[str, np.ndarray]], None] | None = None,
+        concurrency: int | None = None,
+    ) -> dict[str, np.ndarray] | None:
+        """
+        Descarga las velas con open_time en [start_ms, end_ms] partiendo el rango en
+        bloques startTime/endTime de 1000 velas que se piden en paralelo
+        (acotado por `concurrency` y por el limitador de peso).
+
+        Sin on_chunk devuelve todo unido y sin duplicados. Con on_chunk los bloques
+        se entregan en orden cronológico a medida que están listos y no se acumulan.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        span = self.MAX_KLINES_PER_REQUEST * tf_ms
+        first = -(-start_ms // tf_ms) * tf_ms  # primer open_time alineado >= start_ms
+        starts = list(range(first, end_ms + 1, span))
+        semaphore = asyncio.Semaphore(concurrency or settings.BACKFILL_CONCURRENCY)
+
+        ready: dict[int, dict[str, np.ndarray]] = {}
+        next_index = 0
+
+        def flush() -> None:
+            nonlocal next_index
+            while next_index in ready:
+                on_chunk(ready.pop(next_index))
+                next_index += 1
+
+        async def fetch(index: int, chunk_start: int) -> None:
+            async with semaphore:
+                ready[index] = await self._fetch_klines(
+                    symbol,
+                    timeframe,
+                    limit=self.MAX_KLINES_PER_REQUEST,
+                    start_time=chunk_start,
+                    end_time=min(chunk_start + span - 1, end_ms),
+                )
+            if on_chunk is not None:
+                flush()
+
+        await asyncio.gather(*(fetch(i, chunk_start) for i, chunk_start in enumerate(starts)))
+        if on_chunk is not None:
+            return None
+
+        if not ready:
+            return empty_columns()
+        columns = concat_columns(*(ready[i] for i in range(len(starts))))
+        _, idx = np.unique(columns["open_time"], return_index=True)
+        return {k: v[idx] for k, v in columns.items()}
+
+    async def get_klines_since(self, symbol: str, timeframe: str, start_ms: int) -> dict[str, np.ndarray]:
+        """
+        Velas con open_time >= start_ms hasta la vela en curso (sin caché), pidiendo solo
+        las que faltan: con polls frecuentes es una request de peso mínimo
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000)
+        bars = max(1, (now_ms - start_ms) // tf_ms + 1)
+        if bars <= self.MAX_KLINES_PER_REQUEST:
+            return await self._fetch_klines(symbol, timeframe, limit=bars, start_time=start_ms)
+        return await self._fetch_range(symbol, timeframe, start_ms, now_ms)
+
+    async def get_prices(self, symbols: list[str]) -> dict[str, float]:
+        """
+        Último precio de cada símbolo con /api/v3/ticker/price (sin caché): una request
+        por cada MAX_TICKER_SYMBOLS símbolos en vez de descargar velas por símbolo.
+        Si un bloque falla (ej: símbolo inválido) se reintenta símbolo por símbolo y
+        los que siguen fallando quedan fuera del resultado.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        chunks = [symbols[i:i + self.MAX_TICKER_SYMBOLS] for i in range(0, len(symbols), self.MAX_TICKER_SYMBOLS)]
+        prices: dict[str, float] = {}
+        for result in await asyncio.gather(*(self._fetch_prices(chunk) for chunk in chunks)):
+            prices.update(result)
+        return prices
+
+    async def _fetch_prices(self, symbols: list[str]) -> dict[str, float]:
+        url = f"{self.base_url}/api/v3/ticker/price"
+        if len(symbols) == 1:
+            params = {"symbol": symbols[0]}
+        else:
+            params = {"symbols": json.dumps(symbols, separators=(",", ":"))}
+        try:
+            r = await self._get(url, params=params, weight=ticker_price_weight(len(symbols)))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 400:
+                raise
+            if len(symbols) == 1:
+                print(f"⚠️  Sin precio para {symbols[0]}: {e.response.text}")
+                return {}
+            # Un símbolo inválido hace fallar todo el bloque: se pide cada uno por separado
+            results = await asyncio.gather(*(self._fetch_prices([symbol]) for symbol in symbols))
+            return {symbol: price for result in results for symbol, price in result.items()}
+
+        data = r.json()
+        rows = data if isinstance(data, list) else [data]
+        return {row["symbol"]: float(row["price"]) for row in rows}
+
+    async def backfill(
+        self,
+        symbol: str,
+        timeframe: str,
+        start_ms: int,
+        end_ms: int | None = None,
+        concurrency: int | None = None,
+    ) -> dict:
+        """
+        Carga al almacén local las velas cerradas de un rango de fechas (sin el límite de 1000):
+        - El rango se descarga por bloques en paralelo bajo el limitador de peso
+        - Si se extiende hacia adelante (o la serie está vacía) los bloques se van agregando
+          en orden a medida que llegan; si cae antes de lo guardado se fusiona al final
+        - El rango se amplía lo necesario para que la serie local quede sin huecos
+        """
+        if self.store is None:
+            raise ValueError("KLINE_STORE_ENABLED=false: no hay almacén local para el backfill")
+
+        started = time.perf_counter()
+        now_ms = int(time.time() * 1000)
+        end_ms = min(end_ms if end_ms is not None else now_ms, now_ms)
+
+        first_open = self.store.first_open_time(symbol, timeframe)
+        last_close = self.store.last_close_time(symbol, timeframe)
+        if last_close is not None:
+            if start_ms > last_close:
+                start_ms = last_close + 1
+            if end_ms < first_open:
+                end_ms = first_open - 1
+        if start_ms > end_ms:
+            raise ValueError("Rango de fechas vacío")
+
+        def closed_only(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+            closed = columns["close_time"] < now_ms
+            return {k: v[closed] for k, v in columns.items()}
+
+        written = 0
+        if last_close is None or start_ms > last_close:
+            def append_chunk(columns: dict[str, np.ndarray]) -> None:
+                nonlocal written
+                written += self.store.append(symbol, timeframe, closed_only(columns))
+
+            await self._fetch_range(symbol, timeframe, start_ms, end_ms, on_chunk=append_chunk, concurrency=concurrency)
+        else:
+            columns = await self._fetch_range(symbol, timeframe, start_ms, end_ms, concurrency=concurrency)
+            written = self.store.merge(symbol, timeframe, closed_only(columns))
+
+        return {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "bars_written": written,
+            "bars_stored": self.store.count(symbol, timeframe),
+            "first_open_time": self.store.first_open_time(symbol, timeframe),
+            "last_close_time": self.store.last_close_time(symbol, timeframe),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    async def _get(self, url: str, params: dict, weight: int):
+        """GET respetando el límite de peso de Binance (reintenta tras 429/418)"""
+        for attempt in range(settings.BINANCE_RATE_LIMIT_RETRIES + 1):
+            await self.limiter.acquire(weight)
+            r = await self.http.client.get(url, params=params)
+            self.limiter.update_from_headers(r.headers)
+
+            if r.status_code in (429, 418):
+                backoff = self.limiter.on_rate_limited(r.status_code, r.headers.get("Retry-After"))
+                print(f"⚠️  Binance rate limit ({r.status_code}), esperando {backoff:.0f}s")
+                if attempt < settings.BINANCE_RATE_LIMIT_RETRIES:
+                    continue
 
-        # Temporal para desarrollo: verify=False
-        # En producción usa verify=True con certificados correctos
-        async with httpx.AsyncClient(timeout=20, verify=False) as client:
-            r = await client.get(url, params=params)
             r.raise_for_status()
-            data = r.json()
+            return r
+
+    async def _get_klines_stored(self, symbol: str, timeframe: str, limit: int) -> dict[str, np.ndarray]:
+        """
+        Sincroniza el almacén local y devuelve la ventana pedida:
+        - Serie vacía: se descarga la ventana completa (paginando si limit > 1000)
+        - Si no, se piden solo las velas posteriores al último close_time guardado
+          (por bloques si el hueco supera las 1000 velas) y se agregan al final
+        - Si la serie aún no alcanza `limit`, se completan las velas anteriores a la primera
+          guardada (merge), sin borrar el histórico ya descargado
+        - Solo se reemplaza la serie si es inconsistente (close_time en el futuro)
+        La vela en curso (aún sin cerrar) se devuelve pero nunca se persiste.
+        """
+        now_ms = int(time.time() * 1000)
+        tf_ms = timeframe_to_ms(timeframe)
+
+        last_close = self.store.last_close_time(symbol, timeframe)
+        if last_close is not None and last_close >= now_ms + tf_ms:
+            print(f"⚠️  Serie local {symbol} {timeframe} con velas en el futuro, se descarga de nuevo")
+            self.store.reset(symbol, timeframe)
+            last_close = None
 
-        # Binance kline columns:
-        # 0 open_time, 1 open, 2 high, 3 low, 4 close, 5 volume, 6 close_time, ...
-        df = pd.DataFrame(data, columns=[
-            "open_time","open","high","low","close","volume",
-            "close_time","qav","num_trades","taker_base","taker_quote","ignore"
-        ])
+        if last_close is None:
+            fresh = await self._fetch_klines_history(symbol, timeframe, limit=limit)
+        else:
+            missing = math.ceil((now_ms - last_close) / tf_ms)
+            if missing < self.MAX_KLINES_PER_REQUEST:
+                fresh = await self._fetch_klines(symbol, timeframe, limit=missing + 1, start_time=last_close + 1)
+            else:
+                fresh = await self._fetch_range(symbol, timeframe, last_close + 1, now_ms)
 
-        df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-        df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
+        closed = fresh["close_time"] < now_ms
+        self.store.append(symbol, timeframe, {k: v[closed] for k, v in fresh.items()})
+        live = {k: v[~closed] for k, v in fresh.items()}
 
-        for col in ["open","high","low","close","volume"]:
-            df[col] = df[col].astype(float)
+        shortfall = limit - len(live["open_time"]) - self.store.count(symbol, timeframe)
+        first_open = self.store.first_open_time(symbol, timeframe)
+        series = (symbol.upper(), timeframe.lower())
+        if shortfall > 0 and first_open is not None and self.listing_start.get(series) != first_open:
+            older = await self._fetch_range(symbol, timeframe, first_open - shortfall * tf_ms, first_open - 1)
+            if len(older["open_time"]) < shortfall:
+                self.listing_start[series] = int(older["open_time"][0]) if len(older["open_time"]) else first_open
+            self.store.merge(symbol, timeframe, older)
 
-        return df
+        history = self.store.read(symbol, timeframe, limit=limit - len(live["open_time"]))
+        return concat_columns(history, live)
@@ -0,0 +1,259 @@
+"""
+Market Stream Service
+Ingesta de velas en tiempo real vía WebSocket de Binance con buffers circulares en memoria
+"""
+
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from app.config.settings import settings
+from app.services.market_service import MarketService
+from app.util.candles import CandleSeries
+from app.util.klines import KLINE_COLUMNS
+
+
+class KlineRingBuffer:
+    """
+    Buffer circular de tamaño fijo para una serie (symbol, timeframe).
+    - La vela en curso se actualiza en el lugar (mismo open_time)
+    - Una vela nueva pisa a la más vieja cuando el buffer está lleno
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._columns = {column: np.zeros(size, dtype=dtype) for column, dtype in KLINE_COLUMNS.items()}
+        self._count = 0
+        self._last = -1  # índice de la última vela escrita
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        self._count = 0
+        self._last = -1
+
+    def load(self, columns: dict[str, np.ndarray]) -> None:
+        """Reemplaza el contenido con un histórico (backfill REST)"""
+        self.clear()
+        n = min(len(columns["open_time"]), self.size)
+        for column in KLINE_COLUMNS:
+            self._columns[column][:n] = np.asarray(columns[column])[-n:]
+        self._count = n
+        self._last = n - 1
+
+    def update(self, kline: dict) -> None:
+        """
+        Aplica una vela (dict con las columnas de KLINE_COLUMNS).
+        Ignora velas anteriores a la última registrada.
+        """
+        if self._count:
+            last_open = self._columns["open_time"][self._last]
+            if kline["open_time"] < last_open:
+                return
+            if kline["open_time"] > last_open:
+                self._last = (self._last + 1) % self.size
+                self._count = min(self._count + 1, self.size)
+        else:
+            self._last = 0
+            self._count = 1
+
+        for column in KLINE_COLUMNS:
+            self._columns[column][self._last] = kline[column]
+
+    def last_close(self) -> float | None:
+        if not self._count:
+            return None
+        return float(self._columns["close"][self._last])
+
+    def to_columns(self, limit: int | None = None) -> dict[str, np.ndarray]:
+        """Copia ordenada (más vieja -> más nueva) de las últimas `limit` velas"""
+        n = self._count if limit is None else min(limit, self._count)
+        idx = (np.arange(self._last - n + 1, self._last + 1)) % self.size
+        return {column: values[idx] for column, values in self._columns.items()}
+
+    def to_series(self, limit: int | None = None) -> CandleSeries:
+        return CandleSeries.from_columns(self.to_columns(limit))
+
+
+class MarketStreamService:
+    """
+    Se suscribe a los streams kline + miniTicker de Binance para todos los símbolos
+    y timeframes configurados:
+    - Mantiene un KlineRingBuffer por (symbol, timeframe)
+    - Guarda el último precio por símbolo (para monitorear SL/TP)
+    - En cada (re)conexión rellena los buffers vía REST para no dejar huecos
+    - La URL base es configurable (permite probar contra un servidor WebSocket local)
+    """
+
+    RECONNECT_MIN_SECONDS = 1
+    RECONNECT_MAX_SECONDS = 30
+
+    def __init__(
+        self,
+        symbols: list[str],
+        timeframes: list[str],
+        buffer_size: int,
+        ws_base: str | None = None,
+        market: MarketService | None = None,
+    ):
+        self.symbols = [s.upper() for s in symbols]
+        self.timeframes = [tf.lower() for tf in timeframes]
+        self.buffer_size = buffer_size
+        self.ws_base = (ws_base or settings.BINANCE_WS_BASE).rstrip("/")
+        self.market = market or MarketService()
+
+        self.buffers = {
+            (symbol, tf): KlineRingBuffer(buffer_size)
+            for symbol in self.symbols
+            for tf in self.timeframes
+        }
+        self._last_prices: dict[str, tuple[float, float]] = {}  # symbol -> (precio, monotonic)
+        self._price_event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self.connected = False
+        self.reconnects = 0
+        self.messages = 0
+
+    @classmethod
+    def from_settings(cls) -> "MarketStreamService":
+        symbols = _split_csv(settings.STREAM_SYMBOLS) or [settings.SYMBOL]
+        timeframes = _split_csv(settings.STREAM_TIMEFRAMES) or [settings.TIMEFRAME]
+        return cls(symbols, timeframes, buffer_size=settings.STREAM_BUFFER_SIZE)
+
+    def stream_url(self) -> str:
+        streams = [f"{s.lower()}@kline_{tf}" for s in self.symbols for tf in self.timeframes]
+        streams += [f"{s.lower()}@miniTicker" for s in self.symbols]
+        return f"{self.ws_base}/stream?streams={'/'.join(streams)}"
+
+    async def start(self) -> None:
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        delay = self.RECONNECT_MIN_SECONDS
+        while self._running:
+            try:
+                async with websockets.connect(self.stream_url(), ping_interval=20) as ws:
+                    # Backfill después de conectar: los mensajes que llegan mientras
+                    # tanto quedan encolados y se aplican encima del histórico
+                    await self._backfill()
+                    self.connected = True
+                    delay = self.RECONNECT_MIN_SECONDS
+                    print(f"📡 Stream conectado: {len(self.buffers)} series")
+                    async for raw in ws:
+                        self.handle_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[MarketStream] error: {e}")
+
+            self.connected = False
+            if self._running:
+                self.reconnects += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    async def _backfill(self) -> None:
+        for (symbol, tf), buffer in self.buffers.items():
+            columns = await self.market.get_klines_columns(symbol=symbol, timeframe=tf, limit=self.buffer_size)
+            buffer.load(columns)
+
+    def handle_message(self, raw: str | bytes) -> None:
+        """Procesa un mensaje del combined stream ({"stream": ..., "data": {...}})"""
+        msg = json.loads(raw)
+        data = msg.get("data", msg)
+        event = data.get("e")
+        self.messages += 1
+
+        if event == "kline":
+            k = data["k"]
+            symbol = data["s"].upper()
+            buffer = self.buffers.get((symbol, k["i"]))
+            if buffer is not None:
+                buffer.update({
+                    "open_time": int(k["t"]),
+                    "open": float(k["o"]),
+                    "high": float(k["h"]),
+                    "low": float(k["l"]),
+                    "close": float(k["c"]),
+                    "volume": float(k["v"]),
+                    "close_time": int(k["T"]),
+                })
+            self._set_price(symbol, float(k["c"]))
+        elif event == "24hrMiniTicker":
+            self._set_price(data["s"].upper(), float(data["c"]))
+
+    def _set_price(self, symbol: str, price: float) -> None:
+        self._last_prices[symbol] = (price, time.monotonic())
+        self._price_event.set()
+
+    def last_price(self, symbol: str) -> float | None:
+        """Último precio recibido, o None si no hay datos frescos"""
+        entry = self._last_prices.get(symbol.upper())
+        if not self.connected or entry is None:
+            return None
+        price, at = entry
+        if time.monotonic() - at > settings.STREAM_MAX_STALE_SECONDS:
+            return None
+        return price
+
+    def get_candles(self, symbol: str, timeframe: str, limit: int | None = None) -> CandleSeries | None:
+        """Ventana de velas desde el buffer, o None si la serie no está suscrita/lista"""
+        buffer = self.buffers.get((symbol.upper(), timeframe.lower()))
+        if not self.connected or buffer is None or len(buffer) == 0:
+            return None
+        if limit is not None and len(buffer) < limit:
+            return None
+        return buffer.to_series(limit)
+
+    async def wait_price_update(self, timeout: float) -> None:
+        """Espera hasta que llegue un precio nuevo (o timeout)"""
+        self._price_event.clear()
+        try:
+            await asyncio.wait_for(self._price_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _split_csv(value: str | None) -> list[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+_market_stream: MarketStreamService | None = None
+
+
+def get_market_stream() -> MarketStreamService | None:
+    """Stream activo de la app (None si STREAM_ENABLED=false)"""
+    return _market_stream
+
+
+async def start_market_stream() -> MarketStreamService | None:
+    global _market_stream
+    if not settings.STREAM_ENABLED:
+        return None
+    _market_stream = MarketStreamService.from_settings()
+    await _market_stream.start()
+    return _market_stream
+
+
+async def stop_market_stream() -> None:
+    global _market_stream
+    if _market_stream is not None:
+        await _market_stream.stop()
+        _market_stream = None
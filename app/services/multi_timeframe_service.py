@@ -8,9 +8,15 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+from app.config.settings import settings
 from app.services.market_service import MarketService
-from app.services.trade_manager import StrategyEngine
+from app.services.trade_manager import StrategyEngine, StrategyParams
 from app.enums.trade_enums import SignalType
+from app.util.candles import CandleSeries
+from app.util.resample import base_bars_needed, resample_columns
+from app.util.timeframes import timeframe_to_ms
 
 
 class TimeframeWeight(Enum):
@@ -60,10 +66,18 @@ class MultiTimeframeService:
         "4h": TimeframeWeight.TIMEFRAME_4H.value,
         "1d": TimeframeWeight.TIMEFRAME_1D.value,
     }
+
+    # Score ponderado a partir del cual se decide sin mayoría de votos
+    CONSENSUS_SCORE_THRESHOLD = 30
+
+    # Confianza mínima para alertar (monitor de Celery)
+    ALERT_MIN_CONFIDENCE = 40
     
-    def __init__(self, symbol: str = "BTCUSDT"):
+    def __init__(self, symbol: str = "BTCUSDT", base_timeframe: Optional[str] = None):
         self.symbol = symbol
         self.market_service = MarketService()
+        # Si hay timeframe base, los demás se construyen localmente (una sola serie descargada)
+        self.base_timeframe = base_timeframe or settings.MTF_BASE_TIMEFRAME
     
     async def analyze_all_timeframes(self) -> MultiTimeframeAnalysis:
         """
@@ -73,14 +87,13 @@ class MultiTimeframeService:
         print("🔍 ANÁLISIS MULTI-TIMEFRAME")
         print("=" * 80)
         
-        # Analizar cada timeframe secuencialmente con delay para evitar rate limit
-        timeframe_signals = []
-        for i, tf in enumerate(self.TIMEFRAMES):
-            signal = await self._analyze_single_timeframe(tf)
-            timeframe_signals.append(signal)
-            # Añadir delay entre requests (excepto el último)
-            if i < len(self.TIMEFRAMES) - 1:
-                await asyncio.sleep(0.3)  # 300ms entre requests
+        frames = await self._load_resampled_frames() if self.base_timeframe else {}
+
+        # Analizar todos los timeframes en paralelo; el rate limit lo controla
+        # el limitador de peso compartido de MarketService
+        timeframe_signals = list(await asyncio.gather(
+            *(self._analyze_single_timeframe(tf, frames.get(tf)) for tf in self.TIMEFRAMES)
+        ))
         
         # Contar votos
         long_votes = sum(1 for ts in timeframe_signals if ts.signal == SignalType.LONG)
@@ -135,20 +148,59 @@ class MultiTimeframeService:
             recommendation=recommendation
         )
     
-    async def _analyze_single_timeframe(self, timeframe: str) -> TimeframeSignal:
+    async def _load_resampled_frames(self) -> Dict[str, CandleSeries]:
         """
-        Analiza un timeframe individual
+        Descarga solo la serie base y construye cada timeframe agregándola.
+        Los timeframes que necesitan más de MTF_RESAMPLE_MAX_BASE_BARS velas base
+        (ej: 1d desde 15m) solo se resamplean si el almacén local ya tiene ese histórico;
+        si no, quedan fuera y se descargan por separado (una request cada uno).
+        Si falla, devuelve {} y cada timeframe se descarga por separado.
         """
+        base = self.base_timeframe
+        bars = settings.MTF_RESAMPLE_BARS
         try:
-            # Obtener datos de mercado
-            df = await self.market_service.get_klines_df(
+            store = self.market_service.store
+            available = settings.MTF_RESAMPLE_MAX_BASE_BARS
+            if store is not None:
+                available = max(available, store.count(self.symbol, base))
+            needed = {tf: base_bars_needed(tf, bars, base) for tf in self.TIMEFRAMES}
+            timeframes = [tf for tf in self.TIMEFRAMES if needed[tf] <= available]
+            if not timeframes:
+                return {}
+
+            base_columns = await self.market_service.get_klines_columns(
                 symbol=self.symbol,
-                timeframe=timeframe,
-                limit=300
+                timeframe=base,
+                limit=max(needed[tf] for tf in timeframes)
             )
+            frames = {}
+            for tf in timeframes:
+                columns = resample_columns(base_columns, base, tf)
+                frames[tf] = CandleSeries.from_columns(columns).window(bars)
+            return frames
+        except Exception as e:
+            print(f"⚠️  No se pudo resamplear desde {base}, se descarga cada timeframe: {e}")
+            return {}
+
+    async def _analyze_single_timeframe(
+        self,
+        timeframe: str,
+        candles: Optional[CandleSeries] = None
+    ) -> TimeframeSignal:
+        """
+        Analiza un timeframe individual
+        """
+        try:
+            # Obtener datos de mercado (si no vienen ya resampleados)
+            if candles is None:
+                candles = await self.market_service.get_candles(
+                    symbol=self.symbol,
+                    timeframe=timeframe,
+                    limit=300
+                )
             
             # Analizar con estrategia (sin logs detallados)
-            engine = StrategyEngine(df, timeframe, verbose=False)
+            engine = StrategyEngine(candles, timeframe, verbose=False, symbol=self.symbol)
             signal_dict = engine.compute_signal()
             signal = signal_dict.get("signal")
             entry_price = signal_dict.get("entry")
@@ -169,7 +221,7 @@ class MultiTimeframeService:
             return TimeframeSignal(
                 timeframe=timeframe,
                 signal=signal,
-                price=entry_price if entry_price else df['close'].iloc[-1],
+                price=entry_price if entry_price else candles.last_close,
                 confidence=confidence,
                 details=details,
                 weight=self.WEIGHTS[timeframe]
@@ -277,9 +329,9 @@ class MultiTimeframeService:
         weighted_score = self._calculate_weighted_score(timeframe_signals)
         
         # Umbral: si el score ponderado es fuerte, puede haber consenso
-        if weighted_score > 30:  # Fuerte inclinación LONG
+        if weighted_score > self.CONSENSUS_SCORE_THRESHOLD:  # Fuerte inclinación LONG
             return SignalType.LONG
-        elif weighted_score < -30:  # Fuerte inclinación SHORT
+        elif weighted_score < -self.CONSENSUS_SCORE_THRESHOLD:  # Fuerte inclinación SHORT
             return SignalType.SHORT
         
         # Sin consenso claro
@@ -321,6 +373,143 @@ class MultiTimeframeService:
         # Promedio de ambos factores
         return (weight_confidence + score_confidence) / 2
     
+    @classmethod
+    def consensus_arrays(cls, votes: np.ndarray, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Versión vectorizada de _calculate_weighted_score, _determine_consensus y
+        _calculate_confidence: votes es una matriz (velas x timeframes) con +1 LONG,
+        -1 SHORT y 0 NEUTRAL; weights el peso de cada columna.
+        """
+        votes = np.asarray(votes, dtype=np.int8)
+        weights = np.asarray(weights, dtype=float)
+        total_weight = weights.sum()
+
+        long_votes = (votes == 1).sum(axis=1)
+        short_votes = (votes == -1).sum(axis=1)
+        neutral_votes = votes.shape[1] - long_votes - short_votes
+        if total_weight > 0:
+            weighted_score = (votes @ weights) / total_weight * 100
+        else:
+            weighted_score = np.zeros(len(votes))
+
+        # Mismo orden de reglas que _determine_consensus
+        threshold = cls.CONSENSUS_SCORE_THRESHOLD
+        consensus = np.select(
+            [
+                (long_votes >= 2) & (long_votes > short_votes),
+                (short_votes >= 2) & (short_votes > long_votes),
+                weighted_score > threshold,
+                weighted_score < -threshold,
+            ],
+            [1, -1, 1, -1],
+            default=0,
+        ).astype(np.int8)
+
+        if total_weight > 0:
+            matching_weight = ((votes == consensus[:, None]) * weights).sum(axis=1)
+            weight_confidence = matching_weight / total_weight * 100
+        else:
+            weight_confidence = np.zeros(len(votes))
+        score_confidence = np.minimum(np.abs(weighted_score), 100)
+        confidence = np.where(consensus != 0, (weight_confidence + score_confidence) / 2, 0.0)
+
+        return {
+            "long_votes": long_votes,
+            "short_votes": short_votes,
+            "neutral_votes": neutral_votes,
+            "weighted_score": weighted_score,
+            "consensus": consensus,
+            "confidence": confidence,
+            "alert": (consensus != 0) & (np.round(confidence, 2) >= cls.ALERT_MIN_CONFIDENCE),
+        }
+
+    def replay_consensus(
+        self,
+        candles: CandleSeries,
+        start_index: int = 0,
+        params: Optional[StrategyParams] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Consenso multi-timeframe en cada vela histórica del timeframe base (15m por defecto).
+
+        Cada timeframe se construye resampleando la serie base y su señal sale de
+        compute_signal_series. En la vela base i solo se usa la última vela de cada
+        timeframe que ya cerró (cierre <= cierre de la vela i): sin lookahead.
+        Las velas antes de start_index solo sirven de calentamiento.
+        """
+        base = self.base_timeframe or self.TIMEFRAMES[0]
+        base_ms = timeframe_to_ms(base)
+        base_columns = candles.to_columns()
+        base_close_time = candles.open_time.astype(np.int64) + base_ms
+
+        votes = np.zeros((len(candles), len(self.TIMEFRAMES)), dtype=np.int8)
+        for column, tf in enumerate(self.TIMEFRAMES):
+            frame = CandleSeries.from_columns(resample_columns(base_columns, base, tf))
+            if len(frame) == 0:
+                continue
+            series = StrategyEngine(frame, tf, verbose=False, params=params).compute_signal_series()
+            close_time = frame.open_time.astype(np.int64) + timeframe_to_ms(tf)
+            # Última vela cerrada del timeframe al cierre de cada vela base
+            index = np.searchsorted(close_time, base_close_time, side="right") - 1
+            closed = index >= 0
+            votes[closed, column] = series["signal"][index[closed]]
+
+        weights = np.array([self.WEIGHTS[tf] for tf in self.TIMEFRAMES], dtype=float)
+        result = self.consensus_arrays(votes[start_index:], weights)
+        return {
+            "open_time": candles.open_time[start_index:],
+            "close": candles.close[start_index:],
+            **{f"signal_{tf}": votes[start_index:, column] for column, tf in enumerate(self.TIMEFRAMES)},
+            **result,
+        }
+
+    def replay_warmup_bars(self, bars: Optional[int] = None) -> int:
+        """Velas base previas para que el timeframe más largo tenga `bars` velas cerradas"""
+        base = self.base_timeframe or self.TIMEFRAMES[0]
+        bars = bars or settings.MTF_RESAMPLE_BARS
+        return max(base_bars_needed(tf, bars, base) for tf in self.TIMEFRAMES)
+
+    def replay_report(self, replay: Dict[str, np.ndarray], max_events: int = 500) -> Dict:
+        """
+        Resumen del replay: distribución del consenso y las alertas que habría emitido
+        el monitor (cuando empieza una alerta o cambia su dirección)
+        """
+        consensus = replay["consensus"]
+        alert = replay["alert"]
+        previous_alert = np.r_[False, alert[:-1]]
+        previous_consensus = np.r_[0, consensus[:-1]]
+        starts = np.flatnonzero(alert & (~previous_alert | (consensus != previous_consensus)))
+
+        events = []
+        for i in starts[:max_events]:
+            events.append({
+                "open_time": int(replay["open_time"][i]),
+                "signal": (SignalType.LONG if consensus[i] > 0 else SignalType.SHORT).value,
+                "confidence": round(float(replay["confidence"][i]), 2),
+                "weighted_score": round(float(replay["weighted_score"][i]), 2),
+                "price": float(replay["close"][i]),
+                "votes": {tf: int(replay[f"signal_{tf}"][i]) for tf in self.TIMEFRAMES},
+            })
+
+        bars = len(consensus)
+        return {
+            "symbol": self.symbol,
+            "base_timeframe": self.base_timeframe or self.TIMEFRAMES[0],
+            "bars": bars,
+            "start": int(replay["open_time"][0]) if bars else None,
+            "end": int(replay["open_time"][-1]) if bars else None,
+            "consensus_bars": {
+                "long": int((consensus > 0).sum()),
+                "short": int((consensus < 0).sum()),
+                "none": int((consensus == 0).sum()),
+            },
+            "alert_bars": int(alert.sum()),
+            "alerts": len(starts),
+            "mean_confidence": round(float(replay["confidence"][consensus != 0].mean()), 2) if consensus.any() else 0.0,
+            "events": events,
+            "events_truncated": len(starts) > max_events,
+        }
+
     def _generate_recommendation(
         self,
         consensus_signal: Optional[SignalType],
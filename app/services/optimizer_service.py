@@ -0,0 +1,235 @@
+"""
+Optimizer Service
+Barrido de parámetros de StrategyEngine (grid / random search) en paralelo sobre un pool de procesos
+"""
+
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields, replace
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.backtest_service import BacktestConfig, BacktestService, backtest_candles, warmup_bars
+from app.services.indicator_cache import IndicatorCache
+from app.services.trade_manager import StrategyParams
+from app.util.candles import CandleSeries
+from app.util.shared_candles import SharedCandles
+
+# Dirección de cada objetivo: 1 = mayor es mejor, -1 = menor es mejor
+OBJECTIVES = {
+    "sharpe": 1,
+    "total_return_pct": 1,
+    "net_pnl": 1,
+    "profit_factor": 1,
+    "expectancy_r": 1,
+    "win_rate": 1,
+    "max_drawdown_pct": -1,
+}
+
+PARAM_NAMES = tuple(f.name for f in fields(StrategyParams))
+
+# Estado de cada proceso worker (se llena en _init_worker)
+_worker: dict = {}
+
+
+def grid_combinations(space: dict[str, list]) -> list[dict]:
+    """Producto cartesiano de las listas de valores de cada parámetro"""
+    _check_names(space)
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_combinations(space: dict[str, list | dict], samples: int, seed: int | None = None) -> list[dict]:
+    """
+    Muestras aleatorias: cada parámetro es una lista de valores posibles o un rango
+    {"min": a, "max": b} (enteros si ambos extremos son enteros)
+    """
+    _check_names(space)
+    rng = np.random.default_rng(seed)
+    combos = []
+    for _ in range(samples):
+        combo = {}
+        for name, values in space.items():
+            if isinstance(values, dict):
+                low, high = values["min"], values["max"]
+                if isinstance(low, int) and isinstance(high, int):
+                    combo[name] = int(rng.integers(low, high + 1))
+                else:
+                    combo[name] = float(rng.uniform(low, high))
+            else:
+                combo[name] = values[int(rng.integers(len(values)))]
+        combos.append(combo)
+    return combos
+
+
+def _check_names(space: dict) -> None:
+    unknown = set(space) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Parámetros desconocidos: {sorted(unknown)} (válidos: {PARAM_NAMES})")
+
+
+def valid_params(params: StrategyParams) -> bool:
+    return params.ma_fast < params.ma_slow and params.rsi_min < params.rsi_max
+
+
+def check_objectives(objectives: list[str]) -> None:
+    for objective in objectives:
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Objetivo desconocido: {objective} (válidos: {list(OBJECTIVES)})")
+
+
+def _objective_key(stats: dict, objective: str) -> float:
+    """Clave de orden ascendente; None (ej: profit_factor sin pérdidas) cuenta como infinito"""
+    value = stats[objective]
+    return -OBJECTIVES[objective] * (math.inf if value is None else value)
+
+
+def rank(results: list[dict], objectives: list[str], min_trades: int = 0) -> list[dict]:
+    """Ordena por los objetivos en orden (los siguientes desempatan) descartando pocos trades"""
+    check_objectives(objectives)
+    eligible = [r for r in results if r["stats"]["trades"] >= min_trades]
+    return sorted(eligible, key=lambda r: tuple(_objective_key(r["stats"], o) for o in objectives))
+
+
+def _init_worker(handle, timeframe, start_index, base_params, config, symbol):
+    shm, candles = SharedCandles.attach(handle)
+    _worker.update(
+        shm=shm,  # mantener el bloque abierto mientras viva el proceso
+        candles=candles,
+        timeframe=timeframe,
+        start_index=start_index,
+        base_params=base_params,
+        config=config,
+        symbol=symbol,
+        # Las combinaciones repiten periodos: MA/RSI/ATR se calculan una vez por worker
+        cache=IndicatorCache(max_entries=1024),
+    )
+
+
+def _evaluate_chunk(combos: list[dict]) -> list[dict]:
+    return [
+        _evaluate(
+            _worker["candles"], _worker["timeframe"], _worker["start_index"], _worker["base_params"],
+            _worker["config"], _worker["symbol"], _worker["cache"], combo,
+        )
+        for combo in combos
+    ]
+
+
+def _evaluate(candles, timeframe, start_index, base_params, config, symbol, cache, combo) -> dict:
+    params = replace(base_params, **combo)
+    result = backtest_candles(
+        candles, timeframe, params, config,
+        start_index=start_index, symbol=symbol, cache=cache,
+    )
+    return {"params": asdict(params), "stats": result.stats}
+
+
+def optimize_candles(
+    candles: CandleSeries,
+    timeframe: str,
+    combos: list[dict],
+    start_index: int = 0,
+    config: BacktestConfig | None = None,
+    base_params: StrategyParams | None = None,
+    workers: int | None = None,
+    symbol: str = "optimizer",
+) -> list[dict]:
+    """
+    Evalúa cada combinación con backtest_candles y devuelve [{params, stats}] sin ordenar.
+    Con workers > 1 las velas se comparten por memoria compartida (no se serializan por
+    tarea) y las combinaciones se reparten en bloques para balancear la carga.
+    """
+    config = config or BacktestConfig.from_settings()
+    base_params = base_params or StrategyParams.from_settings()
+    combos = [c for c in combos if valid_params(replace(base_params, **c))]
+    workers = workers or settings.OPTIMIZER_WORKERS or os.cpu_count() or 1
+    workers = min(workers, max(1, len(combos)))
+
+    # Un proceso daemon (ej: worker de Celery) no puede crear hijos: se evalúa en serie
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        cache = IndicatorCache(max_entries=1024)
+        return [
+            _evaluate(candles, timeframe, start_index, base_params, config, symbol, cache, combo)
+            for combo in combos
+        ]
+
+    chunk_size = max(1, math.ceil(len(combos) / (workers * 4)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    with SharedCandles(candles) as shared:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(shared.handle, timeframe, start_index, base_params, config, symbol),
+        ) as pool:
+            return [row for rows in pool.map(_evaluate_chunk, chunks) for row in rows]
+
+
+class OptimizerService:
+    """
+    Optimización de parámetros sobre el almacén local de velas
+    """
+
+    def __init__(self, backtests: BacktestService | None = None):
+        self.backtests = backtests or BacktestService()
+
+    def optimize(
+        self,
+        symbol: str,
+        timeframe: str,
+        space: dict,
+        method: str = "grid",
+        samples: int = 500,
+        seed: int | None = None,
+        objectives: list[str] | None = None,
+        min_trades: int = 10,
+        top: int = 20,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        config: BacktestConfig | None = None,
+        workers: int | None = None,
+    ) -> dict:
+        objectives = objectives or ["sharpe"]
+        check_objectives(objectives)
+        if method == "grid":
+            combos = grid_combinations(space)
+        elif method == "random":
+            combos = random_combinations(space, samples, seed)
+        else:
+            raise ValueError("method debe ser 'grid' o 'random'")
+        if len(combos) > settings.OPTIMIZER_MAX_COMBINATIONS:
+            raise ValueError(
+                f"{len(combos)} combinaciones superan OPTIMIZER_MAX_COMBINATIONS={settings.OPTIMIZER_MAX_COMBINATIONS}"
+            )
+
+        base_params = StrategyParams.from_settings()
+        warmup = max(warmup_bars(replace(base_params, **combo)) for combo in combos) if combos else 0
+        candles, start_index = self.backtests.load_candles(symbol, timeframe, start_ms, end_ms, warmup=warmup)
+
+        started = time.perf_counter()
+        results = optimize_candles(
+            candles, timeframe, combos,
+            start_index=start_index, config=config, base_params=base_params, workers=workers, symbol=symbol,
+        )
+        elapsed = time.perf_counter() - started
+        ranked = rank(results, objectives, min_trades)
+
+        return {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "method": method,
+            "objectives": objectives,
+            "bars": len(candles) - start_index,
+            "combinations": len(combos),
+            "evaluated": len(results),
+            "eligible": len(ranked),
+            "elapsed_seconds": round(elapsed, 3),
+            "evaluations_per_second": round(len(results) / elapsed, 1) if elapsed > 0 else None,
+            "results": ranked[:top],
+        }
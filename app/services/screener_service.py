@@ -0,0 +1,190 @@
+"""
+Screener Service
+Evalúa las reglas de StrategyEngine sobre muchos símbolos en una sola pasada vectorizada
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from app.enums.trade_enums import SignalType
+from app.services.market_service import MarketService
+from app.services.trade_manager import StrategyParams, evaluate_rules
+from app.util.math import rsi, atr, sma
+
+
+def batch_signals(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    params: StrategyParams | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Reglas de compute_signal sobre matrices (símbolos x tiempo) alineadas por vela.
+    Evalúa la última vela de cada fila y devuelve un array por campo (uno por símbolo):
+    signal = +1 long, -1 short, 0 sin señal.
+    """
+    params = params or StrategyParams.from_settings()
+    last_price = close[:, -1]
+    prev_high = high[:, -params.lookback:].max(axis=1)
+    prev_low = low[:, -params.lookback:].min(axis=1)
+
+    ma_fast = sma(close, params.ma_fast)[:, -1]
+    ma_slow = sma(close, params.ma_slow)[:, -1]
+    rules = evaluate_rules(
+        last_price,
+        ma_fast,
+        ma_slow,
+        rsi(close, params.rsi_period)[:, -1],
+        atr(high, low, close, period=params.atr_period)[:, -1],
+        prev_high,
+        prev_low,
+        params,
+    )
+    last_atr = rules["atr"]
+    atr_ok = rules["atr_ok"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Distancia (en ATRs) que le falta al cierre para romper el rango reciente
+        dist_up = np.where(atr_ok, (prev_high - last_price) / last_atr, np.inf)
+        dist_down = np.where(atr_ok, (last_price - prev_low) / last_atr, np.inf)
+
+    return {
+        **rules,
+        "price": last_price,
+        "ma_fast": ma_fast,
+        "ma_slow": ma_slow,
+        "prev_high": prev_high,
+        "prev_low": prev_low,
+        "long_confirmations": (
+            rules["trend_up"].astype(np.int8) + rules["breakout_up"] + rules["rsi_ok_long"] + atr_ok
+        ),
+        "short_confirmations": (
+            rules["trend_down"].astype(np.int8) + rules["breakout_down"] + rules["rsi_ok_short"] + atr_ok
+        ),
+        "breakout_distance_up": dist_up,
+        "breakout_distance_down": dist_down,
+    }
+
+
+class ScreenerService:
+    """
+    Screener de mercado:
+    - Descarga las velas de todos los símbolos en paralelo (caché + límite de peso de MarketService)
+    - Apila las series alineadas en matrices (símbolos x tiempo)
+    - Aplica las reglas long/short de StrategyEngine a todos a la vez y ordena el resultado
+    """
+
+    def __init__(self, market: MarketService | None = None):
+        self.market = market or MarketService()
+
+    async def load_matrix(self, symbols: list[str], timeframe: str, limit: int = 300):
+        """
+        Devuelve (símbolos incluidos, matrices close/high/low, símbolos descartados con motivo).
+        Solo se apilan series completas (`limit` velas) que terminan en la misma vela;
+        rellenar con NaN alteraría las medias y el RSI del resto.
+        """
+        results = await asyncio.gather(
+            *(self.market.get_klines_columns(symbol, timeframe, limit) for symbol in symbols),
+            return_exceptions=True,
+        )
+
+        skipped: dict[str, str] = {}
+        loaded: list[tuple[str, dict[str, np.ndarray]]] = []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                skipped[symbol] = f"error: {result}"
+            elif len(result["open_time"]) < limit:
+                skipped[symbol] = f"historial insuficiente ({len(result['open_time'])}/{limit} velas)"
+            else:
+                loaded.append((symbol, result))
+
+        if not loaded:
+            return [], None, skipped
+
+        last_open = max(int(columns["open_time"][-1]) for _, columns in loaded)
+        included = []
+        for symbol, columns in loaded:
+            if int(columns["open_time"][-1]) != last_open:
+                skipped[symbol] = "sin vela actual (símbolo pausado o deslistado)"
+            else:
+                included.append((symbol, columns))
+
+        matrices = {
+            column: np.stack([columns[column][-limit:] for _, columns in included])
+            for column in ("close", "high", "low")
+        }
+        return [symbol for symbol, _ in included], matrices, skipped
+
+    async def screen(self, symbols: list[str], timeframe: str, limit: int = 300, top: int | None = None) -> dict:
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        if not symbols:
+            raise ValueError("Se necesita al menos un símbolo")
+        params = StrategyParams.from_settings()
+        limit = max(limit, params.ma_slow, params.lookback)
+
+        t0 = time.perf_counter()
+        names, matrices, skipped = await self.load_matrix(symbols, timeframe, limit)
+        t1 = time.perf_counter()
+
+        rows = []
+        if names:
+            result = batch_signals(matrices["close"], matrices["high"], matrices["low"], params)
+            for i, symbol in enumerate(names):
+                rows.append(self._row(symbol, i, result))
+            rows.sort(key=self._rank_key)
+        t2 = time.perf_counter()
+
+        return {
+            "timeframe": timeframe,
+            "bars": limit,
+            "screened": len(names),
+            "signals": sum(1 for row in rows if row["signal"]),
+            "results": rows[:top] if top else rows,
+            "skipped": skipped,
+            "timing_ms": {"fetch": round((t1 - t0) * 1000, 2), "compute": round((t2 - t1) * 1000, 2)},
+        }
+
+    @staticmethod
+    def _row(symbol: str, i: int, result: dict[str, np.ndarray]) -> dict:
+        signal = int(result["signal"][i])
+        long_conf = int(result["long_confirmations"][i])
+        short_conf = int(result["short_confirmations"][i])
+        # Dirección más cercana a cumplir (la de la señal si la hay)
+        if signal:
+            direction = SignalType.LONG if signal > 0 else SignalType.SHORT
+        else:
+            direction = SignalType.LONG if long_conf >= short_conf else SignalType.SHORT
+        distance = result["breakout_distance_up" if direction == SignalType.LONG else "breakout_distance_down"][i]
+
+        def _f(value) -> float | None:
+            value = float(value)
+            return value if np.isfinite(value) else None
+
+        return {
+            "symbol": symbol,
+            "signal": direction.value if signal else None,
+            "bias": direction.value,
+            "confirmations": max(long_conf, short_conf) if not signal else 4,
+            "price": _f(result["price"][i]),
+            "entry": _f(result["price"][i]) if signal else None,
+            "stop_loss": _f(result["stop_loss"][i]),
+            "take_profit": _f(result["take_profit"][i]),
+            "rsi": round(float(result["rsi"][i]), 2),
+            "atr": float(result["atr"][i]),
+            "ma_fast": _f(result["ma_fast"][i]),
+            "ma_slow": _f(result["ma_slow"][i]),
+            "breakout_distance_atr": _f(distance),
+        }
+
+    @staticmethod
+    def _rank_key(row: dict):
+        # Primero las señales, luego más confirmaciones y más cerca del breakout
+        distance = row["breakout_distance_atr"]
+        return (
+            row["signal"] is None,
+            -row["confirmations"],
+            distance if distance is not None else float("inf"),
+            row["symbol"],
+        )
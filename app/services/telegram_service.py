@@ -3,15 +3,17 @@ Telegram Alert Service
 Envía notificaciones de trading a Telegram
 """
 
-import httpx
 from typing import Optional
 from app.config.settings import settings
+from app.services.http_client import SharedHttpClient
 
 
 class TelegramService:
     """
     Servicio para enviar alertas a Telegram
     """
+
+    http = SharedHttpClient("telegram", timeout=10)
     
     def __init__(self):
         self.bot_token = getattr(settings, 'TELEGRAM_BOT_TOKEN', None)
@@ -44,12 +46,11 @@ class TelegramService:
                 "disable_web_page_preview": True
             }
             
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                
-                print(f"✅ Mensaje enviado a Telegram (chat_id: {self.chat_id})")
-                return True
+            response = await self.http.client.post(url, json=payload)
+            response.raise_for_status()
+
+            print(f"✅ Mensaje enviado a Telegram (chat_id: {self.chat_id})")
+            return True
                 
         except Exception as e:
             print(f"❌ Error enviando mensaje a Telegram: {e}")
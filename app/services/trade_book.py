@@ -0,0 +1,298 @@
+"""
+Trade Book
+Libro en memoria de trades abiertos indexado por símbolo y niveles de SL/TP
+"""
+
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.enums.trade_enums import TradeResult
+from app.models.trade_model import Trade
+
+
+@dataclass(slots=True)
+class OpenTrade:
+    """Copia liviana de un Trade abierto (lo necesario para vigilar y cerrar)"""
+    id: int
+    symbol: str
+    timeframe: str
+    side: str
+    entry_price: float
+    stop_loss: float
+    take_profit: float
+    fee_rate: float
+    opened_at_ms: int = 0
+
+    @classmethod
+    def from_model(cls, t: Trade) -> "OpenTrade":
+        return cls(
+            id=t.id,
+            symbol=t.symbol.upper(),
+            timeframe=t.timeframe,
+            side=t.side,
+            entry_price=t.entry_price,
+            stop_loss=t.stop_loss,
+            take_profit=t.take_profit,
+            fee_rate=t.fee_rate,
+            opened_at_ms=_to_ms(t.opened_at),
+        )
+
+    @classmethod
+    def from_dict(cls, t: dict) -> "OpenTrade":
+        return cls(
+            id=t["id"],
+            symbol=t["symbol"].upper(),
+            timeframe=t["timeframe"],
+            side=t["side"],
+            entry_price=t["entry_price"],
+            stop_loss=t["stop_loss"],
+            take_profit=t["take_profit"],
+            fee_rate=t["fee_rate"],
+            opened_at_ms=_to_ms(t.get("opened_at")),
+        )
+
+
+def _to_ms(value: datetime | int | None) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        # SQLite devuelve fechas sin zona: se guardan en UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+class _Levels:
+    """Niveles ordenados (nivel, trade_id): búsqueda e inserción por bisección"""
+
+    def __init__(self) -> None:
+        self.keys: list[tuple[float, int]] = []
+
+    def add(self, level: float, trade_id: int) -> None:
+        insort(self.keys, (level, trade_id))
+
+    def remove(self, level: float, trade_id: int) -> None:
+        i = bisect_left(self.keys, (level, trade_id))
+        if i < len(self.keys) and self.keys[i] == (level, trade_id):
+            del self.keys[i]
+
+    def at_or_below(self, price: float) -> list[int]:
+        """Ids con nivel <= price"""
+        return [trade_id for _, trade_id in self.keys[:bisect_right(self.keys, (price, float("inf")))]]
+
+    def at_or_above(self, price: float) -> list[int]:
+        """Ids con nivel >= price"""
+        return [trade_id for _, trade_id in self.keys[bisect_left(self.keys, (price, float("-inf"))):]]
+
+    def any_between(self, low: float, high: float) -> bool:
+        """Hay algún nivel en [low, high]"""
+        i = bisect_left(self.keys, (low, float("-inf")))
+        return i < len(self.keys) and self.keys[i][0] <= high
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class _SymbolBook:
+    def __init__(self) -> None:
+        self.ids: set[int] = set()
+        self.long_sl = _Levels()
+        self.long_tp = _Levels()
+        self.short_sl = _Levels()
+        self.short_tp = _Levels()
+
+
+class TradeBook:
+    """
+    Trades abiertos en memoria, por símbolo, con SL y TP ordenados:
+    - Se carga una vez desde la base (load) y se mantiene al crear/cerrar trades
+    - hits(symbol, price) devuelve solo los trades cuyo nivel fue cruzado en
+      O(log n + k), sin recorrer ni consultar el resto
+
+    Reglas de hits (último precio): long pierde con price <= SL y gana con price >= TP
+    (short al revés); si un trade cruza ambos, manda el SL. range_hits aplica las mismas
+    sobre máximo/mínimo de velas, con cierre al open si la vela abre más allá del nivel.
+    """
+
+    def __init__(self) -> None:
+        self._trades: dict[int, OpenTrade] = {}
+        self._books: dict[str, _SymbolBook] = {}
+        self.loaded_at: float | None = None
+        # Altas/bajas ocurridas mientras se consulta la base (se reaplican en load)
+        self._pending: list[tuple[str, OpenTrade | int]] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def begin_load(self) -> None:
+        """Llamar antes de consultar la base: las altas/bajas hasta load() no se pierden"""
+        self._pending = []
+
+    def load(self, trades: list[Trade | OpenTrade]) -> None:
+        """Reemplaza el contenido por los trades abiertos recibidos (ej: get_open_trades)"""
+        pending, self._pending = self._pending or [], None
+        self._trades.clear()
+        self._books.clear()
+        for t in trades:
+            self._insert(t if isinstance(t, OpenTrade) else OpenTrade.from_model(t))
+        for op, arg in pending:
+            if op == "add":
+                self._insert(arg)
+            else:
+                self._discard(arg)
+        self.loaded_at = time.monotonic()
+
+    def add(self, trade: OpenTrade) -> None:
+        if self._pending is not None:
+            self._pending.append(("add", trade))
+        self._insert(trade)
+
+    def remove(self, trade_id: int) -> OpenTrade | None:
+        if self._pending is not None:
+            self._pending.append(("remove", trade_id))
+        return self._discard(trade_id)
+
+    def _insert(self, trade: OpenTrade) -> None:
+        if trade.id in self._trades:
+            self._discard(trade.id)
+        self._trades[trade.id] = trade
+        book = self._books.setdefault(trade.symbol, _SymbolBook())
+        book.ids.add(trade.id)
+        if trade.side == "long":
+            book.long_sl.add(trade.stop_loss, trade.id)
+            book.long_tp.add(trade.take_profit, trade.id)
+        else:
+            book.short_sl.add(trade.stop_loss, trade.id)
+            book.short_tp.add(trade.take_profit, trade.id)
+
+    def _discard(self, trade_id: int) -> OpenTrade | None:
+        trade = self._trades.pop(trade_id, None)
+        if trade is None:
+            return None
+        book = self._books[trade.symbol]
+        book.ids.discard(trade.id)
+        if trade.side == "long":
+            book.long_sl.remove(trade.stop_loss, trade.id)
+            book.long_tp.remove(trade.take_profit, trade.id)
+        else:
+            book.short_sl.remove(trade.stop_loss, trade.id)
+            book.short_tp.remove(trade.take_profit, trade.id)
+        if not book.ids:
+            del self._books[trade.symbol]
+        return trade
+
+    def hits(self, symbol: str, price: float) -> list[tuple[OpenTrade, str, float]]:
+        """[(trade, result, close_price)] de los trades de `symbol` que tocó `price`"""
+        book = self._books.get(symbol.upper())
+        if book is None:
+            return []
+        losses = book.long_sl.at_or_above(price) + book.short_sl.at_or_below(price)
+        wins = book.long_tp.at_or_below(price) + book.short_tp.at_or_above(price)
+
+        hit: dict[int, tuple[OpenTrade, str, float]] = {}
+        for trade_id in losses:
+            hit[trade_id] = (self._trades[trade_id], TradeResult.loss.value, price)
+        for trade_id in wins:
+            hit.setdefault(trade_id, (self._trades[trade_id], TradeResult.win.value, price))
+        return [hit[trade_id] for trade_id in sorted(hit)]
+
+    def range_hits(
+        self,
+        symbol: str,
+        open_time: np.ndarray,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+    ) -> list[tuple[OpenTrade, str, float]]:
+        """
+        [(trade, result, close_price)] de los trades de `symbol` cuyo SL o TP tocó algún
+        máximo/mínimo de las velas recibidas (ordenadas por open_time). Para cada trade solo
+        cuentan las velas que abrieron después del trade (la vela de apertura puede traer
+        mechas previas). Mismas reglas que _first_exit del backtest (con intrabar="sl_first"):
+
+        - Si la vela abre más allá de un nivel (gap) se cierra al open
+        - Si no, el cierre es al precio del nivel tocado
+        - Si SL y TP se tocan en velas distintas gana el primero; en la misma vela no se
+          sabe el orden y se asume el SL
+        """
+        book = self._books.get(symbol.upper())
+        if book is None or len(open_time) == 0:
+            return []
+        lowest, highest = float(low.min()), float(high.max())
+        candidates = set(
+            book.long_sl.at_or_above(lowest) + book.short_tp.at_or_above(lowest)
+            + book.long_tp.at_or_below(highest) + book.short_sl.at_or_below(highest)
+        )
+
+        hits = []
+        for trade_id in sorted(candidates):
+            t = self._trades[trade_id]
+            start = int(np.searchsorted(open_time, t.opened_at_ms, side="left"))
+            h, l = high[start:], low[start:]
+            if t.side == "long":
+                sl_touch, tp_touch = l <= t.stop_loss, h >= t.take_profit
+            else:
+                sl_touch, tp_touch = h >= t.stop_loss, l <= t.take_profit
+            touch = sl_touch | tp_touch
+            if not touch.any():
+                continue
+            k = int(touch.argmax())
+            o = float(open_[start + k])
+            if (o <= t.stop_loss) if t.side == "long" else (o >= t.stop_loss):
+                hits.append((t, TradeResult.loss.value, o))
+            elif (o >= t.take_profit) if t.side == "long" else (o <= t.take_profit):
+                hits.append((t, TradeResult.win.value, o))
+            elif sl_touch[k]:
+                hits.append((t, TradeResult.loss.value, t.stop_loss))
+            else:
+                hits.append((t, TradeResult.win.value, t.take_profit))
+        return hits
+
+    def levels_between(self, symbol: str, low: float, high: float) -> bool:
+        """Algún trade de `symbol` tiene el SL o el TP en [low, high] (O(log n))"""
+        book = self._books.get(symbol.upper())
+        if book is None:
+            return False
+        return any(
+            levels.any_between(low, high)
+            for levels in (book.long_sl, book.long_tp, book.short_sl, book.short_tp)
+        )
+
+    def symbols(self) -> list[str]:
+        return list(self._books)
+
+    def trades(self, symbol: str | None = None) -> list[OpenTrade]:
+        if symbol is None:
+            return list(self._trades.values())
+        book = self._books.get(symbol.upper())
+        return [self._trades[trade_id] for trade_id in book.ids] if book else []
+
+    def get(self, trade_id: int) -> OpenTrade | None:
+        return self._trades.get(trade_id)
+
+    def ids(self):
+        return self._trades.keys()
+
+    def __len__(self) -> int:
+        return len(self._trades)
+
+    def __contains__(self, trade_id: int) -> bool:
+        return trade_id in self._trades
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "open_trades": len(self._trades),
+            "symbols": {symbol: len(book.ids) for symbol, book in self._books.items()},
+            "loaded_seconds_ago": round(time.monotonic() - self.loaded_at, 1) if self.loaded else None,
+        }
+
+
+# Libro compartido del proceso: lo llena TradeManager y lo actualiza TradeRepository
+trade_book = TradeBook()
@@ -1,19 +1,107 @@
 import asyncio
 import json
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import select, update
+from sqlalchemy import case, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.settings import settings
 from app.db.session import AsyncSessionLocal
-from app.enums.trade_enums import TradeStatus, TradeResult, SignalType
+from app.enums.trade_enums import TradeStatus, SignalType
 from app.models.trade_model import Trade
 from app.services.market_service import MarketService
+from app.services.market_stream import MarketStreamService
 from app.services.alert_service import AlertService
-from app.util.math import rsi, atr, sma
+from app.services.check_scheduler import CheckScheduler, check_interval
+from app.services.indicator_cache import IndicatorCache, indicator_cache
+from app.services.trade_book import OpenTrade, TradeBook, trade_book
+from app.util.candles import CandleSeries
+from app.util.math import rsi, atr, sma, rolling_max, rolling_min
+from app.util.timeframes import timeframe_to_ms
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    """Parámetros de StrategyEngine (por defecto los de settings)"""
+
+    ma_fast: int
+    ma_slow: int
+    rsi_period: int
+    rsi_min: float
+    rsi_max: float
+    atr_multiplier_sl: float
+    risk_reward: float
+    lookback: int = 15  # Reducido de 20 a 15 para ser más sensible a breakouts
+    atr_period: int = 14
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "StrategyParams":
+        values = {
+            "ma_fast": settings.MA_FAST,
+            "ma_slow": settings.MA_SLOW,
+            "rsi_period": settings.RSI_PERIOD,
+            "rsi_min": settings.RSI_MIN,
+            "rsi_max": settings.RSI_MAX,
+            "atr_multiplier_sl": settings.ATR_MULTIPLIER_SL,
+            "risk_reward": settings.RISK_REWARD,
+        }
+        values.update(overrides)
+        return cls(**values)
+
+
+def evaluate_rules(
+    close: np.ndarray,
+    ma_fast: np.ndarray,
+    ma_slow: np.ndarray,
+    rsi_v: np.ndarray,
+    atr_v: np.ndarray,
+    prev_high: np.ndarray,
+    prev_low: np.ndarray,
+    params: StrategyParams,
+) -> dict[str, np.ndarray]:
+    """
+    Reglas long/short de compute_signal elemento a elemento (cualquier forma:
+    una serie por vela, una vela por símbolo, etc.). signal = +1 long, -1 short, 0 nada.
+    """
+    last_atr = np.where(np.isnan(atr_v), 0.0, atr_v)
+    last_rsi = np.where(np.isnan(rsi_v), 50.0, rsi_v)
+
+    # Comparaciones con NaN dan False, igual que en compute_signal
+    trend_up = ma_fast > ma_slow
+    trend_down = ma_fast < ma_slow
+    breakout_up = close > prev_high
+    breakout_down = close < prev_low
+    rsi_ok_long = (params.rsi_min <= last_rsi) & (last_rsi <= params.rsi_max)
+    rsi_ok_short = ((100 - params.rsi_max) <= last_rsi) & (last_rsi <= (100 - params.rsi_min))
+    atr_ok = last_atr > 0
+
+    long_valid = trend_up & breakout_up & rsi_ok_long & atr_ok
+    short_valid = trend_down & breakout_down & rsi_ok_short & atr_ok & ~long_valid
+
+    risk = params.atr_multiplier_sl * last_atr
+    return {
+        "signal": long_valid.astype(np.int8) - short_valid.astype(np.int8),
+        "entry": np.where(long_valid | short_valid, close, np.nan),
+        "stop_loss": np.where(long_valid, close - risk, np.where(short_valid, close + risk, np.nan)),
+        "take_profit": np.where(
+            long_valid,
+            close + params.risk_reward * risk,
+            np.where(short_valid, close - params.risk_reward * risk, np.nan),
+        ),
+        "trend_up": trend_up,
+        "trend_down": trend_down,
+        "breakout_up": breakout_up,
+        "breakout_down": breakout_down,
+        "rsi_ok_long": rsi_ok_long,
+        "rsi_ok_short": rsi_ok_short,
+        "atr_ok": atr_ok,
+        "rsi": last_rsi,
+        "atr": last_atr,
+    }
 
 
 class StrategyEngine:
@@ -27,21 +115,75 @@ class StrategyEngine:
     - Niveles (zona) aproximados: swing reciente tipo fib/estructura
     """
 
-    def __init__(self, df: pd.DataFrame, timeframe: str = None, verbose: bool = True):
-        self.df = df
+    def __init__(
+        self,
+        candles: CandleSeries | pd.DataFrame,
+        timeframe: str = None,
+        verbose: bool = True,
+        symbol: str | None = None,
+        params: StrategyParams | None = None,
+        cache: IndicatorCache | None = None,
+    ):
+        # Acepta DataFrame por compatibilidad, pero trabaja sobre arrays (sin copias por ventana)
+        self.candles = candles if isinstance(candles, CandleSeries) else CandleSeries.from_df(candles)
         self.timeframe = timeframe or settings.TIMEFRAME
         self.verbose = verbose
+        # Con symbol, los indicadores se memoizan por vela (ver IndicatorCache)
+        self.symbol = symbol
+        self.cache = cache if cache is not None else indicator_cache
+        self.params = params or StrategyParams.from_settings()
+
+    def _indicators(self):
+        close = self.candles.close
+        high = self.candles.high
+        low = self.candles.low
+        p = self.params
+        cache = self.cache if self.symbol else None
+        if cache is None:
+            return (
+                sma(close, p.ma_fast),
+                sma(close, p.ma_slow),
+                rsi(close, p.rsi_period),
+                atr(high, low, close, period=p.atr_period),
+            )
+        return (
+            cache.sma(self.symbol, self.timeframe, self.candles, p.ma_fast),
+            cache.sma(self.symbol, self.timeframe, self.candles, p.ma_slow),
+            cache.rsi(self.symbol, self.timeframe, self.candles, p.rsi_period),
+            cache.atr(self.symbol, self.timeframe, self.candles, period=p.atr_period),
+        )
+
+    def compute_signal_series(self) -> dict[str, np.ndarray]:
+        """
+        Señal de cada vela en una sola pasada vectorizada (para backtests e investigación).
+        Todos los indicadores son causales: el valor en la vela i solo usa velas <= i,
+        así que coincide con compute_signal sobre candles[:i+1] (y exactamente en la última).
+
+        Devuelve un array por campo (pd.DataFrame(result) si se quiere tabla):
+        open_time, close, signal (+1/-1/0), entry, stop_loss, take_profit,
+        trend_up/down, breakout_up/down, rsi_ok_long/short, atr_ok, rsi, atr.
+        """
+        ma_fast, ma_slow, rsi_v, atr_v = self._indicators()
+        close = self.candles.close
+        result = evaluate_rules(
+            close,
+            ma_fast,
+            ma_slow,
+            rsi_v,
+            atr_v,
+            rolling_max(self.candles.high, self.params.lookback),
+            rolling_min(self.candles.low, self.params.lookback),
+            self.params,
+        )
+        return {"open_time": self.candles.open_time, "close": close, **result}
 
     def compute_signal(self) -> dict:
-        df = self.df
-        close = df["close"].values
-        high = df["high"].values
-        low = df["low"].values
+        close = self.candles.close
+        high = self.candles.high
+        low = self.candles.low
 
-        ma_fast = sma(close, settings.MA_FAST)
-        ma_slow = sma(close, settings.MA_SLOW)
-        rsi_v = rsi(close, settings.RSI_PERIOD)
-        atr_v = atr(high, low, close, period=14)
+        p = self.params
+        ma_fast, ma_slow, rsi_v, atr_v = self._indicators()
 
         last_price = float(close[-1])
         last_atr = float(atr_v[-1]) if not np.isnan(atr_v[-1]) else 0.0
@@ -50,22 +192,21 @@ class StrategyEngine:
         trend_down = ma_fast[-1] < ma_slow[-1]
 
         # estructura simple con últimos swings (muy básico)
-        recent = df.tail(60).copy()
-        swing_high = float(recent["high"].max())
-        swing_low = float(recent["low"].min())
+        swing_high = float(high[-60:].max())
+        swing_low = float(low[-60:].min())
 
         # ruptura simple (cierre por encima del máximo reciente de N velas)
-        lookback = 15  # Reducido de 20 a 15 para ser más sensible a breakouts
-        prev_high = float(df["high"].tail(lookback).max())
-        prev_low = float(df["low"].tail(lookback).min())
+        lookback = p.lookback
+        prev_high = float(high[-lookback:].max())
+        prev_low = float(low[-lookback:].min())
 
         breakout_up = last_price > prev_high
         breakout_down = last_price < prev_low
 
         # filtros RSI
         last_rsi = float(rsi_v[-1]) if not np.isnan(rsi_v[-1]) else 50.0
-        rsi_ok_long = settings.RSI_MIN <= last_rsi <= settings.RSI_MAX
-        rsi_ok_short = (100 - settings.RSI_MAX) <= last_rsi <= (100 - settings.RSI_MIN)
+        rsi_ok_long = p.rsi_min <= last_rsi <= p.rsi_max
+        rsi_ok_short = (100 - p.rsi_max) <= last_rsi <= (100 - p.rsi_min)
 
         # 📊 LOGS DE ANÁLISIS (solo si verbose=True)
         if self.verbose:
@@ -76,7 +217,7 @@ class StrategyEngine:
             print(f"\n🔍 CONFIRMACIONES:")
             
             # Tendencia
-            print(f"\n1️⃣  TENDENCIA (MA {settings.MA_FAST} vs MA {settings.MA_SLOW}):")
+            print(f"\n1️⃣  TENDENCIA (MA {p.ma_fast} vs MA {p.ma_slow}):")
             print(f"   MA Fast: {ma_fast[-1]:.2f}")
             print(f"   MA Slow: {ma_slow[-1]:.2f}")
             if trend_up:
@@ -101,17 +242,17 @@ class StrategyEngine:
                 print(f"   ❌ Sin breakout (falta {diff_to_high:.2f}% para high, {diff_to_low:.2f}% desde low)")
             
             # RSI
-            print(f"\n3️⃣  RSI (periodo {settings.RSI_PERIOD}):")
+            print(f"\n3️⃣  RSI (periodo {p.rsi_period}):")
             print(f"   RSI actual: {last_rsi:.2f}")
-            print(f"   Rango LONG: {settings.RSI_MIN} - {settings.RSI_MAX}")
-            print(f"   Rango SHORT: {100 - settings.RSI_MAX} - {100 - settings.RSI_MIN}")
+            print(f"   Rango LONG: {p.rsi_min} - {p.rsi_max}")
+            print(f"   Rango SHORT: {100 - p.rsi_max} - {100 - p.rsi_min}")
             if rsi_ok_long:
                 print(f"   ✅ RSI OK para LONG ({last_rsi:.1f} en rango)")
             elif rsi_ok_short:
                 print(f"   ✅ RSI OK para SHORT ({last_rsi:.1f} en rango)")
-            elif last_rsi < settings.RSI_MIN:
-                print(f"   ⚠️  RSI bajo ({last_rsi:.1f} < {settings.RSI_MIN}) - Sobreventa")
-            elif last_rsi > settings.RSI_MAX and last_rsi < (100 - settings.RSI_MAX):
+            elif last_rsi < p.rsi_min:
+                print(f"   ⚠️  RSI bajo ({last_rsi:.1f} < {p.rsi_min}) - Sobreventa")
+            elif last_rsi > p.rsi_max and last_rsi < (100 - p.rsi_max):
                 print(f"   ⚠️  RSI en zona neutral")
             else:
                 print(f"   ⚠️  RSI alto ({last_rsi:.1f}) - Sobrecompra")
@@ -152,15 +293,15 @@ class StrategyEngine:
         # señal long
         if trend_up and breakout_up and rsi_ok_long and last_atr > 0:
             entry = last_price
-            sl = entry - settings.ATR_MULTIPLIER_SL * last_atr
-            tp = entry + settings.RISK_REWARD * (entry - sl)
+            sl = entry - p.atr_multiplier_sl * last_atr
+            tp = entry + p.risk_reward * (entry - sl)
 
             if self.verbose:
                 print("🎯 GENERANDO SEÑAL LONG")
                 print(f"   Entry: ${entry:,.2f}")
                 print(f"   Stop Loss: ${sl:,.2f} (riesgo: ${entry - sl:,.2f})")
                 print(f"   Take Profit: ${tp:,.2f} (reward: ${tp - entry:,.2f})")
-                print(f"   R:R = {settings.RISK_REWARD}:1\n")
+                print(f"   R:R = {p.risk_reward}:1\n")
 
             return {
                 "signal": SignalType.LONG,
@@ -179,15 +320,15 @@ class StrategyEngine:
         # señal short
         if trend_down and breakout_down and rsi_ok_short and last_atr > 0:
             entry = last_price
-            sl = entry + settings.ATR_MULTIPLIER_SL * last_atr
-            tp = entry - settings.RISK_REWARD * (sl - entry)
+            sl = entry + p.atr_multiplier_sl * last_atr
+            tp = entry - p.risk_reward * (sl - entry)
 
             if self.verbose:
                 print("🎯 GENERANDO SEÑAL SHORT")
                 print(f"   Entry: ${entry:,.2f}")
                 print(f"   Stop Loss: ${sl:,.2f} (riesgo: ${sl - entry:,.2f})")
                 print(f"   Take Profit: ${tp:,.2f} (reward: ${entry - tp:,.2f})")
-                print(f"   R:R = {settings.RISK_REWARD}:1\n")
+                print(f"   R:R = {p.risk_reward}:1\n")
 
             return {
                 "signal": SignalType.SHORT,
@@ -207,6 +348,13 @@ class StrategyEngine:
 
 
 class TradeRepository:
+    # Trades por sentencia UPDATE en close_trades
+    CLOSE_BATCH_SIZE = 1000
+
+    def __init__(self, book: TradeBook | None = None) -> None:
+        # Libro en memoria de trades abiertos que se mantiene al crear/cerrar
+        self.book = book if book is not None else trade_book
+
     async def create_trade(
         self,
         session: AsyncSession,
@@ -239,6 +387,7 @@ class TradeRepository:
         session.add(trade)
         await session.commit()
         await session.refresh(trade)
+        self.book.add(OpenTrade.from_model(trade))
         return self._to_dict(trade)
 
     async def list_trades(self, session: AsyncSession, status: str | None = None) -> dict:
@@ -258,13 +407,8 @@ class TradeRepository:
         res = await session.execute(select(Trade).where(Trade.status == TradeStatus.open.value))
         return list(res.scalars().all())
 
-    async def close_trade(
-        self,
-        session: AsyncSession,
-        trade: Trade,
-        close_price: float,
-        result: str,
-    ) -> None:
+    @staticmethod
+    def _close_values(trade: Trade | OpenTrade, close_price: float, result: str) -> dict:
         # PnL simple “1 unidad”
         entry = trade.entry_price
         pnl_abs = (close_price - entry) if trade.side == "long" else (entry - close_price)
@@ -273,20 +417,70 @@ class TradeRepository:
         # fee aproximado: entrada + salida
         fee_paid = trade.fee_rate * (entry + close_price)
 
+        return {
+            "status": TradeStatus.closed.value,
+            "close_price": close_price,
+            "result": result,
+            "pnl_abs": pnl_abs - fee_paid,
+            "pnl_pct": pnl_pct,
+            "fee_paid": fee_paid,
+        }
+
+    async def close_trade(
+        self,
+        session: AsyncSession,
+        trade: Trade | OpenTrade,
+        close_price: float,
+        result: str,
+    ) -> None:
         await session.execute(
             update(Trade)
             .where(Trade.id == trade.id)
             .values(
-                status=TradeStatus.closed.value,
                 closed_at=datetime.now(timezone.utc),
-                close_price=close_price,
-                result=result,
-                pnl_abs=pnl_abs - fee_paid,
-                pnl_pct=pnl_pct,
-                fee_paid=fee_paid,
+                **self._close_values(trade, close_price, result),
             )
         )
         await session.commit()
+        self.book.remove(trade.id)
+
+    async def close_trades(
+        self,
+        session: AsyncSession,
+        hits: list[tuple[Trade | OpenTrade, str, float]],
+    ) -> list[dict]:
+        """
+        Cierra varios trades [(trade, result, close_price)] con UPDATE multi-fila
+        (CASE por id, de a CLOSE_BATCH_SIZE) en una sola transacción. Misma cuenta que close_trade.
+        Devuelve los valores de cierre de cada trade (para las alertas, después del commit).
+        """
+        if not hits:
+            return []
+        rows = {trade.id: self._close_values(trade, close_price, result) for trade, result, close_price in hits}
+        ids = list(rows)
+        closed_at = datetime.now(timezone.utc)
+
+        # Bloques acotados: cada fila aporta ~11 parámetros (asyncpg admite 32767 por sentencia)
+        for start in range(0, len(ids), self.CLOSE_BATCH_SIZE):
+            chunk = ids[start:start + self.CLOSE_BATCH_SIZE]
+            await session.execute(
+                update(Trade)
+                .where(Trade.id.in_(chunk))
+                .values(
+                    status=TradeStatus.closed.value,
+                    closed_at=closed_at,
+                    **{
+                        column: case({trade_id: rows[trade_id][column] for trade_id in chunk}, value=Trade.id)
+                        for column in ("close_price", "result", "pnl_abs", "pnl_pct", "fee_paid")
+                    },
+                )
+                .execution_options(synchronize_session=False)
+            )
+        await session.commit()
+
+        for trade_id in ids:
+            self.book.remove(trade_id)
+        return [{"id": trade.id, **rows[trade.id]} for trade, _, _ in hits]
 
     def _to_dict(self, t: Trade) -> dict:
         return {
@@ -315,17 +509,34 @@ class TradeRepository:
 class TradeManager:
     """
     Loop en tiempo real:
-    - Descarga velas
-    - Evalúa trades abiertos vs SL/TP
+    - Agrupa los trades abiertos por símbolo y toma el precio de cada uno del stream
+      WebSocket si está activo (si no, una sola request batch de ticker para todos)
+    - Evalúa trades abiertos vs SL/TP usando el libro en memoria (solo los niveles cruzados)
+    - Con MONITOR_INTRABAR_ENABLED usa el máximo/mínimo de las velas cerradas y en curso
+      desde el último chequeo: una mecha entre polls también cierra el trade. Las velas
+      solo se piden para los símbolos que el ticker batch muestra cerca de algún nivel
+    - Con MONITOR_ADAPTIVE_ENABLED cada trade tiene su propia cadencia (cola de prioridad):
+      los cercanos a su SL/TP se chequean seguido y los lejanos casi nunca
     - Emite alerta de cierre (win/loss)
     """
 
-    def __init__(self) -> None:
+    def __init__(self, stream: MarketStreamService | None = None) -> None:
         self._task: asyncio.Task | None = None
         self._running = False
+        self.stream = stream
         self.market = MarketService()
         self.alerts = AlertService()
-        self.repo = TradeRepository()
+        self.book = trade_book
+        self.repo = TradeRepository(self.book)
+        # open_time de la última vela revisada por símbolo (se vuelve a pedir: sigue en curso)
+        self._checked_from: dict[str, int] = {}
+        # Avance del tick en curso: se confirma recién cuando los cierres quedaron en la base
+        self._checked_pending: dict[str, int] = {}
+        # Mínimo/máximo de los precios de ticker vistos desde el último chequeo por velas
+        self._seen_range: dict[str, tuple[float, float]] = {}
+        # Próximo chequeo por trade según su distancia al SL/TP (MONITOR_ADAPTIVE_ENABLED)
+        self.scheduler = CheckScheduler()
+        self._atrs: dict[tuple[str, str], tuple[float | None, float]] = {}
 
     async def start(self) -> None:
         self._running = True
@@ -340,20 +551,20 @@ class TradeManager:
     async def _loop(self) -> None:
         while self._running:
             try:
-                df = await self.market.get_klines_df(
-                    symbol=settings.SYMBOL,
-                    timeframe=settings.TIMEFRAME,
-                    limit=settings.CANDLES_LIMIT,
-                )
-                now_price = float(df["close"].iloc[-1])
-
-                async with AsyncSessionLocal() as session:
-                    open_trades = await self.repo.get_open_trades(session)
-                    for t in open_trades:
-                        hit = self._check_hit(t, now_price)
-                        if hit:
-                            result, close_price = hit
-                            await self.repo.close_trade(session, t, close_price=close_price, result=result)
+                if self._book_stale():
+                    await self._load_book()
+
+                # Solo se consultan los símbolos con algún trade cuyo chequeo venció
+                symbols = self._due_symbols()
+                hits, prices = await self._check_symbols(symbols) if symbols else ([], {})
+
+                if hits:
+                    # Un solo UPDATE y un solo commit para todos los trades tocados;
+                    # las alertas salen después de confirmar el cierre en la base
+                    async with AsyncSessionLocal() as session:
+                        await self.repo.close_trades(session, hits)
+                    for t, result, close_price in hits:
+                        try:
                             await self.alerts.send_close_alert({
                                 "trade_id": t.id,
                                 "symbol": t.symbol,
@@ -365,21 +576,217 @@ class TradeManager:
                                 "sl": t.stop_loss,
                                 "tp": t.take_profit
                             })
+                        except Exception as e:
+                            # El trade ya quedó cerrado: una alerta fallida no frena las demás
+                            print(f"[TradeManager] error enviando alerta del trade {t.id}: {e}")
+                self._commit_checked()
+
+                if symbols and settings.MONITOR_ADAPTIVE_ENABLED:
+                    await self._reschedule(symbols, prices)
 
             except Exception as e:
                 print(f"[TradeManager] error: {e}")
 
-            await asyncio.sleep(settings.POLL_SECONDS)
-
-    def _check_hit(self, t: Trade, price: float):
-        if t.side == "long":
-            if price <= t.stop_loss:
-                return (TradeResult.loss.value, price)
-            if price >= t.take_profit:
-                return (TradeResult.win.value, price)
+            timeout = self._next_wait()
+            if self.stream is not None and self.stream.connected:
+                # Con stream: reaccionar a cada precio nuevo (con un mínimo entre chequeos)
+                await self.stream.wait_price_update(timeout=timeout)
+                await asyncio.sleep(settings.STREAM_MONITOR_SECONDS)
+            else:
+                await asyncio.sleep(timeout)
+
+    def _due_symbols(self) -> list[str]:
+        """Símbolos a consultar en este tick: todos, o con MONITOR_ADAPTIVE_ENABLED los que tienen algún trade vencido"""
+        if not settings.MONITOR_ADAPTIVE_ENABLED:
+            return self.book.symbols()
+        now = time.monotonic()
+        self.scheduler.sync(self.book.ids(), now)
+        due = self.scheduler.pop_due(now)
+        return sorted({self.book.get(trade_id).symbol for trade_id in due})
+
+    async def _check_symbols(self, symbols: list[str]) -> tuple[list[tuple[OpenTrade, str, float]], dict[str, float]]:
+        """(trades tocados, último precio por símbolo). Cada trade contra el precio de su propio símbolo"""
+        if settings.MONITOR_INTRABAR_ENABLED:
+            return await self._intrabar_hits(symbols)
+        prices = await self._current_prices(symbols)
+        hits = [
+            hit
+            for symbol, price in prices.items()
+            for hit in self.book.hits(symbol, price)
+        ]
+        return hits, prices
+
+    async def _reschedule(self, symbols: list[str], prices: dict[str, float]) -> None:
+        """
+        Próximo chequeo de cada trade abierto de los símbolos consultados según su distancia
+        al SL/TP más cercano en ATRs: cerca del nivel se vuelve a mirar enseguida, lejos cada
+        MONITOR_MAX_INTERVAL_SECONDS. Con el monitor por rango no se pierden mechas entre chequeos.
+        """
+        trades = [t for symbol in symbols for t in self.book.trades(symbol)]
+        pairs = sorted({(t.symbol, t.timeframe) for t in trades})
+        atrs = dict(zip(pairs, await asyncio.gather(*(self._atr(symbol, tf) for symbol, tf in pairs))))
+
+        now = time.monotonic()
+        for t in trades:
+            price = prices.get(t.symbol)
+            atr_value = atrs[(t.symbol, t.timeframe)]
+            distance = None
+            if price is not None and atr_value:
+                distance = min(abs(price - t.stop_loss), abs(t.take_profit - price)) / atr_value
+            self.scheduler.schedule(t.id, now + check_interval(
+                distance,
+                settings.MONITOR_MIN_INTERVAL_SECONDS,
+                settings.MONITOR_MAX_INTERVAL_SECONDS,
+                settings.MONITOR_FAR_ATR,
+            ))
+
+    async def _atr(self, symbol: str, timeframe: str) -> float | None:
+        """ATR actual del timeframe del trade (se recalcula cada MONITOR_ATR_REFRESH_SECONDS)"""
+        key = (symbol, timeframe)
+        cached = self._atrs.get(key)
+        if cached is not None and time.monotonic() - cached[1] < settings.MONITOR_ATR_REFRESH_SECONDS:
+            return cached[0]
+        try:
+            candles = await self.market.get_candles(symbol=symbol, timeframe=timeframe, limit=100)
+            value = float(atr(candles.high, candles.low, candles.close, period=StrategyParams.atr_period)[-1])
+            value = value if np.isfinite(value) and value > 0 else None
+        except Exception as e:
+            print(f"[TradeManager] sin ATR de {symbol} {timeframe}: {e}")
+            value = None
+        self._atrs[key] = (value, time.monotonic())
+        return value
+
+    def _next_wait(self) -> float:
+        """Hasta el próximo chequeo programado, sin pasar de POLL_SECONDS (así se ven los trades nuevos)"""
+        timeout = settings.POLL_SECONDS
+        if settings.MONITOR_ADAPTIVE_ENABLED:
+            next_due = self.scheduler.next_due()
+            if next_due is not None:
+                timeout = min(timeout, next_due - time.monotonic())
+            # Piso: si un tick falla antes de reprogramar, los trades vuelven como nuevos
+            timeout = max(timeout, min(settings.MONITOR_MIN_INTERVAL_SECONDS, settings.POLL_SECONDS))
+        return timeout
+
+    def _book_stale(self) -> bool:
+        if not self.book.loaded:
+            return True
+        resync = settings.TRADE_BOOK_RESYNC_SECONDS
+        return bool(resync) and time.monotonic() - self.book.loaded_at >= resync
+
+    async def _load_book(self) -> None:
+        """Carga (o resincroniza) el libro desde la base: una sola consulta"""
+        self.book.begin_load()
+        async with AsyncSessionLocal() as session:
+            open_trades = await self.repo.get_open_trades(session)
+        self.book.load(open_trades)
+        print(f"📒 TradeBook: {len(self.book)} trades abiertos en {len(self.book.symbols())} símbolos")
+
+    async def _current_prices(self, symbols: list[str]) -> dict[str, float]:
+        """
+        Precio actual de cada símbolo con trades abiertos: del stream si está fresco,
+        el resto en una sola request batch a /api/v3/ticker/price
+        """
+        prices: dict[str, float] = {}
+        missing = []
+        for symbol in symbols:
+            price = self.stream.last_price(symbol) if self.stream is not None else None
+            if price is not None:
+                prices[symbol] = price
+            else:
+                missing.append(symbol)
+
+        if missing:
+            prices.update(await self.market.get_prices(missing))
+        return prices
+
+    async def _intrabar_hits(self, symbols: list[str]) -> tuple[list[tuple[OpenTrade, str, float]], dict[str, float]]:
+        """
+        Trades cuyo SL/TP tocó el rango operado desde el último chequeo de su símbolo.
+        Primero una sola request batch de ticker; las velas se piden solo para los símbolos
+        que pueden haber tocado un nivel (ver _needs_bars).
+        """
+        now_ms = int(time.time() * 1000)
+        prices = await self._current_prices(symbols)
+        flags = await asyncio.gather(*(self._needs_bars(symbol, prices.get(symbol)) for symbol in symbols))
+        symbols = [symbol for symbol, needed in zip(symbols, flags) if needed]
+
+        results = await asyncio.gather(*(self._bars_since_check(symbol) for symbol in symbols), return_exceptions=True)
+        hits = []
+        checked = {}
+        for symbol, bars in zip(symbols, results):
+            if isinstance(bars, Exception):
+                print(f"[TradeManager] sin velas de {symbol}: {bars}")
+                continue
+            if len(bars["open_time"]) == 0:
+                continue
+            # El último close se agrega como punto "ahora": los trades abiertos en la vela
+            # en curso (cuyas velas se ignoran) se chequean al menos contra el precio actual
+            last = bars["close"][-1]
+            prices[symbol] = float(last)
+            hits.extend(self.book.range_hits(
+                symbol,
+                np.append(bars["open_time"], now_ms),
+                np.append(bars["open"], last),
+                np.append(bars["high"], last),
+                np.append(bars["low"], last),
+            ))
+            checked[symbol] = int(bars["open_time"][-1])
+        self._checked_pending = checked
+        return hits, prices
+
+    def _commit_checked(self) -> None:
+        """
+        Avanza el último chequeo por símbolo una vez cerrados (en la base) los trades tocados:
+        si el cierre falla se vuelve a revisar el mismo rango y la mecha no se pierde
+        """
+        self._checked_from.update(self._checked_pending)
+        for symbol in self._checked_pending:
+            self._seen_range.pop(symbol, None)
+        self._checked_pending = {}
+        for symbol in set(self._seen_range) - set(self.book.symbols()):
+            del self._seen_range[symbol]
+        for symbol in set(self._checked_from) - set(self.book.symbols()):
+            del self._checked_from[symbol]
+
+    async def _needs_bars(self, symbol: str, price: float | None) -> bool:
+        """
+        Si hay que pedir velas de `symbol`: siempre en su primer chequeo, sin precio o sin ATR;
+        si no, solo si algún SL/TP cae dentro del rango de precios visto desde el último
+        chequeo ampliado MONITOR_INTRABAR_SCREEN_ATR ATRs (el mayor de sus timeframes).
+        Si no se piden, el último chequeo no avanza: esas velas se revisan más adelante.
+        """
+        screen = settings.MONITOR_INTRABAR_SCREEN_ATR
+        if price is None or screen <= 0 or symbol not in self._checked_from:
+            return True
+        low, high = self._seen_range.get(symbol, (price, price))
+        low, high = min(low, price), max(high, price)
+        self._seen_range[symbol] = (low, high)
+
+        timeframes = {t.timeframe for t in self.book.trades(symbol)}
+        atrs = await asyncio.gather(*(self._atr(symbol, tf) for tf in timeframes))
+        if not atrs or any(value is None for value in atrs):
+            return True
+        band = screen * max(atrs)
+        return self.book.levels_between(symbol, low - band, high + band)
+
+    async def _bars_since_check(self, symbol: str) -> dict[str, np.ndarray]:
+        """
+        Velas de MONITOR_INTRABAR_TIMEFRAME desde el último chequeo (o desde la apertura del
+        trade más viejo, acotado a MONITOR_INTRABAR_MAX_BARS). Del buffer del stream si lo
+        cubre; si no, REST pidiendo solo las velas que faltan.
+        """
+        timeframe = settings.MONITOR_INTRABAR_TIMEFRAME
+        tf_ms = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000)
+        start = self._checked_from.get(symbol)
+        if start is None:
+            start = min(t.opened_at_ms for t in self.book.trades(symbol)) // tf_ms * tf_ms
+        start = max(start, now_ms // tf_ms * tf_ms - (settings.MONITOR_INTRABAR_MAX_BARS - 1) * tf_ms)
+
+        candles = self.stream.get_candles(symbol, timeframe) if self.stream is not None else None
+        if candles is not None and len(candles) and candles.open_time[0] <= start:
+            columns = candles.to_columns()
         else:
-            if price >= t.stop_loss:
-                return (TradeResult.loss.value, price)
-            if price <= t.take_profit:
-                return (TradeResult.win.value, price)
-        return None
+            columns = await self.market.get_klines_since(symbol, timeframe, start)
+        keep = columns["open_time"] >= start
+        return {k: v[keep] for k, v in columns.items()}
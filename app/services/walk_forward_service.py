@@ -0,0 +1,341 @@
+"""
+Walk-Forward Service
+Optimiza en ventanas de entrenamiento móviles y evalúa fuera de muestra en la ventana siguiente
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.backtest_service import BacktestConfig, BacktestService, backtest_candles, summarize, warmup_bars
+from app.services.optimizer_service import (
+    check_objectives,
+    grid_combinations,
+    optimize_candles,
+    random_combinations,
+    rank,
+    valid_params,
+)
+from app.services.trade_manager import StrategyParams
+from app.util.candles import CandleSeries
+from app.util.shared_candles import SharedCandles
+
+# Estado de cada proceso worker (se llena en _init_worker)
+_worker: dict = {}
+
+
+@dataclass(frozen=True)
+class Fold:
+    index: int
+    train_start: int
+    train_end: int  # exclusivo
+    test_start: int
+    test_end: int  # exclusivo
+
+
+def make_folds(
+    n_bars: int,
+    train_bars: int,
+    test_bars: int,
+    step_bars: int | None = None,
+    anchored: bool = False,
+    first_bar: int = 0,
+) -> list[Fold]:
+    """
+    Ventanas [train | test] que avanzan step_bars (por defecto test_bars, sin solapar los tests).
+    anchored=True mantiene el inicio del train fijo (ventana creciente).
+    """
+    step_bars = step_bars or test_bars
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("train_bars y test_bars deben ser positivos")
+    if step_bars < test_bars:
+        raise ValueError("step_bars < test_bars: las ventanas de test se solaparían")
+
+    folds = []
+    start = first_bar
+    while start + train_bars + test_bars <= n_bars:
+        train_start = first_bar if anchored else start
+        test_start = start + train_bars
+        folds.append(Fold(len(folds), train_start, test_start, test_start, test_start + test_bars))
+        start += step_bars
+    if not folds:
+        raise ValueError(f"No alcanzan las velas ({n_bars - first_bar}) para una ventana train+test")
+    return folds
+
+
+def _window(candles: CandleSeries, start: int, end: int, warmup: int) -> tuple[CandleSeries, int]:
+    """Vista [start - warmup, end) y el índice donde empieza la ventana evaluada"""
+    begin = max(0, start - warmup)
+    columns = {column: values[begin:end] for column, values in candles.to_columns().items()}
+    return CandleSeries.from_columns(columns), start - begin
+
+
+def run_fold(
+    candles: CandleSeries,
+    fold: Fold,
+    timeframe: str,
+    combos: list[dict],
+    base_params: StrategyParams,
+    config: BacktestConfig,
+    objectives: list[str],
+    min_trades: int,
+    symbol: str,
+) -> dict:
+    """Optimiza en el train del fold (en serie) y evalúa la mejor combinación en el test"""
+    warmup = max(warmup_bars(replace(base_params, **combo)) for combo in combos)
+    started = time.perf_counter()
+
+    train, train_offset = _window(candles, fold.train_start, fold.train_end, warmup)
+    results = optimize_candles(
+        train, timeframe, combos,
+        start_index=train_offset, config=config, base_params=base_params, workers=1, symbol=symbol,
+    )
+    ranked = rank(results, objectives, min_trades)
+
+    report = {
+        "fold": fold.index,
+        "train": {"start": int(candles.open_time[fold.train_start]), "end": int(candles.open_time[fold.train_end - 1]),
+                  "bars": fold.train_end - fold.train_start},
+        "test": {"start": int(candles.open_time[fold.test_start]), "end": int(candles.open_time[fold.test_end - 1]),
+                 "bars": fold.test_end - fold.test_start},
+        "evaluated": len(results),
+        "params": None,
+        "train_stats": None,
+        "test_stats": None,
+        "test_trades": [],
+        "test_equity": [1.0] * (fold.test_end - fold.test_start),
+    }
+    if ranked:
+        best = ranked[0]
+        params = StrategyParams(**best["params"])
+        test, test_offset = _window(candles, fold.test_start, fold.test_end, warmup_bars(params))
+        result = backtest_candles(test, timeframe, params, config, start_index=test_offset)
+        report.update(
+            params=best["params"],
+            train_stats=best["stats"],
+            test_stats=result.stats,
+            test_trades=result.trade_list(),
+            test_equity=np.round(result.equity, 8).tolist(),
+        )
+    else:
+        # Sin combinaciones con suficientes trades: el fold queda fuera del mercado
+        report["note"] = "Sin combinaciones elegibles en el train (min_trades)"
+    report["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _init_worker(handle, timeframe, combos, base_params, config, objectives, min_trades, symbol):
+    shm, candles = SharedCandles.attach(handle)
+    _worker.update(
+        shm=shm,
+        candles=candles,
+        args=(timeframe, combos, base_params, config, objectives, min_trades, symbol),
+    )
+
+
+def _run_fold_in_worker(fold: Fold) -> dict:
+    timeframe, combos, base_params, config, objectives, min_trades, symbol = _worker["args"]
+    return run_fold(_worker["candles"], fold, timeframe, combos, base_params, config, objectives, min_trades, symbol)
+
+
+def stitch(folds: list[dict], timeframe: str) -> dict:
+    """
+    Une los tests de todos los folds en orden: equity encadenada (cada fold arranca
+    donde terminó el anterior) y métricas sobre todos los trades fuera de muestra
+    """
+    folds = sorted(folds, key=lambda f: f["fold"])
+    equity_parts = []
+    capital = 1.0
+    for fold in folds:
+        part = np.asarray(fold["test_equity"], dtype=float) * capital
+        equity_parts.append(part)
+        if len(part):
+            capital = float(part[-1])
+    equity = np.concatenate(equity_parts) if equity_parts else np.ones(0)
+
+    trades = [t for fold in folds for t in fold["test_trades"]]
+    arrays = {
+        # summarize solo usa la diferencia exit - entry (velas en posición)
+        "entry_index": np.zeros(len(trades), dtype=np.int64),
+        "exit_index": np.array([t["bars_held"] for t in trades], dtype=np.int64),
+        "entry_price": np.array([t["entry_price"] for t in trades], dtype=float),
+        "stop_loss": np.array([t["stop_loss"] for t in trades], dtype=float),
+        "pnl_abs": np.array([t["pnl_abs"] for t in trades], dtype=float),
+        "fee_paid": np.array([t["fee_paid"] for t in trades], dtype=float),
+        "win": np.array([t["result"] == "win" for t in trades], dtype=bool),
+        "side": np.array([1 if t["side"] == "long" else -1 for t in trades], dtype=np.int8),
+    }
+    stats = summarize(arrays, equity, timeframe, len(equity))
+    stats["folds"] = len(folds)
+    stats["folds_traded"] = sum(1 for f in folds if f["params"] is not None)
+    return {"stats": stats, "equity": equity}
+
+
+class WalkForwardService:
+    """
+    Walk-forward sobre el almacén local de velas:
+    - Los folds corren en paralelo en un pool de procesos (velas en memoria compartida)
+    - Cada fold terminado se guarda en un checkpoint JSON; al repetir la misma corrida
+      se retoman los folds ya calculados
+    - El rango de datos se fija en la primera corrida (start/end sin indicar se resuelven
+      a las velas almacenadas en ese momento): aunque el almacén siga creciendo, la misma
+      corrida vuelve a usar las mismas velas y los mismos folds
+    """
+
+    def __init__(self, backtests: BacktestService | None = None, checkpoint_dir: str | None = None):
+        self.backtests = backtests or BacktestService()
+        self.checkpoint_dir = Path(checkpoint_dir or settings.WALK_FORWARD_DIR)
+
+    @staticmethod
+    def _folds_key(candles: CandleSeries, folds: list[Fold]) -> str:
+        """Hash de los límites de cada fold por open_time (cambia si cambian los datos o los folds)"""
+        bounds = [
+            [int(candles.open_time[i]) for i in (f.train_start, f.train_end - 1, f.test_start, f.test_end - 1)]
+            for f in folds
+        ]
+        return hashlib.sha1(json.dumps(bounds).encode()).hexdigest()[:16]
+
+    def _checkpoint_path(self, run_config: dict) -> tuple[str, Path]:
+        run_id = hashlib.sha1(json.dumps(run_config, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return run_id, self.checkpoint_dir / f"{run_id}.json"
+
+    @staticmethod
+    def _save(path: Path, run_id: str, run_config: dict, folds: dict[int, dict]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "run_id": run_id,
+            "config": run_config,
+            "folds": [folds[i] for i in sorted(folds)],
+        }, default=str))
+        os.replace(tmp, path)
+
+    def run(
+        self,
+        symbol: str,
+        timeframe: str,
+        space: dict,
+        train_bars: int,
+        test_bars: int,
+        step_bars: int | None = None,
+        anchored: bool = False,
+        method: str = "grid",
+        samples: int = 200,
+        seed: int | None = 0,
+        objectives: list[str] | None = None,
+        min_trades: int = 10,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        config: BacktestConfig | None = None,
+        workers: int | None = None,
+        resume: bool = True,
+    ) -> dict:
+        objectives = objectives or ["sharpe"]
+        check_objectives(objectives)
+        config = config or BacktestConfig.from_settings()
+        base_params = StrategyParams.from_settings()
+
+        if method == "grid":
+            combos = grid_combinations(space)
+        elif method == "random":
+            combos = random_combinations(space, samples, seed)
+        else:
+            raise ValueError("method debe ser 'grid' o 'random'")
+        combos = [c for c in combos if valid_params(replace(base_params, **c))]
+        if not combos:
+            raise ValueError("No hay combinaciones válidas (ma_fast < ma_slow, rsi_min < rsi_max)")
+
+        # El id sale de lo pedido (start/end pueden ser None); el rango resuelto se guarda aparte
+        run_config = {
+            "symbol": symbol, "timeframe": timeframe, "space": space, "method": method,
+            "samples": samples, "seed": seed, "objectives": objectives, "min_trades": min_trades,
+            "train_bars": train_bars, "test_bars": test_bars, "step_bars": step_bars, "anchored": anchored,
+            "start_ms": start_ms, "end_ms": end_ms,
+            "base_params": asdict(base_params), "backtest": asdict(config),
+        }
+        run_id, path = self._checkpoint_path(run_config)
+
+        checkpoint = json.loads(path.read_text()) if resume and path.exists() else None
+        if checkpoint is not None:
+            start_ms, end_ms = checkpoint["config"]["data_start_ms"], checkpoint["config"]["data_end_ms"]
+
+        warmup = max(warmup_bars(replace(base_params, **combo)) for combo in combos)
+        candles, first_bar = self.backtests.load_candles(symbol, timeframe, start_ms, end_ms, warmup=warmup)
+        folds = make_folds(len(candles), train_bars, test_bars, step_bars, anchored, first_bar=first_bar)
+        run_config.update(
+            data_start_ms=int(candles.open_time[first_bar]),
+            data_end_ms=int(candles.open_time[-1]),
+            folds_key=self._folds_key(candles, folds),
+        )
+
+        done: dict[int, dict] = {}
+        if checkpoint is not None:
+            if checkpoint["config"].get("folds_key") == run_config["folds_key"]:
+                done = {f["fold"]: f for f in checkpoint["folds"]}
+            else:
+                print(f"⚠️  Walk-forward {run_id}: las velas del rango cambiaron, se recalculan todos los folds")
+        resumed = len(done)
+        pending = [fold for fold in folds if fold.index not in done]
+
+        started = time.perf_counter()
+        workers = workers or settings.OPTIMIZER_WORKERS or os.cpu_count() or 1
+        workers = min(workers, max(1, len(pending)))
+        args = (timeframe, combos, base_params, config, objectives, min_trades, symbol)
+
+        if pending and (workers <= 1 or multiprocessing.current_process().daemon):
+            for fold in pending:
+                done[fold.index] = run_fold(candles, fold, *args)
+                self._save(path, run_id, run_config, done)
+                print(f"📈 Walk-forward {run_id}: fold {fold.index + 1}/{len(folds)} listo")
+        elif pending:
+            with SharedCandles(candles) as shared:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(shared.handle, *args),
+                ) as pool:
+                    futures = [pool.submit(_run_fold_in_worker, fold) for fold in pending]
+                    for future in as_completed(futures):
+                        report = future.result()
+                        done[report["fold"]] = report
+                        self._save(path, run_id, run_config, done)
+                        print(f"📈 Walk-forward {run_id}: fold {report['fold'] + 1}/{len(folds)} listo")
+
+        oos = stitch(list(done.values()), timeframe)
+        equity = oos["equity"]
+        step = max(1, len(equity) // 2000)
+        test_times = np.concatenate([
+            candles.open_time[fold.test_start:fold.test_end] for fold in folds
+        ])
+
+        return {
+            "run_id": run_id,
+            "checkpoint": str(path),
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "folds_total": len(folds),
+            "folds_resumed": resumed,
+            "combinations": len(combos),
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "folds": [
+                {k: v for k, v in done[i].items() if k not in ("test_trades", "test_equity")}
+                for i in sorted(done)
+            ],
+            "out_of_sample": {
+                "stats": oos["stats"],
+                "trades": [t for i in sorted(done) for t in done[i]["test_trades"]],
+                "equity_curve": {
+                    "open_time": test_times[::step].tolist(),
+                    "equity": np.round(equity[::step], 6).tolist(),
+                },
+            },
+        }
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+from app.util.klines import KLINE_COLUMNS, columns_to_df
+
+
+class CandleSeries:
+    """
+    Serie de velas liviana respaldada por arrays numpy contiguos (uno por columna):
+    - open_time / close_time en ms (int64), OHLCV en float64
+    - window(n) devuelve una vista de las últimas n velas sin copiar
+    - append() agrega (o actualiza la vela en curso) en O(1) amortizado: los buffers
+      crecen al doble cuando se llenan
+    - Las vistas son de solo lectura; si se les agrega una vela se copian primero
+    """
+
+    __slots__ = ("_cols", "_n")
+
+    def __init__(self, columns: dict[str, np.ndarray] | None = None, capacity: int | None = None):
+        n = len(columns["open_time"]) if columns is not None else 0
+        capacity = max(capacity or 0, n)
+        self._cols = {column: np.empty(capacity, dtype=dtype) for column, dtype in KLINE_COLUMNS.items()}
+        if columns is not None:
+            for column in KLINE_COLUMNS:
+                self._cols[column][:n] = columns[column]
+        self._n = n
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> "CandleSeries":
+        """Envuelve columnas existentes sin copiar (si ya tienen el dtype correcto)"""
+        series = cls.__new__(cls)
+        series._cols = {
+            column: np.ascontiguousarray(columns[column], dtype=dtype)
+            for column, dtype in KLINE_COLUMNS.items()
+        }
+        series._n = len(series._cols["open_time"])
+        return series
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "CandleSeries":
+        columns = {}
+        for column, dtype in KLINE_COLUMNS.items():
+            values = df[column].values
+            if np.issubdtype(values.dtype, np.datetime64):
+                values = values.astype("datetime64[ms]").astype(np.int64)
+            columns[column] = values
+        return cls.from_columns(columns)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _column(self, column: str) -> np.ndarray:
+        return self._cols[column][:self._n]
+
+    @property
+    def open_time(self) -> np.ndarray:
+        return self._column("open_time")
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._column("open")
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._column("high")
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._column("low")
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._column("close")
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._column("volume")
+
+    @property
+    def close_time(self) -> np.ndarray:
+        return self._column("close_time")
+
+    @property
+    def last_close(self) -> float | None:
+        return float(self._cols["close"][self._n - 1]) if self._n else None
+
+    def window(self, n: int) -> "CandleSeries":
+        """Vista (sin copia, solo lectura) de las últimas n velas"""
+        start = max(0, self._n - n)
+        view = CandleSeries.__new__(CandleSeries)
+        view._cols = {}
+        for column, values in self._cols.items():
+            sliced = values[start:self._n]
+            sliced.flags.writeable = False
+            view._cols[column] = sliced
+        view._n = self._n - start
+        return view
+
+    def _ensure_writable(self, capacity: int) -> None:
+        current = len(self._cols["open_time"])
+        writable = self._cols["open_time"].flags.writeable
+        if capacity <= current and writable:
+            return
+        new_capacity = max(capacity, current * 2 if capacity > current else current, 16)
+        for column, values in self._cols.items():
+            grown = np.empty(new_capacity, dtype=values.dtype)
+            grown[:self._n] = values[:self._n]
+            self._cols[column] = grown
+
+    def append(self, candle: dict) -> None:
+        """
+        Agrega una vela (dict con las columnas de KLINE_COLUMNS, tiempos en ms).
+        Si tiene el mismo open_time que la última, la reemplaza (vela en curso).
+        """
+        if self._n and candle["open_time"] == self._cols["open_time"][self._n - 1]:
+            self._ensure_writable(self._n)
+            index = self._n - 1
+        elif self._n and candle["open_time"] < self._cols["open_time"][self._n - 1]:
+            raise ValueError("La vela es anterior a la última de la serie")
+        else:
+            self._ensure_writable(self._n + 1)
+            index = self._n
+            self._n += 1
+
+        for column in KLINE_COLUMNS:
+            self._cols[column][index] = candle[column]
+
+    def extend(self, columns: dict[str, np.ndarray]) -> None:
+        """Agrega un bloque de velas posteriores a la última"""
+        n = len(columns["open_time"])
+        if n == 0:
+            return
+        if self._n and columns["open_time"][0] <= self._cols["open_time"][self._n - 1]:
+            raise ValueError("El bloque se solapa con la serie")
+        self._ensure_writable(self._n + n)
+        for column in KLINE_COLUMNS:
+            self._cols[column][self._n:self._n + n] = columns[column]
+        self._n += n
+
+    def to_columns(self) -> dict[str, np.ndarray]:
+        """Vistas (sin copia) de cada columna"""
+        return {column: self._column(column) for column in KLINE_COLUMNS}
+
+    def to_df(self) -> pd.DataFrame:
+        return columns_to_df({column: values.copy() for column, values in self.to_columns().items()})
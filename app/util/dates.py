@@ -0,0 +1,9 @@
+from datetime import datetime, timezone
+
+
+def iso_to_ms(value: str) -> int:
+    """ISO 8601 (fecha o fecha-hora) a epoch ms; sin zona horaria se asume UTC"""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
@@ -0,0 +1,236 @@
+"""
+Indicadores incrementales (streaming)
+Versiones con estado de sma/rsi/atr y máximos/mínimos móviles de app/util/math.py:
+cada vela nueva (update) o revisión de la vela en curso (revise) cuesta O(1)
+(amortizado en los máximos/mínimos móviles),
+sin recorrer el histórico. Los valores coinciden con las funciones batch
+(NaN mientras no hay suficientes velas).
+"""
+
+import copy
+import math
+from collections import deque
+
+NAN = float("nan")
+
+
+class _Incremental:
+    """
+    Base común:
+    - update(...) agrega una vela nueva
+    - revise(...) reemplaza la última vela (vela en curso que cambió)
+    - snapshot()/restore() para persistir o clonar el estado
+
+    Para revisar se guarda el estado previo a la última vela (solo lo que cambia).
+    """
+
+    def snapshot(self) -> dict:
+        return copy.deepcopy(self.__dict__)
+
+    def restore(self, state: dict) -> None:
+        self.__dict__.update(copy.deepcopy(state))
+
+    @classmethod
+    def from_snapshot(cls, state: dict):
+        obj = cls.__new__(cls)
+        obj.restore(state)
+        return obj
+
+
+class IncrementalSMA(_Incremental):
+    # Cada cuántas velas se recalcula la suma exacta (evita deriva de punto flotante)
+    RESUM_EVERY = 1024
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window: deque = deque()
+        self._sum = 0.0
+        self._since_resum = 0
+
+    @property
+    def value(self) -> float:
+        if self.period <= 0 or len(self._window) < self.period:
+            return NAN
+        return self._sum / self.period
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        self._window.append(value)
+        self._sum += value
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+
+        self._since_resum += 1
+        if self._since_resum >= self.RESUM_EVERY:
+            self._sum = math.fsum(self._window)
+            self._since_resum = 0
+        return self.value
+
+    def revise(self, value: float) -> float:
+        if not self._window:
+            return self.update(value)
+        value = float(value)
+        self._sum += value - self._window[-1]
+        self._window[-1] = value
+        return self.value
+
+
+class IncrementalRSI(_Incremental):
+    """RSI con suavizado de Wilder (mismo arranque que app.util.math.rsi)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._count = 0  # velas procesadas
+        self._prev_close: float | None = None
+        self._avg_gain = NAN
+        self._avg_loss = NAN
+        self._sum_gain = 0.0  # acumulados durante el arranque
+        self._sum_loss = 0.0
+        self._last: tuple | None = None  # estado antes de la última vela
+
+    @property
+    def value(self) -> float:
+        if math.isnan(self._avg_gain):
+            return NAN
+        rs = self._avg_gain / (self._avg_loss + 1e-12)
+        return 100 - (100 / (1 + rs))
+
+    def _state(self) -> tuple:
+        return (self._count, self._prev_close, self._avg_gain, self._avg_loss, self._sum_gain, self._sum_loss)
+
+    def update(self, close: float) -> float:
+        self._last = self._state()
+        close = float(close)
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        p = self.period
+
+        if self._count == 0:
+            pass  # primera vela: delta 0, no suma al arranque
+        elif self._count < p:
+            self._sum_gain += gain
+            self._sum_loss += loss
+        elif self._count == p:
+            self._avg_gain = (self._sum_gain + gain) / p
+            self._avg_loss = (self._sum_loss + loss) / p
+        else:
+            self._avg_gain = (self._avg_gain * (p - 1) + gain) / p
+            self._avg_loss = (self._avg_loss * (p - 1) + loss) / p
+
+        self._prev_close = close
+        self._count += 1
+        return self.value
+
+    def revise(self, close: float) -> float:
+        if self._last is None:
+            return self.update(close)
+        (self._count, self._prev_close, self._avg_gain, self._avg_loss,
+         self._sum_gain, self._sum_loss) = self._last
+        return self.update(close)
+
+
+class IncrementalATR(_Incremental):
+    """ATR con suavizado de Wilder (mismo arranque que app.util.math.atr)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._count = 0
+        self._prev_close: float | None = None
+        self._atr = NAN
+        self._sum_tr = 0.0
+        self._last: tuple | None = None
+
+    @property
+    def value(self) -> float:
+        return self._atr
+
+    def _state(self) -> tuple:
+        return (self._count, self._prev_close, self._atr, self._sum_tr)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self._last = self._state()
+        high, low, close = float(high), float(low), float(close)
+        prev_close = close if self._prev_close is None else self._prev_close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        p = self.period
+
+        if self._count == 0:
+            pass  # el TR de la primera vela no entra en el promedio inicial
+        elif self._count < p:
+            self._sum_tr += tr
+        elif self._count == p:
+            self._atr = (self._sum_tr + tr) / p
+        else:
+            self._atr = (self._atr * (p - 1) + tr) / p
+
+        self._prev_close = close
+        self._count += 1
+        return self.value
+
+    def revise(self, high: float, low: float, close: float) -> float:
+        if self._last is None:
+            return self.update(high, low, close)
+        self._count, self._prev_close, self._atr, self._sum_tr = self._last
+        return self.update(high, low, close)
+
+
+class RollingExtreme(_Incremental):
+    """
+    Máximo (o mínimo) de las últimas `window` velas con deque monotónica:
+    O(1) amortizado por vela. revise() deshace solo lo que desplazó la última vela.
+    """
+
+    def __init__(self, window: int, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError("mode debe ser 'max' o 'min'")
+        self.window = window
+        self.mode = mode
+        self._index = -1
+        self._deque: deque = deque()  # (índice, valor), monotónica
+        self._displaced: list = []  # elementos que sacó la última vela
+        self._expired: tuple | None = None  # elemento que venció con la última vela
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new >= old if self.mode == "max" else new <= old
+
+    @property
+    def value(self) -> float:
+        if not self._deque:
+            return NAN
+        return self._deque[0][1]
+
+    def update(self, value: float) -> float:
+        value = float(value)
+        self._index += 1
+        self._displaced = []
+        while self._deque and self._dominates(value, self._deque[-1][1]):
+            self._displaced.append(self._deque.pop())
+        self._deque.append((self._index, value))
+
+        self._expired = None
+        if self._deque[0][0] <= self._index - self.window:
+            self._expired = self._deque.popleft()
+        return self.value
+
+    def revise(self, value: float) -> float:
+        if self._index < 0:
+            return self.update(value)
+        # deshacer la última vela y volver a aplicarla con el valor nuevo
+        if self._expired is not None:
+            self._deque.appendleft(self._expired)
+        self._deque.pop()
+        while self._displaced:
+            self._deque.append(self._displaced.pop())
+        self._index -= 1
+        return self.update(value)
+
+
+class RollingMax(RollingExtreme):
+    def __init__(self, window: int):
+        super().__init__(window, mode="max")
+
+
+class RollingMin(RollingExtreme):
+    def __init__(self, window: int):
+        super().__init__(window, mode="min")
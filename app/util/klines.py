@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson es opcional; json estándar como respaldo
+    _json_loads = json.loads
+
+
+# Columnas de vela que usa el motor y su tipo (el resto de columnas de Binance se descarta)
+KLINE_COLUMNS: dict[str, type] = {
+    "open_time": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "close_time": np.int64,
+}
+
+
+def empty_columns() -> dict[str, np.ndarray]:
+    return {column: np.empty(0, dtype=dtype) for column, dtype in KLINE_COLUMNS.items()}
+
+
+def decode_klines(payload: bytes | str | list) -> dict[str, np.ndarray]:
+    """
+    Decodifica la respuesta de /api/v3/klines directo a arrays numpy contiguos:
+    - open_time / close_time como int64 (ms)
+    - open/high/low/close/volume como float64
+    Se ignoran qav, num_trades, taker_* e ignore.
+    """
+    rows = _json_loads(payload) if isinstance(payload, (bytes, str)) else payload
+    if not rows:
+        return empty_columns()
+
+    # Binance kline columns:
+    # 0 open_time, 1 open, 2 high, 3 low, 4 close, 5 volume, 6 close_time, ...
+    prices = np.array([row[1:6] for row in rows], dtype=np.float64).T.copy()
+    times = np.array([(row[0], row[6]) for row in rows], dtype=np.int64).T.copy()
+    return {
+        "open_time": times[0],
+        "open": prices[0],
+        "high": prices[1],
+        "low": prices[2],
+        "close": prices[3],
+        "volume": prices[4],
+        "close_time": times[1],
+    }
+
+
+def concat_columns(*parts: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    return {column: np.concatenate([p[column] for p in parts]) for column in KLINE_COLUMNS}
+
+
+def columns_to_df(columns: dict[str, np.ndarray]) -> pd.DataFrame:
+    """DataFrame de velas a partir de columnas numpy (open_time/close_time en ms)"""
+    df = pd.DataFrame(columns)
+    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
+    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
+    return df
@@ -1,51 +1,101 @@
 import numpy as np
 
 def sma(values: np.ndarray, period: int) -> np.ndarray:
+    # 1D o 2D (símbolos x tiempo), siempre sobre el último eje
+    values = np.asarray(values)
     out = np.full_like(values, np.nan, dtype=float)
-    if period <= 0 or len(values) < period:
+    if period <= 0 or values.shape[-1] < period:
         return out
-    cumsum = np.cumsum(values, dtype=float)
-    out[period-1:] = (cumsum[period-1:] - np.concatenate(([0.0], cumsum[:-period])) ) / period
+    cumsum = np.cumsum(values, axis=-1, dtype=float)
+    shifted = np.concatenate((np.zeros(cumsum.shape[:-1] + (1,)), cumsum[..., :-period]), axis=-1)
+    out[..., period-1:] = (cumsum[..., period-1:] - shifted) / period
+    return out
+
+def _wilder_smooth(x: np.ndarray, period: int, start: int, init: np.ndarray) -> np.ndarray:
+    """
+    Suavizado de Wilder vectorizado sobre el último eje:
+        y[start] = init
+        y[i] = (y[i-1]*(period-1) + x[i]) / period   para i > start
+
+    Usa la forma cerrada por bloques: y[k+t] = a^t * (y[k] + b * sum_j a^-j * x[k+j]),
+    con a = (period-1)/period y b = 1/period. El tamaño de bloque se elige para que
+    a^-t no pase de ~1e12 (sin overflow ni pérdida de precisión), así el costo en
+    Python es O(n / bloque) y el resto corre en numpy. Acepta 1D o 2D (símbolos x tiempo).
+    """
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan, dtype=float)
+    out[..., start] = init
+    if start + 1 >= n:
+        return out
+
+    if period == 1:
+        out[..., start + 1:] = x[..., start + 1:]
+        return out
+
+    a = (period - 1) / period
+    b = 1.0 / period
+    block = max(1, min(n - start - 1, int(np.log(1e12) / -np.log(a))))
+    steps = np.arange(1, block + 1)
+    decay = a ** steps          # a^t
+    growth = a ** -steps        # a^-t
+
+    prev = out[..., start]
+    k = start
+    while k + 1 < n:
+        length = min(block, n - k - 1)
+        seg = x[..., k + 1:k + 1 + length]
+        acc = np.cumsum(seg * growth[:length], axis=-1)
+        values = (prev[..., None] + b * acc) * decay[:length]
+        out[..., k + 1:k + 1 + length] = values
+        prev = values[..., -1]
+        k += length
     return out
 
 def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
-    close = close.astype(float)
-    delta = np.diff(close, prepend=close[0])
+    close = np.asarray(close, dtype=float)
+    delta = np.diff(close, axis=-1, prepend=close[..., :1])
     gains = np.where(delta > 0, delta, 0.0)
     losses = np.where(delta < 0, -delta, 0.0)
 
-    avg_gain = np.full_like(close, np.nan, dtype=float)
-    avg_loss = np.full_like(close, np.nan, dtype=float)
-
-    if len(close) <= period:
-        return avg_gain
+    if close.shape[-1] <= period:
+        return np.full(close.shape, np.nan, dtype=float)
 
-    avg_gain[period] = gains[1:period+1].mean()
-    avg_loss[period] = losses[1:period+1].mean()
-
-    for i in range(period+1, len(close)):
-        avg_gain[i] = (avg_gain[i-1]*(period-1) + gains[i]) / period
-        avg_loss[i] = (avg_loss[i-1]*(period-1) + losses[i]) / period
+    avg_gain = _wilder_smooth(gains, period, period, gains[..., 1:period+1].mean(axis=-1))
+    avg_loss = _wilder_smooth(losses, period, period, losses[..., 1:period+1].mean(axis=-1))
 
     rs = avg_gain / (avg_loss + 1e-12)
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
 def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
-    high = high.astype(float)
-    low = low.astype(float)
-    close = close.astype(float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
 
-    prev_close = np.roll(close, 1)
-    prev_close[0] = close[0]
+    prev_close = np.roll(close, 1, axis=-1)
+    prev_close[..., 0] = close[..., 0]
 
     tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
-    out = np.full_like(close, np.nan, dtype=float)
 
-    if len(close) <= period:
-        return out
+    if close.shape[-1] <= period:
+        return np.full(close.shape, np.nan, dtype=float)
+
+    return _wilder_smooth(tr, period, period, tr[..., 1:period+1].mean(axis=-1))
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Máximo de las últimas `window` velas (incluida la actual) sobre el último eje.
+    Las primeras velas usan las que haya (igual que high[-window:].max() en una serie corta).
+    """
+    return _rolling_extreme(values, window, np.maximum)
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling_extreme(values, window, np.minimum)
 
-    out[period] = tr[1:period+1].mean()
-    for i in range(period+1, len(close)):
-        out[i] = (out[i-1]*(period-1) + tr[i]) / period
+def _rolling_extreme(values: np.ndarray, window: int, op) -> np.ndarray:
+    # window desplazamientos vectorizados: O(n * window) pero todo en numpy (window es chico)
+    values = np.asarray(values, dtype=float)
+    out = values.copy()
+    for k in range(1, min(window, values.shape[-1])):
+        op(out[..., k:], values[..., :-k], out=out[..., k:])
     return out
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+
+# Pesos de la API Spot REST /api/v3 según la documentación actual de Binance (la tabla
+# anterior de klines iba de 1 a 10 según el limit). El peso real se corrige igual con
+# X-MBX-USED-WEIGHT-1M; esto es la estimación previa a cada request.
+KLINES_WEIGHT = 2
+
+
+def klines_weight() -> int:
+    """Peso de GET /api/v3/klines: fijo, no depende del limit"""
+    return KLINES_WEIGHT
+
+
+def ticker_price_weight(symbols: int) -> int:
+    """Peso de GET /api/v3/ticker/price: 2 con `symbol`, 4 con `symbols` (o sin filtro)"""
+    return 2 if symbols == 1 else 4
+
+
+class BinanceWeightLimiter:
+    """
+    Token bucket por peso de request (Binance limita por peso por minuto e IP):
+    - Se rellena de forma continua hasta `max_weight_per_minute * safety`
+    - Se corrige con el peso usado real que informa Binance (X-MBX-USED-WEIGHT-1M)
+    - Ante 429/418 bloquea todas las requests hasta el Retry-After
+
+    acquire() reserva el peso de forma síncrona (sin locks), así es seguro entre
+    tareas concurrentes y no queda atado a un event loop en particular.
+    """
+
+    DEFAULT_BACKOFF_SECONDS = {429: 60.0, 418: 120.0}
+
+    def __init__(self, max_weight_per_minute: int, safety: float = 0.9):
+        self.capacity = max_weight_per_minute * safety
+        self.rate = self.capacity / 60.0  # peso por segundo
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.used_weight: int | None = None
+        self.rate_limited = 0
+        self.waits = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, weight: int) -> float:
+        """Descuenta el peso y devuelve cuántos segundos hay que esperar"""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= weight
+        wait = max(self._blocked_until - now, -self._tokens / self.rate if self._tokens < 0 else 0.0)
+        return wait
+
+    async def acquire(self, weight: int = 1) -> None:
+        wait = self._reserve(weight)
+        if wait > 0:
+            self.waits += 1
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, headers) -> None:
+        """Ajusta los tokens al peso usado que reporta Binance en la ventana actual"""
+        used = headers.get("x-mbx-used-weight-1m") or headers.get("x-mbx-used-weight")
+        if used is None:
+            return
+        try:
+            self.used_weight = int(used)
+        except ValueError:
+            return
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, self.capacity - self.used_weight)
+
+    def on_rate_limited(self, status_code: int, retry_after: str | None = None) -> float:
+        """Registra un 429/418 y bloquea hasta Retry-After. Devuelve los segundos de bloqueo"""
+        self.rate_limited += 1
+        try:
+            backoff = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            backoff = None
+        if backoff is None:
+            backoff = self.DEFAULT_BACKOFF_SECONDS.get(status_code, 60.0)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + backoff)
+        return backoff
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "capacity": self.capacity,
+            "available": round(self._tokens, 2),
+            "used_weight_1m": self.used_weight,
+            "blocked_seconds": round(max(0.0, self._blocked_until - now), 2),
+            "rate_limited": self.rate_limited,
+            "waits": self.waits,
+        }
@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.util.timeframes import timeframe_to_ms
+
+# Las velas semanales de Binance abren el lunes 00:00 UTC (el epoch cayó jueves)
+_WEEK_MS = 604_800_000
+_WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def _bucket_offset(target_ms: int) -> int:
+    return _WEEK_OFFSET_MS if target_ms % _WEEK_MS == 0 else 0
+
+
+def bucket_open_times(open_time: np.ndarray, target_tf: str) -> np.ndarray:
+    """open_time (ms) de la vela de `target_tf` a la que pertenece cada open_time base"""
+    target_ms = timeframe_to_ms(target_tf)
+    offset = _bucket_offset(target_ms)
+    open_time = np.asarray(open_time, dtype=np.int64)
+    return (open_time - offset) // target_ms * target_ms + offset
+
+
+def base_bars_needed(target_tf: str, bars: int, base_tf: str) -> int:
+    """Velas base necesarias para obtener `bars` velas completas de `target_tf`"""
+    ratio = timeframe_to_ms(target_tf) // timeframe_to_ms(base_tf)
+    # +1 bucket por si la primera vela base cae a mitad de un bucket (se descarta)
+    return (bars + 1) * ratio
+
+
+def resample_columns(columns: dict[str, np.ndarray], base_tf: str, target_tf: str) -> dict[str, np.ndarray]:
+    """
+    Agrega velas OHLCV de `base_tf` a `target_tf` con límites alineados a UTC:
+    - open: primer open del bucket, close: último close
+    - high/low: máximo/mínimo, volume: suma
+    - Se descarta el primer bucket si la serie base arranca a mitad del mismo
+    - El último bucket puede estar incompleto (igual que la vela en curso de Binance)
+
+    Soporta timeframes que Binance no ofrece (ej: 45m, 3d) siempre que sean
+    múltiplo del timeframe base. Las columnas deben venir ordenadas por open_time.
+    """
+    base_ms = timeframe_to_ms(base_tf)
+    target_ms = timeframe_to_ms(target_tf)
+    if target_ms < base_ms or target_ms % base_ms != 0:
+        raise ValueError(f"No se puede construir {target_tf} a partir de {base_tf}")
+
+    open_time = np.asarray(columns["open_time"], dtype=np.int64)
+    n = len(open_time)
+    if n == 0 or target_ms == base_ms:
+        return {k: np.asarray(v).copy() for k, v in columns.items()}
+
+    bucket = bucket_open_times(open_time, target_tf)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    if open_time[0] != bucket[0]:
+        starts = starts[1:]
+        if len(starts) == 0:
+            return {k: np.asarray(v)[:0].copy() for k, v in columns.items()}
+
+    first = starts[0]
+    rel_starts = starts - first
+    ends = np.r_[starts[1:], n] - 1
+
+    high = np.asarray(columns["high"], dtype=np.float64)[first:]
+    low = np.asarray(columns["low"], dtype=np.float64)[first:]
+    volume = np.asarray(columns["volume"], dtype=np.float64)[first:]
+
+    out_open_time = bucket[starts]
+    return {
+        "open_time": out_open_time,
+        "open": np.asarray(columns["open"], dtype=np.float64)[starts],
+        "high": np.maximum.reduceat(high, rel_starts),
+        "low": np.minimum.reduceat(low, rel_starts),
+        "close": np.asarray(columns["close"], dtype=np.float64)[ends],
+        "volume": np.add.reduceat(volume, rel_starts),
+        "close_time": out_open_time + target_ms - 1,
+    }
@@ -0,0 +1,48 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.util.candles import CandleSeries
+from app.util.klines import KLINE_COLUMNS
+
+
+class SharedCandles:
+    """
+    Velas copiadas una sola vez a un bloque de memoria compartida para procesos worker:
+    cada worker se conecta con attach(handle) y obtiene una CandleSeries que apunta al
+    mismo bloque (sin pickle ni copias por tarea). El creador debe llamar close().
+    """
+
+    def __init__(self, candles: CandleSeries):
+        n = len(candles)
+        size = sum(np.dtype(dtype).itemsize for dtype in KLINE_COLUMNS.values()) * max(n, 1)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        for column, values in _views(self._shm, n).items():
+            values[:] = getattr(candles, column)
+        self.handle = (self._shm.name, n)
+
+    @staticmethod
+    def attach(handle: tuple[str, int]) -> tuple[shared_memory.SharedMemory, CandleSeries]:
+        """Devuelve el bloque (hay que mantener la referencia viva) y la serie sobre él"""
+        name, n = handle
+        shm = shared_memory.SharedMemory(name=name)
+        return shm, CandleSeries.from_columns(_views(shm, n))
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedCandles":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _views(shm: shared_memory.SharedMemory, n: int) -> dict[str, np.ndarray]:
+    views = {}
+    offset = 0
+    for column, dtype in KLINE_COLUMNS.items():
+        views[column] = np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=offset)
+        offset += n * np.dtype(dtype).itemsize
+    return views
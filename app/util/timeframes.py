@@ -17,3 +17,20 @@ def to_binance_interval(tf: str) -> str:
     if tf not in mapping:
         raise ValueError(f"Timeframe no soportado: {tf}. Usa: {list(mapping.keys())}")
     return mapping[tf]
+
+
+_UNIT_MS = {
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+
+def timeframe_to_ms(tf: str) -> int:
+    """Duración de una vela en milisegundos (ej: '15m' -> 900000)."""
+    tf = tf.strip().lower()
+    unit = tf[-1:]
+    if unit not in _UNIT_MS or not tf[:-1].isdigit() or int(tf[:-1]) <= 0:
+        raise ValueError(f"Timeframe inválido: {tf}")
+    return int(tf[:-1]) * _UNIT_MS[unit]
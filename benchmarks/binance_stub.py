@@ -0,0 +1,138 @@
+"""
+Stand-in local de la API REST de Binance (stdlib, en un hilo aparte)
+
+Sirve /api/v3/klines (respeta startTime, endTime y limit) y /api/v3/ticker/price
+con velas sintéticas deterministas por symbol/timeframe. Se usa con
+MarketService(base_url=stub.url) para medir el pipeline sin red ni límites de peso.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from app.util.timeframes import timeframe_to_ms
+from benchmarks.data import symbol_seed, synthetic_columns
+
+
+class _Series:
+    """Velas de un symbol/timeframe ya serializadas, para que el stub no sea el cuello de botella"""
+
+    def __init__(self, symbol: str, timeframe: str, bars: int, seed: int):
+        tf_ms = timeframe_to_ms(timeframe)
+        end_ms = int(time.time() * 1000) // tf_ms * tf_ms
+        columns = synthetic_columns(bars, seed=symbol_seed(symbol, timeframe, seed), timeframe=timeframe, end_ms=end_ms)
+        self.open_time = columns["open_time"]
+        self.last_close = float(columns["close"][-1])
+        self.rows = [
+            json.dumps([int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}", int(ct),
+                        "0", 1, "0", "0", "0"]).encode()
+            for t, o, h, l, c, v, ct in zip(
+                columns["open_time"], columns["open"], columns["high"], columns["low"],
+                columns["close"], columns["volume"], columns["close_time"],
+            )
+        ]
+
+    def select(self, start: int | None, end: int | None, limit: int) -> bytes:
+        if start is not None:
+            i = int(np.searchsorted(self.open_time, start, side="left"))
+            j = int(np.searchsorted(self.open_time, end, side="right")) if end is not None else len(self.rows)
+            rows = self.rows[i:min(j, i + limit)]
+        else:
+            j = int(np.searchsorted(self.open_time, end, side="right")) if end is not None else len(self.rows)
+            rows = self.rows[max(0, j - limit):j]
+        return b"[" + b",".join(rows) + b"]"
+
+
+class BinanceStub:
+    """
+    with BinanceStub(bars=5000) as stub:
+        market = MarketService(base_url=stub.url)
+    """
+
+    def __init__(self, bars: int = 5000, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.bars = bars
+        self.seed = seed
+        self.requests = 0
+        self._series: dict[tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def series(self, symbol: str, timeframe: str) -> _Series:
+        key = (symbol.upper(), timeframe)
+        with self._lock:
+            if key not in self._series:
+                self._series[key] = _Series(key[0], timeframe, self.bars, self.seed)
+            return self._series[key]
+
+    def start(self) -> "BinanceStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "BinanceStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como Binance
+            disable_nagle_algorithm = True  # headers y body van en writes separados
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stub.requests += 1
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                try:
+                    if url.path == "/api/v3/klines":
+                        series = stub.series(query["symbol"], query["interval"])
+                        body = series.select(
+                            int(query["startTime"]) if "startTime" in query else None,
+                            int(query["endTime"]) if "endTime" in query else None,
+                            min(int(query.get("limit", 500)), 1000),
+                        )
+                    elif url.path == "/api/v3/ticker/price":
+                        symbols = json.loads(query["symbols"]) if "symbols" in query else [query["symbol"]]
+                        prices = [
+                            {"symbol": s.upper(), "price": f"{stub.series(s, '1m').last_close:.8f}"}
+                            for s in symbols
+                        ]
+                        body = json.dumps(prices if "symbols" in query else prices[0]).encode()
+                    else:
+                        self._send(404, b'{"code":-1,"msg":"not found"}')
+                        return
+                except (KeyError, ValueError) as e:
+                    self._send(400, json.dumps({"code": -1100, "msg": str(e)}).encode())
+                    return
+                self._send(200, body)
+
+        return Handler
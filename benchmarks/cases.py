@@ -0,0 +1,211 @@
+"""
+Casos de benchmark: indicadores, StrategyEngine, screener y pipeline multi-timeframe
+"""
+
+import asyncio
+import contextlib
+import io
+
+import numpy as np
+
+from app.services.backtest_service import backtest_candles
+from app.services.http_client import close_http_clients
+from app.services.market_service import MarketService
+from app.services.multi_timeframe_service import MultiTimeframeService
+from app.services.screener_service import ScreenerService, batch_signals
+from app.services.trade_book import OpenTrade, TradeBook
+from app.services.trade_manager import StrategyEngine
+from app.util.candles import CandleSeries
+from app.util.math import rsi, atr, sma
+from app.util.resample import resample_columns
+from benchmarks.binance_stub import BinanceStub
+from benchmarks.data import synthetic_columns, synthetic_matrix, synthetic_open_trades
+from benchmarks.harness import Case
+
+BAR_SIZES = (300, 10_000, 1_000_000)
+SYMBOL_COUNTS = (1, 50, 500)
+QUICK_BAR_SIZES = (300, 10_000)
+QUICK_SYMBOL_COUNTS = (1, 50)
+TRADE_COUNTS = (1_000, 10_000, 100_000)
+QUICK_TRADE_COUNTS = (1_000, 10_000)
+
+
+def _indicator_cases(bar_sizes) -> list[Case]:
+    cases = []
+    for n in bar_sizes:
+        def setup_sma(n=n):
+            close = synthetic_columns(n)["close"]
+            return lambda: sma(close, 50)
+
+        def setup_rsi(n=n):
+            close = synthetic_columns(n)["close"]
+            return lambda: rsi(close, 14)
+
+        def setup_atr(n=n):
+            c = synthetic_columns(n)
+            return lambda: atr(c["high"], c["low"], c["close"], period=14)
+
+        cases += [
+            Case("math.sma", setup_sma, items=n, unit="bars", params={"bars": n}),
+            Case("math.rsi", setup_rsi, items=n, unit="bars", params={"bars": n}),
+            Case("math.atr", setup_atr, items=n, unit="bars", params={"bars": n}),
+        ]
+    return cases
+
+
+def _strategy_cases(bar_sizes) -> list[Case]:
+    cases = []
+    for n in bar_sizes:
+        def setup(n=n):
+            candles = CandleSeries.from_columns(synthetic_columns(n))
+            return lambda: StrategyEngine(candles, "15m", verbose=False).compute_signal()
+
+        def setup_series(n=n):
+            candles = CandleSeries.from_columns(synthetic_columns(n))
+            return lambda: StrategyEngine(candles, "15m", verbose=False).compute_signal_series()
+
+        cases.append(Case("strategy.compute_signal", setup, items=n, unit="bars", params={"bars": n}))
+        cases.append(Case("strategy.compute_signal_series", setup_series, items=n, unit="bars", params={"bars": n}))
+    return cases
+
+
+def _backtest_cases(bar_sizes) -> list[Case]:
+    cases = []
+    for n in (35_040,) + tuple(b for b in bar_sizes if b > 35_040):
+        def setup(n=n):
+            candles = CandleSeries.from_columns(synthetic_columns(n))
+            return lambda: backtest_candles(candles, "15m")
+
+        # 35_040 velas = un año de 15m
+        cases.append(Case("backtest.backtest_candles", setup, items=n, unit="bars", params={"bars": n}))
+
+        def setup_replay(n=n):
+            candles = CandleSeries.from_columns(synthetic_columns(n))
+            service = MultiTimeframeService("BENCH", base_timeframe="15m")
+            return lambda: service.replay_consensus(candles)
+
+        cases.append(Case("mtf.replay_consensus", setup_replay, items=n, unit="bars", params={"bars": n}))
+    return cases
+
+
+def _screener_cases(symbol_counts) -> list[Case]:
+    cases = []
+    for s in symbol_counts:
+        def setup(s=s):
+            m = synthetic_matrix(s, 300)
+            return lambda: batch_signals(m["close"], m["high"], m["low"])
+
+        cases.append(Case("screener.batch_signals", setup, items=s, unit="symbols", params={"symbols": s, "bars": 300}))
+    return cases
+
+
+def _trade_book_cases(trade_counts) -> list[Case]:
+    cases = []
+    ticks = 1_000
+    for n in trade_counts:
+        def setup(n=n):
+            book = TradeBook()
+            book.load([OpenTrade.from_dict(t) for t in synthetic_open_trades(n)])
+            # Precios alrededor de la entrada: la mayoría de los ticks no cruza ningún nivel
+            prices = (100 * (1 + np.random.default_rng(1).normal(0, 0.002, ticks))).tolist()
+            return lambda: [book.hits("SYM0USDT", p) for p in prices]
+
+        cases.append(Case("trade_book.hits", setup, items=ticks, unit="ticks", params={"trades": n}))
+    return cases
+
+
+def _resample_cases(bar_sizes) -> list[Case]:
+    cases = []
+    for n in bar_sizes:
+        if n < 10_000:
+            continue
+
+        def setup(n=n):
+            columns = synthetic_columns(n)
+            return lambda: resample_columns(columns, "15m", "1d")
+
+        cases.append(Case("resample.15m_to_1d", setup, items=n, unit="bars", params={"bars": n}))
+    return cases
+
+
+class _AsyncRunner:
+    """Loop y stub persistentes para medir código async (el pool HTTP queda atado al loop)"""
+
+    def __init__(self, bars: int):
+        self.stub = BinanceStub(bars=bars).start()
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def close(self) -> None:
+        self.loop.run_until_complete(close_http_clients())
+        self.loop.close()
+        self.stub.stop()
+
+
+def _pipeline_cases(symbol_counts) -> list[Case]:
+    cases = []
+    state: dict = {}
+
+    def teardown():
+        state.pop("runner").close()
+
+    for limit in (300, 1000, 5000):
+        def setup(limit=limit):
+            runner = state["runner"] = _AsyncRunner(bars=limit + 10)
+            market = MarketService(base_url=runner.stub.url)
+            return lambda: runner.run(market.get_klines_columns("BTCUSDT", "15m", limit, use_cache=False))
+
+        cases.append(Case("market.get_klines_columns", setup, items=limit, unit="bars",
+                          params={"limit": limit}, teardown=teardown))
+
+    for s in symbol_counts:
+        def setup(s=s):
+            runner = state["runner"] = _AsyncRunner(bars=10)
+            market = MarketService(base_url=runner.stub.url)
+            symbols = [f"SYM{i}USDT" for i in range(s)]
+            return lambda: runner.run(market.get_prices(symbols))
+
+        cases.append(Case("market.get_prices", setup, items=s, unit="symbols",
+                          params={"symbols": s}, teardown=teardown))
+
+    for base in (None, "15m"):
+        def setup(base=base):
+            runner = state["runner"] = _AsyncRunner(bars=40_000)
+            service = MultiTimeframeService("BTCUSDT", base_timeframe=base)
+            service.market_service = MarketService(base_url=runner.stub.url)
+
+            def analyze():
+                # El servicio imprime el resumen en cada corrida
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return runner.run(service.analyze_all_timeframes())
+            return analyze
+
+        cases.append(Case("mtf.analyze_all_timeframes", setup, items=1, unit="analyses",
+                          params={"base": base or "per-timeframe"}, teardown=teardown))
+
+    for s in symbol_counts:
+        def setup(s=s):
+            runner = state["runner"] = _AsyncRunner(bars=400)
+            screener = ScreenerService(MarketService(base_url=runner.stub.url))
+            symbols = [f"SYM{i}USDT" for i in range(s)]
+            return lambda: runner.run(screener.screen(symbols, "15m", 300))
+
+        cases.append(Case("screener.screen", setup, items=s, unit="symbols",
+                          params={"symbols": s}, teardown=teardown))
+    return cases
+
+
+def all_cases(quick: bool = False) -> list[Case]:
+    bar_sizes = QUICK_BAR_SIZES if quick else BAR_SIZES
+    symbol_counts = QUICK_SYMBOL_COUNTS if quick else SYMBOL_COUNTS
+    return (
+        _indicator_cases(bar_sizes)
+        + _strategy_cases(bar_sizes)
+        + _backtest_cases(bar_sizes)
+        + _screener_cases(symbol_counts)
+        + _resample_cases(bar_sizes)
+        + _trade_book_cases(QUICK_TRADE_COUNTS if quick else TRADE_COUNTS)
+        + _pipeline_cases(symbol_counts)
+    )
@@ -0,0 +1,78 @@
+"""
+Datos OHLCV sintéticos y reproducibles (misma semilla -> mismas velas)
+"""
+
+import zlib
+
+import numpy as np
+
+from app.util.timeframes import timeframe_to_ms
+
+# Última vela fija para que los datos no dependan de la hora en que se corre
+DEFAULT_END_MS = 1_700_006_400_000
+
+
+def symbol_seed(symbol: str, timeframe: str, seed: int = 0) -> int:
+    return zlib.crc32(f"{symbol}:{timeframe}:{seed}".encode())
+
+
+def synthetic_columns(
+    n: int,
+    seed: int = 0,
+    timeframe: str = "15m",
+    end_ms: int | None = None,
+    start_price: float = 100.0,
+    volatility: float = 0.002,
+) -> dict[str, np.ndarray]:
+    """
+    Random walk log-normal con tendencias lentas (para que haya cruces de medias)
+    en el formato de columnas de app.util.klines. end_ms es el open_time de la última vela.
+    """
+    rng = np.random.default_rng(seed)
+    tf_ms = timeframe_to_ms(timeframe)
+    end_ms = (end_ms if end_ms is not None else DEFAULT_END_MS) // tf_ms * tf_ms
+    open_time = end_ms - (n - 1 - np.arange(n, dtype=np.int64)) * tf_ms
+
+    drift = volatility * 0.3 * np.sin(np.arange(n) / 200.0 + rng.uniform(0, 2 * np.pi))
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, volatility)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    wick = np.abs(rng.normal(0, volatility, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    return {
+        "open_time": open_time,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": rng.lognormal(3.0, 1.0, n),
+        "close_time": open_time + tf_ms - 1,
+    }
+
+
+def synthetic_matrix(symbols: int, n: int, seed: int = 0, timeframe: str = "15m") -> dict[str, np.ndarray]:
+    """close/high/low apilados (símbolos x tiempo), alineados a la misma última vela"""
+    series = [synthetic_columns(n, seed=seed + i, timeframe=timeframe) for i in range(symbols)]
+    return {column: np.stack([s[column] for s in series]) for column in ("close", "high", "low")}
+
+
+def synthetic_open_trades(n: int, seed: int = 0, symbols: int = 1, price: float = 100.0) -> list[dict]:
+    """Trades abiertos cerca de `price` (mitad long, mitad short) con SL a 2-10% de la entrada y TP a 2R"""
+    rng = np.random.default_rng(seed)
+    entry = price * (1 + rng.uniform(-0.002, 0.002, n))
+    risk = entry * rng.uniform(0.02, 0.1, n)
+    long = rng.random(n) < 0.5
+    return [
+        {
+            "id": i + 1,
+            "symbol": f"SYM{i % symbols}USDT",
+            "timeframe": "15m",
+            "side": "long" if long[i] else "short",
+            "entry_price": float(entry[i]),
+            "stop_loss": float(entry[i] - risk[i] if long[i] else entry[i] + risk[i]),
+            "take_profit": float(entry[i] + 2 * risk[i] if long[i] else entry[i] - 2 * risk[i]),
+            "fee_rate": 0.001,
+        }
+        for i in range(n)
+    ]
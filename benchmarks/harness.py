@@ -0,0 +1,99 @@
+"""
+Medición: latencia (percentiles), throughput y memoria pico (tracemalloc)
+"""
+
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass
+class Case:
+    """
+    Un benchmark parametrizado:
+    - setup() prepara los datos (no se mide) y devuelve la función a medir
+    - items / unit definen el throughput (ej: 10_000 velas -> velas/s)
+    """
+
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    items: int = 1
+    unit: str = "ops"
+    params: dict = field(default_factory=dict)
+    teardown: Callable[[], None] | None = None
+
+    @property
+    def key(self) -> str:
+        suffix = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{suffix}]" if suffix else self.name
+
+
+@dataclass
+class Result:
+    key: str
+    runs: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    min_ms: float
+    throughput: float
+    unit: str
+    peak_kib: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def run_case(case: Case, min_time: float = 0.5, min_runs: int = 5, max_runs: int = 1000, warmup: int = 1) -> Result:
+    """
+    Corre la función hasta juntar min_time segundos (entre min_runs y max_runs corridas).
+    La memoria pico se mide en una corrida extra aparte: tracemalloc distorsiona los tiempos.
+    """
+    fn = case.setup()
+    try:
+        for _ in range(warmup):
+            fn()
+
+        samples = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - started < min_time):
+                t0 = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - t0)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        if case.teardown:
+            case.teardown()
+
+    ms = np.asarray(samples) * 1000
+    p50 = float(np.percentile(ms, 50))
+    return Result(
+        key=case.key,
+        runs=len(samples),
+        mean_ms=round(float(ms.mean()), 4),
+        p50_ms=round(p50, 4),
+        p95_ms=round(float(np.percentile(ms, 95)), 4),
+        p99_ms=round(float(np.percentile(ms, 99)), 4),
+        min_ms=round(float(ms.min()), 4),
+        throughput=round(case.items / (p50 / 1000), 2) if p50 > 0 else float("inf"),
+        unit=f"{case.unit}/s",
+        peak_kib=round(peak / 1024, 1),
+    )
@@ -0,0 +1,123 @@
+"""
+Benchmark suite
+
+    python -m benchmarks.run                      # todos los casos
+    python -m benchmarks.run --quick -k math      # sin 1M velas / 500 símbolos, filtrando por nombre
+    python -m benchmarks.run --save               # guarda baseline (por defecto con el commit actual)
+    python -m benchmarks.run --compare abc1234    # compara contra una baseline guardada
+
+Necesita las mismas variables de entorno que la app (.env). Las cachés, el almacén
+de velas y el stream se desactivan para medir el cálculo y no los aciertos de caché.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Antes de importar app.*: la configuración se lee al importar
+os.environ.setdefault("KLINE_STORE_ENABLED", "false")
+os.environ.setdefault("MARKET_CACHE_ENABLED", "false")
+os.environ.setdefault("INDICATOR_CACHE_ENABLED", "false")
+os.environ.setdefault("STREAM_ENABLED", "false")
+os.environ.setdefault("BINANCE_WEIGHT_LIMIT", "100000000")  # el stub no limita
+
+import numpy as np  # noqa: E402
+
+from benchmarks.cases import all_cases  # noqa: E402
+from benchmarks.harness import run_case  # noqa: E402
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(results: list[dict], baseline: dict | None, threshold: float) -> list[str]:
+    regressions = []
+    header = f"{'caso':<58} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'throughput':>18} {'pico KiB':>10}"
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (
+            f"{r['key']:<58} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+            f"{r['throughput']:>12,.0f} {r['unit']:<5} {r['peak_kib']:>10,.0f}"
+        )
+        base = baseline.get(r["key"]) if baseline else None
+        if base:
+            ratio = r["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+            mark = " ⚠️" if ratio > 1 + threshold else (" ✅" if ratio < 1 - threshold else "")
+            line += f" {ratio:>8.2f}x{mark}"
+            if ratio > 1 + threshold:
+                regressions.append(r["key"])
+        print(line)
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de indicadores, estrategia y pipeline multi-timeframe")
+    parser.add_argument("-k", "--filter", help="solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--quick", action="store_true", help="omite 1M velas y 500 símbolos")
+    parser.add_argument("--min-time", type=float, default=0.5, help="segundos mínimos medidos por caso")
+    parser.add_argument("--save", nargs="?", const="", metavar="NOMBRE", help="guarda baseline (por defecto: commit actual)")
+    parser.add_argument("--compare", metavar="NOMBRE", help="baseline contra la cual comparar (p50)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tolerancia de regresión (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        path = BASELINE_DIR / f"{args.compare}.json"
+        if not path.exists():
+            print(f"❌ No existe la baseline {path}")
+            return 2
+        baseline = {r["key"]: r for r in json.loads(path.read_text())["results"]}
+
+    cases = [c for c in all_cases(quick=args.quick) if not args.filter or args.filter in c.key]
+    results = []
+    for case in cases:
+        print(f"⏱️  {case.key}...", file=sys.stderr)
+        results.append(run_case(case, min_time=args.min_time).to_dict())
+
+    print()
+    regressions = _print_table(results, baseline, args.threshold)
+
+    if args.save is not None:
+        revision = _git_revision()
+        name = args.save or revision or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{name}.json"
+        path.write_text(json.dumps({
+            "name": name,
+            "git_revision": revision,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2))
+        print(f"\n💾 Baseline guardada en {path}")
+
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} caso(s) más lentos que la baseline (> {args.threshold:.0%}):")
+        for key in regressions:
+            print(f"   - {key}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
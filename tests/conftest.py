@@ -0,0 +1,38 @@
+"""
+Configuración común de los tests: variables mínimas para instanciar Settings
+sin .env (las que ya estén definidas en el entorno se respetan)
+"""
+
+import os
+
+_ENV = {
+    "APP_NAME": "trading_engine_tests",
+    "ENVIRONMENT": "test",
+    "LOG_LEVEL": "info",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "test",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "DATABASE_URL": "sqlite+aiosqlite:///:memory:",
+    "SYMBOL": "BTCUSDT",
+    "TIMEFRAME": "15m",
+    "POLL_SECONDS": "10",
+    "CANDLES_LIMIT": "300",
+    "RISK_REWARD": "2",
+    "ATR_MULTIPLIER_SL": "1.5",
+    "MA_FAST": "20",
+    "MA_SLOW": "50",
+    "RSI_PERIOD": "14",
+    "RSI_MIN": "45",
+    "RSI_MAX": "70",
+    "BINANCE_TAKER_FEE": "0.001",
+    "BINANCE_MAKER_FEE": "0.001",
+    "ALERT_MODE": "console",
+    "AI_PROVIDER": "gemini",
+    "MARKET_CACHE_ENABLED": "false",
+    "KLINE_STORE_ENABLED": "false",
+}
+
+for key, value in _ENV.items():
+    os.environ.setdefault(key, value)
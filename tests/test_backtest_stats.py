@@ -0,0 +1,41 @@
+import json
+
+import numpy as np
+
+from app.services.backtest_service import summarize
+from app.services.optimizer_service import rank
+
+
+def _trades(pnl: list[float]) -> dict[str, np.ndarray]:
+    n = len(pnl)
+    return {
+        "entry_index": np.zeros(n, dtype=np.int64),
+        "exit_index": np.full(n, 3, dtype=np.int64),
+        "entry_price": np.full(n, 100.0),
+        "stop_loss": np.full(n, 99.0),
+        "pnl_abs": np.array(pnl, dtype=float),
+        "fee_paid": np.zeros(n),
+        "win": np.array([p > 0 for p in pnl], dtype=bool),
+        "side": np.ones(n, dtype=np.int8),
+    }
+
+
+def test_profit_factor_without_losses_is_json_safe():
+    stats = summarize(_trades([1.0, 2.0]), np.array([1.0, 1.01, 1.03]), "15m", 3)
+    assert stats["profit_factor"] is None
+    json.dumps(stats, allow_nan=False)
+
+
+def test_profit_factor_without_trades_is_zero():
+    stats = summarize(_trades([]), np.ones(3), "15m", 3)
+    assert stats["profit_factor"] == 0.0
+
+
+def test_rank_puts_lossless_profit_factor_first():
+    results = [
+        {"params": {"id": "a"}, "stats": {"trades": 5, "profit_factor": 2.5}},
+        {"params": {"id": "b"}, "stats": {"trades": 5, "profit_factor": None}},
+        {"params": {"id": "c"}, "stats": {"trades": 5, "profit_factor": 0.0}},
+    ]
+    ranked = rank(results, ["profit_factor"])
+    assert [r["params"]["id"] for r in ranked] == ["b", "a", "c"]
@@ -0,0 +1,141 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from app.services.http_client import close_http_clients, open_http_clients
+from app.services.kline_store import KlineStore
+from app.services.market_service import MarketService
+from app.util.klines import KLINE_COLUMNS
+from benchmarks.binance_stub import BinanceStub
+
+SYMBOL, TF, TF_MS = "BTCUSDT", "1m", 60_000
+
+
+@pytest.fixture(scope="module")
+def stub():
+    with BinanceStub(bars=3500) as stub:
+        yield stub
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(str(tmp_path))
+
+
+def _run(coro):
+    async def wrapped():
+        await open_http_clients()
+        try:
+            return await coro
+        finally:
+            await close_http_clients()
+    return asyncio.run(wrapped())
+
+
+def _bars(first: int, n: int) -> dict[str, np.ndarray]:
+    open_time = np.arange(first, first + n, dtype=np.int64) * TF_MS
+    close = 100.0 + np.arange(n, dtype=float)
+    return {
+        "open_time": open_time, "open": close, "high": close + 1, "low": close - 1,
+        "close": close, "volume": np.ones(n), "close_time": open_time + TF_MS - 1,
+    }
+
+
+def _assert_contiguous(store: KlineStore) -> np.ndarray:
+    open_time = store.read(SYMBOL, TF)["open_time"]
+    assert (np.diff(open_time) == TF_MS).all()
+    return open_time
+
+
+def test_fetch_range_splits_in_parallel_chunks(stub):
+    market = MarketService(store=None, base_url=stub.url)
+    open_time = stub.series(SYMBOL, TF).open_time
+    before = stub.requests
+
+    # Rango no alineado que cruza dos veces el límite de 1000 velas por request
+    columns = _run(market._fetch_range(SYMBOL, TF, int(open_time[100]) - 1, int(open_time[2600])))
+
+    assert stub.requests - before == 3
+    assert columns["open_time"].tolist() == open_time[100:2601].tolist()
+
+
+def test_backfill_appends_and_dedups_overlapping_ranges(stub, store):
+    market = MarketService(store=store, base_url=stub.url)
+    open_time = stub.series(SYMBOL, TF).open_time
+
+    first = _run(market.backfill(SYMBOL, TF, int(open_time[1000]), int(open_time[2999])))
+    assert first["bars_written"] == 2000
+
+    # Se solapa con lo guardado por los dos lados: solo se escriben las velas nuevas
+    second = _run(market.backfill(SYMBOL, TF, int(open_time[500]), int(open_time[3199])))
+    assert second["bars_written"] == 500 + 200
+    stored = _assert_contiguous(store)
+    assert stored.tolist() == open_time[500:3200].tolist()
+
+    again = _run(market.backfill(SYMBOL, TF, int(open_time[500]), int(open_time[3199])))
+    assert again["bars_written"] == 0
+    assert store.count(SYMBOL, TF) == 2700
+
+
+def test_backfill_before_stored_history_merges_without_gaps(stub, store):
+    market = MarketService(store=store, base_url=stub.url)
+    open_time = stub.series(SYMBOL, TF).open_time
+
+    _run(market.backfill(SYMBOL, TF, int(open_time[2000]), int(open_time[2499])))
+    # Termina antes de lo guardado: el rango se amplía para no dejar hueco
+    result = _run(market.backfill(SYMBOL, TF, int(open_time[0]), int(open_time[999])))
+
+    assert result["bars_written"] == 2000
+    assert _assert_contiguous(store).tolist() == open_time[:2500].tolist()
+
+
+def test_stored_klines_fill_gap_without_dropping_history(stub, store):
+    market = MarketService(store=store, base_url=stub.url)
+    series = stub.series(SYMBOL, TF)
+    _run(market.backfill(SYMBOL, TF, int(series.open_time[0])))
+    closed = store.count(SYMBOL, TF)
+
+    # Simula un corte largo: se pierden las últimas 1500 velas (más que una request)
+    columns = store.read(SYMBOL, TF)
+    store.reset(SYMBOL, TF)
+    store.append(SYMBOL, TF, {k: v[:closed - 1500] for k, v in columns.items()})
+
+    window = _run(market.get_klines_columns(SYMBOL, TF, 300, use_cache=False))
+
+    assert store.count(SYMBOL, TF) == closed
+    assert _assert_contiguous(store)[0] == series.open_time[0]
+    assert window["open_time"].tolist() == series.open_time[-300:].tolist()
+
+
+def test_merge_recovers_from_interrupted_column_swap(store):
+    store.append(SYMBOL, TF, _bars(100, 100))
+    series_dir = store._series_dir(SYMBOL, TF)
+    merged = _bars(0, 200)
+
+    # Estado de un merge cortado: columnas nuevas completas, journal escrito, solo 2 reemplazadas
+    for column, dtype in KLINE_COLUMNS.items():
+        path = series_dir / f"{column}.tmp"
+        path.write_bytes(np.asarray(merged[column], dtype=dtype).tobytes())
+    (series_dir / KlineStore.MERGE_JOURNAL).write_text("200")
+    for column in list(KLINE_COLUMNS)[:2]:
+        os.replace(series_dir / f"{column}.tmp", series_dir / f"{column}.bin")
+
+    columns = store.read(SYMBOL, TF)
+
+    assert not (series_dir / KlineStore.MERGE_JOURNAL).exists()
+    assert not any(p.suffix == ".tmp" for p in series_dir.iterdir())
+    for column, dtype in KLINE_COLUMNS.items():
+        assert columns[column].tolist() == np.asarray(merged[column], dtype=dtype).tolist()
+
+
+def test_merge_without_journal_keeps_previous_series(store):
+    store.append(SYMBOL, TF, _bars(100, 100))
+    series_dir = store._series_dir(SYMBOL, TF)
+    # Merge cortado antes del journal: los temporales se ignoran y se pisan en el próximo merge
+    (series_dir / "close.tmp").write_bytes(b"\0" * 16)
+
+    assert store.read(SYMBOL, TF)["open_time"].tolist() == _bars(100, 100)["open_time"].tolist()
+    assert store.merge(SYMBOL, TF, _bars(0, 100)) == 100
+    assert _assert_contiguous(store).tolist() == _bars(0, 200)["open_time"].tolist()
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import socket
+
+import numpy as np
+from websockets.asyncio.server import serve
+
+from app.services.market_stream import KlineRingBuffer, MarketStreamService
+
+TF_MS = 60_000
+
+# Referencia propia: un test reemplaza asyncio.sleep para registrar el backoff
+_sleep = asyncio.sleep
+
+
+def _bars(first: int, n: int, base: float = 100.0) -> dict[str, np.ndarray]:
+    """Velas de 1m con índices first..first+n-1 (close = base + índice)"""
+    index = np.arange(first, first + n)
+    open_time = (index * TF_MS).astype(np.int64)
+    close = base + index.astype(float)
+    return {
+        "open_time": open_time,
+        "open": close - 0.5,
+        "high": close + 1.0,
+        "low": close - 1.0,
+        "close": close,
+        "volume": np.ones(n),
+        "close_time": open_time + TF_MS - 1,
+    }
+
+
+def _kline_frame(index: int, close: float, symbol: str = "BTCUSDT") -> str:
+    open_time = index * TF_MS
+    return json.dumps({
+        "stream": f"{symbol.lower()}@kline_1m",
+        "data": {
+            "e": "kline",
+            "s": symbol,
+            "k": {
+                "t": open_time, "T": open_time + TF_MS - 1, "i": "1m",
+                "o": str(close), "h": str(close + 1), "l": str(close - 1), "c": str(close), "v": "1",
+            },
+        },
+    })
+
+
+async def _until(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timeout esperando la condición"
+        await _sleep(0.01)
+
+
+class FakeMarket:
+    """Reemplaza el backfill REST: devuelve las últimas `limit` velas de una serie controlada por el test"""
+
+    def __init__(self, columns: dict[str, np.ndarray]):
+        self.columns = columns
+        self.calls = 0
+
+    async def get_klines_columns(self, symbol: str, timeframe: str, limit: int = 300, use_cache: bool = True):
+        self.calls += 1
+        return {k: v[-limit:].copy() for k, v in self.columns.items()}
+
+    def extend(self, columns: dict[str, np.ndarray]) -> None:
+        """Agrega velas nuevas; las del mismo open_time reemplazan a las existentes"""
+        keep = self.columns["open_time"] < columns["open_time"][0]
+        self.columns = {k: np.concatenate([v[keep], columns[k]]) for k, v in self.columns.items()}
+
+
+class FakeBinanceWs:
+    """Servidor WebSocket local: envía los frames encolados por el test; None corta la conexión"""
+
+    def __init__(self):
+        self.frames: asyncio.Queue[str | None] = asyncio.Queue()
+        self.connections = 0
+        self.server = None
+
+    async def _handler(self, ws) -> None:
+        self.connections += 1
+        closed = asyncio.ensure_future(ws.wait_closed())
+        while True:
+            next_frame = asyncio.ensure_future(self.frames.get())
+            await asyncio.wait({next_frame, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_frame.done():
+                next_frame.cancel()
+                return
+            frame = next_frame.result()
+            if frame is None:
+                await ws.close()
+                return
+            await ws.send(frame)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def __aenter__(self) -> "FakeBinanceWs":
+        self.server = await serve(self._handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def test_ring_buffer_revises_open_candle_and_appends_new_ones():
+    buffer = KlineRingBuffer(size=3)
+    bars = _bars(0, 4)
+    for i in range(2):
+        buffer.update({k: v[i] for k, v in bars.items()})
+
+    buffer.update({**{k: v[1] for k, v in bars.items()}, "close": 999.0})
+    assert len(buffer) == 2
+    assert buffer.last_close() == 999.0
+
+    buffer.update({k: v[0] for k, v in bars.items()})  # vela vieja: se ignora
+    assert len(buffer) == 2
+
+    for i in range(2, 4):
+        buffer.update({k: v[i] for k, v in bars.items()})
+    columns = buffer.to_columns()
+    assert len(buffer) == 3
+    assert columns["open_time"].tolist() == [TF_MS, 2 * TF_MS, 3 * TF_MS]
+    assert columns["close"].tolist() == [999.0, 102.0, 103.0]
+
+
+def test_ring_buffer_load_keeps_latest_bars():
+    buffer = KlineRingBuffer(size=5)
+    buffer.load(_bars(0, 8))
+    assert buffer.to_columns()["open_time"].tolist() == [i * TF_MS for i in range(3, 8)]
+    buffer.update({k: v[0] for k, v in _bars(8, 1).items()})
+    assert buffer.to_columns(limit=2)["open_time"].tolist() == [7 * TF_MS, 8 * TF_MS]
+
+
+def test_stream_reconnects_and_backfills_the_gap():
+    async def scenario():
+        market = FakeMarket(_bars(0, 50))
+        async with FakeBinanceWs() as server:
+            stream = MarketStreamService(["BTCUSDT"], ["1m"], buffer_size=20, ws_base=server.url, market=market)
+            stream.RECONNECT_MIN_SECONDS = 0.01
+            await stream.start()
+            try:
+                await _until(lambda: stream.connected)
+                buffer = stream.buffers[("BTCUSDT", "1m")]
+                assert buffer.to_columns()["open_time"].tolist() == [i * TF_MS for i in range(30, 50)]
+
+                # Vela en curso revisada y vela nueva por el stream
+                server.frames.put_nowait(_kline_frame(49, 500.0))
+                server.frames.put_nowait(_kline_frame(50, 501.0))
+                await _until(lambda: stream.messages == 2)
+                columns = buffer.to_columns()
+                assert columns["open_time"][-1] == 50 * TF_MS
+                assert columns["close"][-2:].tolist() == [500.0, 501.0]
+                assert stream.last_price("BTCUSDT") == 501.0
+
+                # Se corta la conexión; mientras tanto cierran velas que no llegan por el stream
+                market.extend(_bars(50, 6))
+                server.frames.put_nowait(None)
+                await _until(lambda: stream.reconnects >= 1 and stream.connected)
+
+                columns = buffer.to_columns()
+                assert server.connections == 2
+                assert market.calls == 2
+                assert len(buffer) == 20
+                assert columns["open_time"].tolist() == [i * TF_MS for i in range(36, 56)]
+                assert (np.diff(columns["open_time"]) == TF_MS).all()
+
+                # Después del backfill el stream sigue actualizando la vela en curso
+                server.frames.put_nowait(_kline_frame(55, 777.0))
+                await _until(lambda: stream.messages == 3)
+                assert buffer.last_close() == 777.0
+                assert len(buffer) == 20
+            finally:
+                await stream.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stream_backoff_doubles_up_to_the_maximum(monkeypatch):
+    delays = []
+
+    async def recording_sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await _sleep(0)
+
+    async def scenario():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]  # puerto cerrado: cada intento falla enseguida
+
+        stream = MarketStreamService(["BTCUSDT"], ["1m"], buffer_size=5, ws_base=f"ws://127.0.0.1:{port}")
+        stream.RECONNECT_MIN_SECONDS = 1
+        stream.RECONNECT_MAX_SECONDS = 8
+        monkeypatch.setattr(asyncio, "sleep", recording_sleep)
+        await stream.start()
+        try:
+            await _until(lambda: stream.reconnects >= 6)
+        finally:
+            monkeypatch.undo()
+            await stream.stop()
+        assert not stream.connected
+
+    asyncio.run(scenario())
+    assert delays[:6] == [1, 2, 4, 8, 8, 8]
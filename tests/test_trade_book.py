@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.services.trade_book import OpenTrade, TradeBook
+
+TF_MS = 60_000
+
+
+def _book(*trades: OpenTrade) -> TradeBook:
+    book = TradeBook()
+    for t in trades:
+        book.add(t)
+    return book
+
+
+def _trade(trade_id: int, side: str, sl: float, tp: float, opened_at_ms: int = 0) -> OpenTrade:
+    return OpenTrade(trade_id, "BTCUSDT", "15m", side, 100.0, sl, tp, 0.001, opened_at_ms)
+
+
+def _range_hits(book: TradeBook, bars: list[tuple[float, float, float]]):
+    """bars: (open, high, low) de velas consecutivas desde open_time = 1 min"""
+    open_, high, low = (np.array(values, dtype=float) for values in zip(*bars))
+    open_time = np.arange(1, len(bars) + 1, dtype=np.int64) * TF_MS
+    return {t.id: (result, price) for t, result, price in book.range_hits("BTCUSDT", open_time, open_, high, low)}
+
+
+def test_hits_uses_last_price_and_sl_wins_ties():
+    book = _book(_trade(1, "long", 95.0, 110.0), _trade(2, "short", 105.0, 90.0), _trade(3, "long", 99.0, 99.0))
+    assert [(t.id, r) for t, r, _ in book.hits("BTCUSDT", 94.0)] == [(1, "loss"), (3, "loss")]
+    assert [(t.id, r) for t, r, _ in book.hits("BTCUSDT", 106.0)] == [(2, "loss"), (3, "win")]
+    # El trade 3 cruza SL y TP con el mismo precio: manda el SL
+    assert [(t.id, r, p) for t, r, p in book.hits("BTCUSDT", 99.0)] == [(3, "loss", 99.0)]
+
+
+def test_range_hits_closes_at_the_touched_level():
+    book = _book(_trade(1, "long", 95.0, 110.0), _trade(2, "short", 105.0, 90.0))
+    hits = _range_hits(book, [(100.0, 101.0, 99.0), (100.0, 102.0, 94.0), (96.0, 106.0, 95.5)])
+    assert hits == {1: ("loss", 95.0), 2: ("loss", 105.0)}
+
+
+def test_range_hits_gap_through_sl_closes_at_open():
+    book = _book(_trade(1, "long", 95.0, 110.0), _trade(2, "short", 105.0, 90.0))
+    hits = _range_hits(book, [(100.0, 101.0, 99.0), (93.0, 94.0, 92.0)])
+    assert hits[1] == ("loss", 93.0)
+
+    hits = _range_hits(book, [(100.0, 101.0, 99.0), (107.0, 108.0, 106.5)])
+    assert hits[2] == ("loss", 107.0)
+
+
+def test_range_hits_gap_through_tp_closes_at_open():
+    book = _book(_trade(1, "long", 95.0, 110.0), _trade(2, "short", 105.0, 90.0))
+    hits = _range_hits(book, [(100.0, 101.0, 99.0), (112.0, 113.0, 111.0)])
+    assert hits[1] == ("win", 112.0)
+
+    hits = _range_hits(book, [(100.0, 101.0, 99.0), (88.0, 89.0, 87.0)])
+    assert hits[2] == ("win", 88.0)
+
+
+def test_range_hits_bar_touching_both_levels_assumes_sl():
+    book = _book(_trade(1, "long", 95.0, 110.0), _trade(2, "short", 105.0, 90.0))
+    hits = _range_hits(book, [(100.0, 111.0, 89.0)])
+    assert hits == {1: ("loss", 95.0), 2: ("loss", 105.0)}
+
+
+def test_range_hits_first_touch_wins_and_ignores_bars_before_opening():
+    # Trade abierto a mitad de la segunda vela: la mecha de la primera no cuenta
+    book = _book(_trade(1, "long", 95.0, 110.0, opened_at_ms=int(1.5 * TF_MS)))
+    hits = _range_hits(book, [(100.0, 101.0, 90.0), (100.0, 101.0, 99.0), (100.0, 111.0, 99.0), (99.0, 99.5, 94.0)])
+    assert hits == {1: ("win", 110.0)}